@@ -0,0 +1,262 @@
+# Almacén de diagnósticos - SQLITE INDEXADO POR LAS 5 CLAVES, INGESTA INCREMENTAL
+# Uso: python almacen_diagnostico.py base_diagnosticos.xlsx [...] [--almacen ruta.sqlite]
+"""Histórico de la base de diagnósticos en SQLite, una fila por clave de búsqueda.
+
+    almacen = AlmacenDiagnostico()
+    almacen.ingerir_archivo('base_diagnosticos.XLSX', leer)   # solo filas nuevas o cambiadas
+    df_diagnostico = almacen.diagnostico_para(df_reporte)       # solo las claves del reporte
+
+La base solo crece: cada subida se ingiere una vez (un archivo ya ingerido,
+mismo SHA-256, ni se lee) y por clave queda el 'Modificado el' más reciente.
+El Paso 1 consulta solo las claves presentes en el Reporte 45, así que su
+costo depende del tamaño del reporte y no de los años acumulados.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing, contextmanager
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from cache_excel import hash_contenido
+from instrumentacion import decir
+from join_diagnostico import COLUMNAS_BUSQUEDA, COLUMNAS_MODIFICADO, resolver_duplicados
+from lectores_excel import nombre_archivo
+
+RUTA_POR_DEFECTO = os.environ.get('VALIDADOR_ALMACEN_DIAGNOSTICO', 'almacen/diagnosticos.sqlite')
+
+# Subir cuando cambie la forma de guardar las claves: un almacén viejo no se mezcla
+VERSION_ALMACEN = 1
+
+# Filas por executemany (acota la memoria de cada lote de parámetros)
+FILAS_POR_LOTE = 50_000
+
+# Columnas SQL de las 5 claves, en el orden de COLUMNAS_BUSQUEDA
+_CLAVES = ('numero_de_personal', 'numero_id', 'clase_absentpres', 'inicio_de_validez', 'fin_de_validez')
+_LISTA_CLAVES = ', '.join(_CLAVES)
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS diagnostico (
+    {', '.join(f'{clave} TEXT NOT NULL' for clave in _CLAVES)},
+    modificado_el TEXT,
+    modificado_por TEXT,
+    PRIMARY KEY ({_LISTA_CLAVES})
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS ingestas (
+    huella TEXT PRIMARY KEY,
+    archivo TEXT,
+    fecha TEXT,
+    filas INTEGER,
+    nuevas INTEGER,
+    actualizadas INTEGER,
+    segundos REAL
+);
+CREATE TABLE IF NOT EXISTS metadatos (clave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+
+def _canonico(valor):
+    """Texto estable de un valor clave: igual para el mismo dato venga como venga del Excel
+
+    Fechas 'AAAA-MM-DD' (con hora solo si la tienen), enteros sin '.0'; los
+    vacíos son '' (el lector ya convierte las celdas vacías en nulos).
+    """
+    if valor is None or valor is pd.NaT or (isinstance(valor, float) and np.isnan(valor)):
+        return ''
+    if isinstance(valor, (datetime, pd.Timestamp)):
+        if (valor.hour, valor.minute, valor.second, valor.microsecond) == (0, 0, 0, 0):
+            return valor.strftime('%Y-%m-%d')
+        return valor.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(valor, date):
+        return valor.strftime('%Y-%m-%d')
+    if isinstance(valor, (float, np.floating)) and float(valor).is_integer():
+        return str(int(valor))
+    return str(valor)
+
+
+def texto_canonico(serie):
+    """Columna -> textos canónicos, convirtiendo solo los valores distintos"""
+    codigos, unicos = pd.factorize(serie.to_numpy(dtype=object), use_na_sentinel=True)
+    textos = np.array([_canonico(valor) for valor in unicos] + [''], dtype=object)
+    return textos[np.where(codigos < 0, len(unicos), codigos)]
+
+
+def _fechas_o_texto(valores):
+    """'Modificado el' guardado como texto -> datetime (como lo deja el lector) si todo es fecha"""
+    serie = pd.Series(valores, dtype=object)
+    llenos = serie.notna()
+    if not llenos.any():
+        return pd.to_datetime(serie)
+    fechas = pd.to_datetime(serie, errors='coerce', format='ISO8601')
+    return fechas if fechas[llenos].notna().all() else serie
+
+
+class AlmacenDiagnostico:
+    """Base de diagnósticos persistente: clave primaria (sin rowid) sobre las 5 columnas de búsqueda
+
+    Cada operación abre su propia conexión (WAL): varios hilos o procesos pueden
+    consultar a la vez mientras otro ingiere.
+    """
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.executescript(_ESQUEMA)
+            # OR IGNORE: dos procesos que abren la base nueva a la vez no chocan por la fila de versión
+            conexion.execute("INSERT OR IGNORE INTO metadatos VALUES ('version', ?)", (str(VERSION_ALMACEN),))
+            version = conexion.execute("SELECT valor FROM metadatos WHERE clave = 'version'").fetchone()
+            if int(version[0]) != VERSION_ALMACEN:
+                raise ValueError(f"Almacén {self.ruta} en versión {version[0]}; esta versión usa "
+                                 f"{VERSION_ALMACEN}. Borrarlo y volver a ingerir las bases")
+
+    @contextmanager
+    def _conexion(self):
+        with closing(sqlite3.connect(self.ruta, timeout=60)) as conexion:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            with conexion:  # una transacción: commit al salir, rollback si falla
+                yield conexion
+
+    def ya_ingerido(self, huella):
+        with self._conexion() as conexion:
+            return conexion.execute("SELECT 1 FROM ingestas WHERE huella = ?", (huella,)).fetchone() is not None
+
+    def ingerir(self, df_diagnostico, huella=None, archivo=''):
+        """Agrega las filas nuevas y actualiza las claves con un 'Modificado el' más reciente
+
+        Dentro de la subida, por clave gana el 'Modificado el' más reciente
+        (resolver_duplicados 'reciente'); contra lo guardado, la fila entrante
+        reemplaza solo si su fecha es igual o posterior y trae algo distinto.
+        Devuelve {'filas', 'nuevas', 'actualizadas', 'segundos'}.
+        """
+        inicio = time.perf_counter()
+        faltantes = [col for col in COLUMNAS_BUSQUEDA + COLUMNAS_MODIFICADO if col not in df_diagnostico.columns]
+        if faltantes:
+            raise ValueError(f"El diagnóstico no tiene las columnas del almacén: {faltantes}")
+        df_diagnostico, _ = resolver_duplicados(df_diagnostico, COLUMNAS_BUSQUEDA, 'reciente')
+        columnas = [texto_canonico(df_diagnostico[col]) for col in COLUMNAS_BUSQUEDA]
+        modificado_el = texto_canonico(df_diagnostico['Modificado el'])
+        modificado_por = texto_canonico(df_diagnostico['Modificado por'])
+        columnas += [np.where(modificado_el == '', None, modificado_el),
+                     np.where(modificado_por == '', None, modificado_por)]
+
+        with self._conexion() as conexion:
+            conexion.execute(f"CREATE TEMP TABLE entrantes ({_LISTA_CLAVES}, modificado_el, modificado_por)")
+            for inicio_lote in range(0, len(df_diagnostico), FILAS_POR_LOTE):
+                lote = zip(*[columna[inicio_lote:inicio_lote + FILAS_POR_LOTE] for columna in columnas])
+                conexion.executemany("INSERT INTO temp.entrantes VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+            nuevas = conexion.execute(
+                f"SELECT COUNT(*) FROM temp.entrantes e WHERE NOT EXISTS (SELECT 1 FROM diagnostico d WHERE "
+                f"{' AND '.join(f'd.{clave} = e.{clave}' for clave in _CLAVES)})").fetchone()[0]
+            antes = conexion.total_changes
+            conexion.execute(
+                f"INSERT INTO diagnostico SELECT * FROM temp.entrantes WHERE true "
+                f"ON CONFLICT ({_LISTA_CLAVES}) DO UPDATE SET "
+                f"modificado_el = excluded.modificado_el, modificado_por = excluded.modificado_por "
+                f"WHERE (diagnostico.modificado_el IS NULL OR excluded.modificado_el >= diagnostico.modificado_el) "
+                f"AND (excluded.modificado_el IS NOT diagnostico.modificado_el "
+                f"OR excluded.modificado_por IS NOT diagnostico.modificado_por)")
+            escritas = conexion.total_changes - antes
+            conexion.execute("DROP TABLE temp.entrantes")
+            resultado = {
+                'filas': len(df_diagnostico),
+                'nuevas': nuevas,
+                'actualizadas': escritas - nuevas,
+                'segundos': round(time.perf_counter() - inicio, 4),
+            }
+            if huella is not None:
+                conexion.execute("INSERT OR REPLACE INTO ingestas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 (huella, archivo, datetime.now().isoformat(timespec='seconds'),
+                                  resultado['filas'], resultado['nuevas'], resultado['actualizadas'],
+                                  resultado['segundos']))
+        decir(f"   🗄️ Almacén: {resultado['nuevas']:,} nuevas, {resultado['actualizadas']:,} actualizadas "
+              f"de {resultado['filas']:,} ({resultado['segundos']}s)")
+        return resultado
+
+    def pendiente(self, origen):
+        """(origen, huella) de un Excel por ingerir; (None, huella) si ese contenido ya está en el almacén"""
+        huella = hash_contenido(origen)
+        if self.ya_ingerido(huella):
+            decir(f"   🗄️ {nombre_archivo(origen)} ya está en el almacén: no se vuelve a leer")
+            return None, huella
+        return origen, huella
+
+    def ingerir_archivo(self, origen, leer):
+        """Ingiere un Excel (ruta o en memoria) si no se ingirió antes; leer(origen) -> DataFrame
+
+        El archivo ya visto (mismo contenido) no se parsea: devuelve {'omitido': True}.
+        None si leer() no pudo leerlo.
+        """
+        origen, huella = self.pendiente(origen)
+        if origen is None:
+            return {'omitido': True, 'filas': 0, 'nuevas': 0, 'actualizadas': 0}
+        df = leer(origen)
+        if df is None:
+            return None
+        return dict(self.ingerir(df, huella, nombre_archivo(origen)), omitido=False)
+
+    def diagnostico_para(self, df_reporte):
+        """Filas del almacén para las claves del reporte, con las columnas del diagnóstico
+
+        Las columnas clave salen del propio reporte (mismos tipos que el join
+        espera) y solo viajan a SQLite las claves distintas del reporte. Una fila
+        por clave: el join del Paso 1 no tiene duplicados que resolver.
+        """
+        claves = pd.DataFrame({clave: texto_canonico(df_reporte[col]) for clave, col in zip(_CLAVES, COLUMNAS_BUSQUEDA)})
+        claves['fila'] = np.arange(len(claves))
+        claves = claves.drop_duplicates(list(_CLAVES))
+
+        with self._conexion() as conexion:
+            conexion.execute(f"CREATE TEMP TABLE buscadas ({_LISTA_CLAVES}, fila INTEGER)")
+            conexion.executemany("INSERT INTO temp.buscadas VALUES (?, ?, ?, ?, ?, ?)",
+                                 claves.itertuples(index=False, name=None))
+            encontradas = conexion.execute(
+                f"SELECT b.fila, d.modificado_el, d.modificado_por FROM temp.buscadas b "
+                f"JOIN diagnostico d USING ({_LISTA_CLAVES})").fetchall()
+            conexion.execute("DROP TABLE temp.buscadas")
+
+        filas = np.array([fila for fila, _, _ in encontradas], dtype=np.int64)
+        df = df_reporte[COLUMNAS_BUSQUEDA].iloc[filas].reset_index(drop=True)
+        df['Modificado el'] = _fechas_o_texto([modificado_el for _, modificado_el, _ in encontradas])
+        df['Modificado por'] = pd.Series([modificado_por for _, _, modificado_por in encontradas], dtype=object)
+        decir(f"   🗄️ Almacén: {len(df):,} de {len(claves):,} claves del reporte con diagnóstico")
+        return df
+
+    def estadisticas(self):
+        with self._conexion() as conexion:
+            filas = conexion.execute("SELECT COUNT(*) FROM diagnostico").fetchone()[0]
+            ingestas, ultima = conexion.execute("SELECT COUNT(*), MAX(fecha) FROM ingestas").fetchone()
+        return {
+            'ruta': str(self.ruta),
+            'claves': filas,
+            'ingestas': ingestas,
+            'ultima_ingesta': ultima,
+            'mb': round(self.ruta.stat().st_size / 1024 / 1024, 2) if self.ruta.exists() else 0.0,
+        }
+
+
+def main():
+    from part1_validation_reporte_45 import leer_excel_y_renombrar_duplicadas
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivos', nargs='+', help='Bases de diagnósticos (.xlsx) a ingerir, en orden')
+    parser.add_argument('--almacen', default=RUTA_POR_DEFECTO)
+    args = parser.parse_args()
+
+    almacen = AlmacenDiagnostico(args.almacen)
+    for archivo in args.archivos:
+        if almacen.ingerir_archivo(archivo, leer_excel_y_renombrar_duplicadas) is None:
+            print(f"❌ No se pudo ingerir {archivo}")
+            return 1
+    print(f"✅ {almacen.estadisticas()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
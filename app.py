@@ -1,17 +1,26 @@
 import streamlit as st
-import pandas as pd
 import sys
 import os
 from datetime import datetime
-import io
+import uuid
 
 # Agregar el directorio actual al path para importar los módulos
 sys.path.append(os.path.dirname(__file__))
 
 # Importar las funciones de validación - EXACTAS DEL GITHUB
 try:
-    from part1_validation_reporte_45 import validar_ausentismos_original
-    from part2_dash_store_total import agregar_tiendas_modificado
+    from cache_excel import PARQUET_DISPONIBLE, CacheParquet
+    from cache_tiendas import CacheTiendas
+    from descargas import formatear_tamano
+    from esquemas import validar_encabezados
+    from lectores_excel import ArchivoEnMemoria
+    from instrumentacion import ETAPAS_PASO1, ETAPAS_PASO2
+    from trabajos import GestorTrabajos
+    from pasos_nomina import trabajo_tiendas, trabajo_validacion
+    from sonda_archivos import sondear
+    from perfil_calidad import perfil_a_dataframe
+    from almacen_diagnostico import AlmacenDiagnostico
+    from historial_ausentismos import HistorialAusentismos
     print("✅ Módulos importados correctamente del GitHub")
 except ImportError as e:
     st.error(f"❌ Error importando módulos: {e}")
@@ -216,10 +225,166 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# Crear carpetas temporales
-os.makedirs("temp", exist_ok=True)
+# Carpeta de resultados (las subidas se leen en memoria: no hay carpeta temporal)
 os.makedirs("salidas", exist_ok=True)
 
+# Cache de Excel parseados (compartido por todas las sesiones del proceso)
+@st.cache_resource
+def obtener_cache_excel():
+    return CacheParquet()
+
+cache_excel = obtener_cache_excel()
+
+# Maestro de tiendas ya preparado (CECO -> tienda), compartido por todas las sesiones
+@st.cache_resource
+def obtener_cache_tiendas():
+    return CacheTiendas()
+
+cache_tiendas = obtener_cache_tiendas()
+
+# Pool de trabajos en segundo plano (un proceso por trabajo): la página no espera al pipeline y el resultado sobrevive a los reruns
+@st.cache_resource
+def obtener_gestor_trabajos():
+    return GestorTrabajos()
+
+gestor_trabajos = obtener_gestor_trabajos()
+
+# Histórico de diagnósticos (SQLite): cada base subida se ingiere una vez y el Paso 1 consulta solo lo que necesita
+@st.cache_resource
+def obtener_almacen_diagnostico():
+    return AlmacenDiagnostico()
+
+# Historial de reportes finales (SQLite por periodo): lo consulta la página 📚 Historial
+@st.cache_resource
+def obtener_historial():
+    return HistorialAusentismos()
+
+# Los trabajos de cada pestaña se reconocen por este id
+if 'sesion' not in st.session_state:
+    st.session_state['sesion'] = uuid.uuid4().hex[:12]
+
+def mostrar_errores_layout(esquemas):
+    """Explica qué columnas faltan cuando un archivo no tiene el layout esperado"""
+    for resultado in esquemas.values():
+        if not resultado['valido']:
+            archivo = resultado.get('archivo', resultado['esquema'])
+            st.error(f"🧾 {archivo} no parece un archivo de **{resultado['esquema']}** "
+                     f"(layout v{resultado['version']}). Faltan: {', '.join(resultado['faltantes'])}")
+
+# Sonda de cada archivo subido: una vez por subida, no en cada rerun de la página
+@st.cache_data(show_spinner=False, max_entries=32)
+def sondear_subida(file_id, nombre, tamano, _archivo):
+    return sondear(_archivo, nombre)
+
+def mostrar_sonda(archivo, esquema=None):
+    """Columnas, filas estimadas, tamaño y tiempo previsto (+ layout si se indica esquema)"""
+    try:
+        sonda = sondear_subida(archivo.file_id, archivo.name, archivo.size, archivo)
+    except Exception:
+        st.warning("⚠️ No se pudo leer el preview del archivo")
+        return
+    if sonda['filas'] is None:
+        filas = "? filas"
+    else:
+        filas = f"{'' if sonda['filas_exactas'] else '~'}{sonda['filas']:,} filas"
+    tiempo = f" · ⏱️ ~{sonda['segundos_estimados']:.1f} s" if sonda['segundos_estimados'] is not None else ""
+    st.info(f"📋 {len(sonda['columnas'])} columnas · {filas} · {formatear_tamano(sonda['tamano'])}{tiempo}")
+    if esquema:
+        layout = validar_encabezados(esquema, sonda['columnas'])
+        if not layout['valido']:
+            st.warning(f"🧾 No parece un archivo de **{esquema}**. Faltan: {', '.join(layout['faltantes'])}")
+
+def contar_consultas_cache(resultado):
+    """Al terminar un trabajo: su proceso consultó su propia copia del cache de Excel"""
+    cache_excel.contar(**resultado.pop('cache_excel', {}))
+    return resultado
+
+def terminar_tiendas(clave_tiendas, resultado):
+    """Al terminar el Paso 2: el maestro que preparó el proceso queda en el cache de la página"""
+    maestro = resultado.pop('maestro', None)
+    if maestro is not None:
+        cache_tiendas.guardar(clave_tiendas, *maestro)
+    return contar_consultas_cache(resultado)
+
+ICONOS_ESTADO = {'en_cola': '⏳', 'ejecutando': '⚙️', 'terminado': '✅', 'error': '❌', 'cancelado': '⛔'}
+
+@st.fragment(run_every=1.0)
+def panel_trabajo(id_trabajo):
+    """Avance real (etapas terminadas) de un trabajo en curso; solo este bloque se refresca"""
+    trabajo = gestor_trabajos.obtener(id_trabajo)
+    if trabajo is None:
+        return
+    if trabajo.estado not in ('en_cola', 'ejecutando'):
+        st.rerun()  # terminó: la página completa muestra el resultado
+    if trabajo.estado == 'en_cola':
+        texto = f"⏳ En cola ({trabajo.id}): esperando un trabajador libre"
+    else:
+        ultima = f" · última etapa: {trabajo.etapa_actual}" if trabajo.etapa_actual else ""
+        texto = f"⚙️ Procesando ({trabajo.id}){ultima}"
+    st.progress(trabajo.progreso, text=texto)
+    if trabajo.cancelacion_pedida:
+        st.caption("⛔ Cancelación pedida: se detiene al terminar la etapa en curso")
+    elif st.button("⛔ Cancelar", key=f"cancelar_{trabajo.id}"):
+        gestor_trabajos.cancelar(trabajo.id)
+
+def trabajo_de_sesion(clave):
+    """El último trabajo de este paso en esta pestaña (None si no hay o ya se descartó)"""
+    id_trabajo = st.session_state.get(clave)
+    return gestor_trabajos.obtener(id_trabajo) if id_trabajo else None
+
+def mostrar_fallo(trabajo):
+    """Error o cancelación de un trabajo terminado; True si no hay resultado que mostrar"""
+    if trabajo.estado == 'cancelado':
+        st.warning(f"⛔ Trabajo {trabajo.id} cancelado{f': {trabajo.error}' if trabajo.error else ''}")
+        return True
+    if trabajo.estado == 'error':
+        st.error(f"💥 Error durante el procesamiento: {trabajo.error}")
+        with st.expander("🔍 Detalles del error"):
+            st.code(trabajo.detalle_error or trabajo.error)
+        return True
+    return False
+
+def mostrar_calidad(calidad):
+    """Cobertura de los cruces + completitud, distintos, top y tipos por columna (ya calculados en el trabajo)"""
+    nombres = {'diagnostico': "🩺 Con diagnóstico", 'tiendas': "🏪 Con tienda"}
+    with st.expander(f"🔬 Calidad de datos: {len(calidad['columnas'])} columnas en {calidad['segundos']:.2f} s"):
+        if calidad['cobertura']:
+            columnas = st.columns(len(calidad['cobertura']))
+            for columna, (cruce, cobertura) in zip(columnas, calidad['cobertura'].items()):
+                columna.metric(nombres.get(cruce, cruce), f"{cobertura['tasa']:.1%}",
+                               f"{cobertura['con_coincidencia']:,} de {cobertura['filas']:,}", delta_color="off")
+        st.dataframe(perfil_a_dataframe(calidad), use_container_width=True, hide_index=True)
+
+def mostrar_informe(informe, nombre_base):
+    """Etapas de la corrida (filas, tiempo, memoria pico) + descarga en JSON lines"""
+    resumen = informe.resumen()
+    pico = f" · pico {resumen['memoria_pico_mb']} MB" if resumen['memoria_pico_mb'] is not None else ""
+    with st.expander(f"⏱️ Informe de ejecución: {resumen['segundos']:.2f} s en {resumen['etapas']} etapas{pico}"):
+        columnas = ['etapa', 'filas', 'segundos', 'memoria_pico_mb']
+        st.dataframe(informe.a_dataframe()[columnas], use_container_width=True, hide_index=True)
+        st.download_button("📄 Exportar informe (JSON lines)", informe.a_jsonl(),
+                           file_name=f"{nombre_base}.jsonl", mime="application/jsonl")
+
+# Formato de las descargas (CSV por bloques, opcionalmente comprimido, Excel o columnar con tipos)
+OPCIONES_DESCARGA = {"CSV": ('csv', None), "CSV comprimido (.gz)": ('csv', 'gzip'), "ZIP": ('csv', 'zip'),
+                     "Excel (.xlsx)": ('xlsx', None)}
+if PARQUET_DISPONIBLE:
+    OPCIONES_DESCARGA.update({"Parquet": ('parquet', None), "Arrow IPC": ('arrow', None)})
+formato_descarga = st.sidebar.selectbox("📦 Formato de descarga", list(OPCIONES_DESCARGA))
+opcion_descarga = OPCIONES_DESCARGA[formato_descarga]
+
+# El detalle por consola (muestras, tipos...) solo sirve para depurar: apagado cuesta nada
+detalle_consola = st.sidebar.checkbox("🖨️ Detalle en la consola del servidor", value=False)
+
+# Con el almacén la base de diagnósticos es opcional: se cruza contra todo lo ingerido antes
+usar_almacen = st.sidebar.checkbox("🗄️ Usar almacén de diagnósticos", value=False,
+                                   help="Cada base subida se guarda (solo filas nuevas o cambiadas) y el Paso 1 "
+                                        "puede correr solo con el Reporte 45")
+almacen_diagnostico = obtener_almacen_diagnostico() if usar_almacen else None
+
+guardar_historial = st.sidebar.checkbox("📚 Guardar reportes finales en el historial", value=True,
+                                        help="El resultado del Paso 2 queda consultable en la página 📚 Historial")
+
 # PASO 1: VALIDACIÓN
 st.markdown('<div class="step-container">', unsafe_allow_html=True)
 st.header("🔍 Paso 1: Validación de Ausentismos")
@@ -229,12 +394,13 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("### 📂 Base de Diagnósticos")
     archivo_base = st.file_uploader(
-        "Sube archivo Excel (.xlsx)",
+        "Sube archivo Excel (.xlsx)" + (" - opcional con el almacén" if usar_almacen else ""),
         type=['xlsx', 'xls'],
         key="base"
     )
     if archivo_base:
         st.success("✅ Archivo cargado")
+        mostrar_sonda(archivo_base, 'diagnostico')
 
 with col2:
     st.markdown("### 📊 Reporte 45")
@@ -245,95 +411,69 @@ with col2:
     )
     if archivo_reporte:
         st.success("✅ Archivo cargado")
+        mostrar_sonda(archivo_reporte, 'reporte_45')
 
 # Procesar validación
-if archivo_base and archivo_reporte:
+if archivo_reporte and (archivo_base or usar_almacen):
     st.markdown('<div class="status-success"><h3>🎯 Archivos listos - Procesar validación</h3></div>', unsafe_allow_html=True)
     
-    if st.button("🚀 VALIDAR DATOS", type="primary", use_container_width=True):
-        # Crear contenedor para logs
-        log_container = st.empty()
-        progress_bar = st.progress(0)
-        
-        try:
-            # Log inicial
-            log_container.info("🔄 Iniciando validación de datos...")
-            progress_bar.progress(10)
-            
-            # Guardar archivos temporalmente
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            ruta_base = f"temp/base_{timestamp}.xlsx"
-            ruta_reporte = f"temp/reporte_{timestamp}.xlsx"
-            
-            log_container.info("💾 Guardando archivos temporalmente...")
-            progress_bar.progress(20)
-            
-            with open(ruta_base, "wb") as f:
-                f.write(archivo_base.getvalue())
-            with open(ruta_reporte, "wb") as f:
-                f.write(archivo_reporte.getvalue())
-            
-            log_container.info("✅ Archivos guardados, iniciando procesamiento...")
-            progress_bar.progress(30)
-            
-            # Ejecutar validación con logs
-            log_container.info("🔍 Ejecutando validar_ausentismos_original...")
-            log_container.info("📊 Leyendo base de diagnósticos...")
-            progress_bar.progress(50)
+    trabajo = trabajo_de_sesion('trabajo_paso1')
+    en_curso = trabajo is not None and trabajo.estado in ('en_cola', 'ejecutando')
+    
+    if st.button("🚀 VALIDAR DATOS", type="primary", use_container_width=True, disabled=en_curso):
+        # El pipeline corre en el gestor: la página sigue respondiendo
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        base = ArchivoEnMemoria(archivo_base.getvalue(), archivo_base.name) if archivo_base else None
+        trabajo = gestor_trabajos.enviar(
+            'paso1', trabajo_validacion, base,
+            ArchivoEnMemoria(archivo_reporte.getvalue(), archivo_reporte.name), timestamp, opcion_descarga, detalle_consola,
+            cache_excel, almacen_diagnostico,
+            etapas=ETAPAS_PASO1 + (('almacen',) if usar_almacen else ()) + ('calidad',), dueno=st.session_state['sesion'],
+            descripcion=f"{archivo_base.name if archivo_base else 'almacén'} + {archivo_reporte.name}",
+            al_terminar=contar_consultas_cache
+        )
+        st.session_state['trabajo_paso1'] = trabajo.id
+        en_curso = True
+    
+    if en_curso:
+        panel_trabajo(trabajo.id)
+    elif trabajo is not None and not mostrar_fallo(trabajo):
+        resultado = trabajo.resultado
+        if resultado['filas'] is not None:
+            st.success(f"🎉 Proceso terminado - {resultado['filas']:,} registros validados en {trabajo.segundos:.1f} s")
             
-            ruta_validado = validar_ausentismos_original(ruta_base, ruta_reporte)
+            # Tiempo de cada Excel (se leen a la vez; el total ~ el más lento)
+            carga = resultado['carga']
+            if carga:
+                tiempos = " · ".join(f"{nombre}: {lectura['segundos']}s ({lectura['motor']})"
+                                     for nombre, lectura in carga['lecturas'].items() if lectura)
+                st.caption(f"⏱️ Carga en {carga['ejecutor']}: {tiempos} · total {carga['segundos_total']}s")
+            mostrar_calidad(resultado['calidad'])
+            mostrar_informe(trabajo.informe, f"informe_validacion_{resultado['timestamp']}")
             
-            log_container.info("📈 Combinando datos del reporte...")
-            progress_bar.progress(70)
+            # DESCARGA AUTOMÁTICA DEL PASO 1
+            archivo_descarga, nombre_descarga, mime_descarga, tamano_descarga = resultado['descarga']
             
-            if ruta_validado:
-                log_container.info("📋 Normalizando columnas y formatos...")
-                progress_bar.progress(85)
-                
-                # Leer resultado
-                df_validado = pd.read_csv(ruta_validado, encoding='utf-8-sig')
-                
-                log_container.success(f"✅ Validación completada: {len(df_validado):,} registros procesados")
-                progress_bar.progress(100)
-                
-                st.success(f"🎉 Proceso terminado - {len(df_validado):,} registros validados")
-                
-                # DESCARGA AUTOMÁTICA DEL PASO 1
-                csv_data = df_validado.to_csv(index=False, encoding='utf-8-sig')
-                nombre_descarga = f"datos_validados_{timestamp}.csv"
-                
-                st.download_button(
-                    label="📥 DESCARGAR DATOS VALIDADOS",
-                    data=csv_data,
-                    file_name=nombre_descarga,
-                    mime="text/csv",
-                    type="primary",
-                    use_container_width=True
-                )
-                
-                # Guardar en session_state SOLO PARA REFERENCIA (no necesario para Paso 2)
-                st.session_state['ultimo_timestamp'] = timestamp
-                
-            else:
-                log_container.error("❌ Error: No se pudo completar la validación")
-                progress_bar.progress(0)
+            st.download_button(
+                label=f"📥 DESCARGAR DATOS VALIDADOS ({formatear_tamano(tamano_descarga)})",
+                data=archivo_descarga.read_bytes,  # se lee del disco recién al descargar
+                file_name=nombre_descarga,
+                mime=mime_descarga,
+                type="primary",
+                use_container_width=True
+            )
             
-            # Limpiar archivos temporales
-            log_container.info("🧹 Limpiando archivos temporales...")
-            for archivo in [ruta_base, ruta_reporte]:
-                if os.path.exists(archivo):
-                    os.remove(archivo)
+            # Guardar en session_state SOLO PARA REFERENCIA (no necesario para Paso 2)
+            st.session_state['ultimo_timestamp'] = resultado['timestamp']
             
-            log_container.success("🎯 Proceso completado - Archivos temporales eliminados")
-                    
-        except Exception as e:
-            log_container.error(f"💥 Error durante el procesamiento: {str(e)}")
-            progress_bar.progress(0)
-            st.error(f"❌ Error: {str(e)}")
-            st.exception(e)
+        else:
+            st.error("❌ Error: No se pudo completar la validación")
+            mostrar_errores_layout(resultado['esquemas'])
 
 elif archivo_base or archivo_reporte:
     st.markdown('<div class="status-warning"><h4>⚠️ Sube ambos archivos para continuar</h4></div>', unsafe_allow_html=True)
+elif usar_almacen:
+    st.markdown('<div class="upload-zone"><h3>📁 Sube el Reporte 45</h3><p>Los diagnósticos salen del almacén (la base es opcional)</p></div>', unsafe_allow_html=True)
 else:
     st.markdown('<div class="upload-zone"><h3>📁 Sube los 2 archivos Excel</h3><p>Base de diagnósticos + Reporte 45</p></div>', unsafe_allow_html=True)
 
@@ -346,7 +486,8 @@ st.header("🏪 Paso 2: Agregar Tiendas")
 # LIMPIAR CUALQUIER MIERDA DEL SESSION STATE
 if st.button("🧹 LIMPIAR TODO", type="secondary"):
     for key in list(st.session_state.keys()):
-        del st.session_state[key]
+        if key != 'sesion':  # sin su id, los trabajos de esta pestaña quedarían huérfanos
+            del st.session_state[key]
     st.success("✅ Session limpiado - Ahora sube tus archivos")
     st.rerun()
 
@@ -362,20 +503,14 @@ col1, col2 = st.columns(2)
 with col1:
     st.markdown("### 📊 CSV Validado (Paso 1)")
     archivo_validado = st.file_uploader(
-        "Sube el CSV que descargaste del Paso 1",
-        type=['csv'],
+        "Sube el CSV (o Excel / Parquet / Arrow) que descargaste del Paso 1",
+        type=['csv', 'xlsx', 'parquet', 'arrow', 'feather'] if PARQUET_DISPONIBLE else ['csv', 'xlsx'],
         key="validado_csv_independiente",
-        help="El archivo CSV que descargaste del Paso 1"
+        help="El archivo que descargaste del Paso 1; Parquet y Arrow traen los tipos y se leen sin parsear CSV"
     )
     if archivo_validado:
         st.success("✅ CSV validado cargado")
-        # Mostrar info del archivo
-        try:
-            import io
-            df_preview = pd.read_csv(io.BytesIO(archivo_validado.getvalue()), nrows=0)
-            st.info(f"📋 Columnas detectadas: {len(df_preview.columns)}")
-        except:
-            st.warning("⚠️ No se pudo leer el preview del CSV")
+        mostrar_sonda(archivo_validado)
 
 with col2:
     st.markdown("### 🏪 Excel de Tiendas")
@@ -387,164 +522,79 @@ with col2:
     )
     if archivo_tiendas:
         st.success("✅ Excel de tiendas cargado")
-        # Mostrar info del archivo
-        try:
-            df_tiendas_preview = pd.read_excel(io.BytesIO(archivo_tiendas.getvalue()), nrows=0)
-            st.info(f"📋 Columnas detectadas: {len(df_tiendas_preview.columns)}")
-        except:
-            st.warning("⚠️ No se pudo leer el preview del Excel")
+        mostrar_sonda(archivo_tiendas, 'tiendas')
 
 # Procesar tiendas - COMPLETAMENTE INDEPENDIENTE
 if archivo_validado and archivo_tiendas:
     st.markdown('<div class="status-success"><h3>🎯 AMBOS ARCHIVOS LISTOS - Procesar independientemente</h3></div>', unsafe_allow_html=True)
     
-    if st.button("🔗 PROCESAR TIENDAS (INDEPENDIENTE)", type="primary", use_container_width=True):
-        # Crear contenedor para logs
-        log_container = st.empty()
-        progress_bar = st.progress(0)
-        
-        try:
-            log_container.info("🏪 Iniciando proceso INDEPENDIENTE de tiendas...")
-            progress_bar.progress(10)
-            
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            
-            # Guardar CSV validado temporalmente
-            log_container.info("💾 Guardando CSV validado (sin tocar session_state)...")
-            progress_bar.progress(20)
-            
-            ruta_validado_temp = f"temp/csv_validado_{timestamp}.csv"
-            with open(ruta_validado_temp, "wb") as f:
-                f.write(archivo_validado.getvalue())
-            
-            log_container.info(f"✅ CSV guardado en: {ruta_validado_temp}")
-            
-            # Guardar Excel de tiendas temporalmente  
-            log_container.info("📊 Guardando Excel de tiendas...")
-            progress_bar.progress(30)
-            
-            ruta_tiendas_temp = f"temp/excel_tiendas_{timestamp}.xlsx"
-            with open(ruta_tiendas_temp, "wb") as f:
-                f.write(archivo_tiendas.getvalue())
-            
-            log_container.info(f"✅ Excel guardado en: {ruta_tiendas_temp}")
-            
-            # Verificar que los archivos existen
-            log_container.info("🔍 Verificando archivos guardados...")
-            progress_bar.progress(40)
-            
-            if not os.path.exists(ruta_validado_temp):
-                raise Exception(f"No se pudo guardar el CSV en {ruta_validado_temp}")
-            if not os.path.exists(ruta_tiendas_temp):
-                raise Exception(f"No se pudo guardar el Excel en {ruta_tiendas_temp}")
-            
-            log_container.info("✅ Archivos verificados, ejecutando función de tiendas...")
-            progress_bar.progress(50)
+    trabajo = trabajo_de_sesion('trabajo_paso2')
+    en_curso = trabajo is not None and trabajo.estado in ('en_cola', 'ejecutando')
+    
+    if st.button("🔗 PROCESAR TIENDAS (INDEPENDIENTE)", type="primary", use_container_width=True, disabled=en_curso):
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        tiendas = ArchivoEnMemoria(archivo_tiendas.getvalue(), archivo_tiendas.name)
+        # El maestro ya preparado viaja al proceso del trabajo: el Excel de tiendas no se vuelve a parsear
+        clave_tiendas = cache_tiendas.clave(tiendas)
+        trabajo = gestor_trabajos.enviar(
+            'paso2', trabajo_tiendas, ArchivoEnMemoria(archivo_validado.getvalue(), archivo_validado.name),
+            tiendas, timestamp, opcion_descarga, detalle_consola, cache_excel, cache_tiendas.obtener(clave_tiendas),
+            obtener_historial() if guardar_historial else None,
+            etapas=ETAPAS_PASO2 + (('historial',) if guardar_historial else ()) + ('calidad',),
+            dueno=st.session_state['sesion'],
+            descripcion=f"{archivo_validado.name} + {archivo_tiendas.name}",
+            al_terminar=lambda resultado: terminar_tiendas(clave_tiendas, resultado)
+        )
+        st.session_state['trabajo_paso2'] = trabajo.id
+        en_curso = True
+    
+    if en_curso:
+        panel_trabajo(trabajo.id)
+    elif trabajo is not None and not mostrar_fallo(trabajo):
+        resultado = trabajo.resultado
+        if resultado['filas'] is not None:
+            st.success(f"🎉 ¡ÉXITO CON CÓDIGO GITHUB! - {resultado['filas']:,} registros procesados")
             
-            # Ejecutar agregado de tiendas - FUNCIÓN ORIGINAL DEL GITHUB
-            ruta_final = f"salidas/reporte_tiendas_{timestamp}.csv"
+            # VERIFICAR LA COLUMNA value_tienda
+            if resultado['muestra_tienda'] is not None:
+                st.info(f"🔍 Muestra value_tienda: {resultado['muestra_tienda']}")
+            st.caption(f"💾 Archivo corregido guardado: {resultado['ruta']}")
             
-            log_container.info("🔗 Ejecutando agregar_tiendas_modificado (GitHub)...")
-            progress_bar.progress(60)
+            # DESCARGA DEL REPORTE CORREGIDO (por bloques)
+            archivo_descarga, nombre_descarga, mime_descarga, tamano_descarga = resultado['descarga']
             
-            resultado = agregar_tiendas_modificado(
-                ruta_validado_temp,
-                ruta_tiendas_temp, 
-                ruta_final
+            st.download_button(
+                label=f"📥 DESCARGAR REPORTE CORREGIDO ({formatear_tamano(tamano_descarga)})",
+                data=archivo_descarga.read_bytes,  # se lee del disco recién al descargar
+                file_name=nombre_descarga,
+                mime=mime_descarga,
+                type="primary",
+                use_container_width=True
             )
             
-            progress_bar.progress(80)
+            # Métricas
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("📊 Registros", f"{resultado['filas']:,}")
+            with col2:
+                # Del perfil de calidad: sin otra pasada por la columna
+                perfil_tienda = [columna for columna in resultado['calidad']['columnas']
+                                 if columna['columna'] == 'nombre_tienda']
+                if perfil_tienda:
+                    st.metric("🏪 Con Tienda", f"{perfil_tienda[0]['no_vacios']:,}")
+            with col3:
+                st.metric("📋 Columnas", resultado['columnas'])
             
-            if resultado and os.path.exists(resultado):
-                log_container.info("📊 Leyendo resultado final...")
-                
-                # Leer resultado final
-                df_final = pd.read_csv(resultado, encoding='utf-8-sig')
-                
-                # 🔥 FORZAR LIMPIEZA DE value_tienda AQUÍ EN LA APP
-                if 'value_tienda' in df_final.columns:
-                    log_container.info("🔧 FORZANDO limpieza de value_tienda en la app...")
-                    
-                    # CONVERTIR A STRING INMEDIATAMENTE
-                    df_final['value_tienda'] = df_final['value_tienda'].astype(str)
-                    
-                    # ANTES de limpiar
-                    antes = df_final['value_tienda'].head(5).tolist()
-                    log_container.info(f"🔍 ANTES de limpiar: {antes}")
-                    
-                    # LIMPIAR: quitar .0, puntos y último cero
-                    df_final['value_tienda'] = (df_final['value_tienda']
-                                               .str.replace('.0', '', regex=False)  # Quitar .0
-                                               .str.rstrip('.')                     # Quitar punto final
-                                               .apply(lambda x: x[:-1] if x.endswith('0') and len(x) > 1 else x))  # Quitar último 0
-                    
-                    # DESPUÉS de limpiar
-                    despues = df_final['value_tienda'].head(5).tolist()
-                    log_container.info(f"✅ LIMPIEZA COMPLETA: {despues}")
-                
-                log_container.success(f"✅ PROCESO GITHUB + STRING LIMPIO: {len(df_final):,} registros")
-                progress_bar.progress(95)
-                
-                st.success(f"🎉 ¡ÉXITO CON CÓDIGO GITHUB! - {len(df_final):,} registros procesados")
-                
-                # VERIFICAR LA COLUMNA value_tienda
-                if 'value_tienda' in df_final.columns:
-                    sample_values = df_final['value_tienda'].head(10).tolist()
-                    st.info(f"🔍 Muestra value_tienda: {sample_values}")
-                
-                # GUARDAR EL ARCHIVO CORREGIDO
-                csv_final = df_final.to_csv(index=False, encoding='utf-8-sig')
-                
-                # También guardar archivo corregido en disco
-                ruta_corregida = f"salidas/reporte_tiendas_corregido_{timestamp}.csv"
-                df_final.to_csv(ruta_corregida, index=False, encoding='utf-8-sig')
-                log_container.info(f"💾 Archivo corregido guardado: {ruta_corregida}")
-                
-                st.download_button(
-                    label="📥 DESCARGAR REPORTE CORREGIDO",
-                    data=csv_final,
-                    file_name=f"reporte_tiendas_corregido_{timestamp}.csv",
-                    mime="text/csv",
-                    type="primary",
-                    use_container_width=True
-                )
-                
-                # Métricas
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("📊 Registros", f"{len(df_final):,}")
-                with col2:
-                    if 'nombre_tienda' in df_final.columns:
-                        con_tienda = (df_final['nombre_tienda'] != '').sum()
-                        st.metric("🏪 Con Tienda", f"{con_tienda:,}")
-                with col3:
-                    st.metric("📋 Columnas", len(df_final.columns))
-                
-                progress_bar.progress(100)
-                log_container.success("🎯 ¡TODO LISTO! Archivo descargable generado")
+            mostrar_calidad(resultado['calidad'])
+            mostrar_informe(trabajo.informe, f"informe_tiendas_{resultado['timestamp']}")
+            # Los globos una sola vez, no en cada rerun
+            if not st.session_state.get(f"celebrado_{trabajo.id}"):
+                st.session_state[f"celebrado_{trabajo.id}"] = True
                 st.balloons()
-                
-            else:
-                log_container.error("❌ ERROR: No se generó el archivo final")
-                st.error("No se pudo generar el resultado")
-            
-            # Limpiar archivos temporales
-            log_container.info("🧹 Limpiando archivos temporales...")
-            for archivo in [ruta_validado_temp, ruta_tiendas_temp]:
-                if os.path.exists(archivo):
-                    os.remove(archivo)
-                    log_container.info(f"🗑️ Eliminado: {archivo}")
             
-            log_container.success("✨ Limpieza completada")
-                    
-        except Exception as e:
-            log_container.error(f"💥 ERROR: {str(e)}")
-            progress_bar.progress(0)
-            st.error(f"❌ Error: {str(e)}")
-            
-            # Mostrar detalles del error
-            st.markdown("### 🔍 Detalles del error:")
-            st.exception(e)
+        else:
+            st.error("❌ ERROR: No se generó el archivo final")
+            mostrar_errores_layout(resultado['esquemas'])
 
 elif archivo_validado and not archivo_tiendas:
     st.markdown('<div class="status-warning"><h4>⚠️ Falta el Excel de tiendas</h4></div>', unsafe_allow_html=True)
@@ -568,6 +618,54 @@ with st.sidebar:
     - Descarga reporte final
     """)
     
+    st.markdown("---")
+    st.markdown("### ⚡ Cache de Excel")
+    stats_cache = cache_excel.estadisticas()
+    if stats_cache['activo']:
+        st.markdown(f"""
+        **Aciertos / fallos:** {stats_cache['aciertos']} / {stats_cache['fallos']}  
+        **Archivos:** {stats_cache['archivos']} ({stats_cache['mb_usados']} / {stats_cache['mb_maximo']} MB)
+        """)
+    else:
+        st.caption("Inactivo: instala pyarrow para cachear en Parquet")
+    
+    st.markdown("---")
+    st.markdown("### 🏪 Maestro de tiendas")
+    stats_tiendas = cache_tiendas.estadisticas()
+    vigente = stats_tiendas['vigente']
+    if vigente:
+        st.markdown(f"""
+        **Versión:** `{vigente['version']}` ({vigente['tiendas']:,} tiendas)  
+        **Cargado:** {vigente['cargado'].replace('T', ' ')} en {vigente['segundos_carga']} s  
+        **Aciertos / fallos:** {stats_tiendas['aciertos']} / {stats_tiendas['fallos']}
+        """)
+        if st.button("🔄 Recargar maestro", use_container_width=True,
+                     help="Descarta el maestro en cache: la próxima subida se vuelve a leer"):
+            cache_tiendas.invalidar()
+            st.rerun()
+    else:
+        st.caption("Sin cargar: se prepara con el primer Excel de tiendas")
+    
+    if almacen_diagnostico is not None:
+        st.markdown("---")
+        st.markdown("### 🗄️ Almacén de diagnósticos")
+        stats_almacen = almacen_diagnostico.estadisticas()
+        ultima = (stats_almacen['ultima_ingesta'] or 'nunca').replace('T', ' ')
+        st.markdown(f"""
+        **Claves:** {stats_almacen['claves']:,} ({stats_almacen['mb']} MB)  
+        **Bases ingeridas:** {stats_almacen['ingestas']} (última: {ultima})
+        """)
+    
+    st.markdown("---")
+    st.markdown("### 🧵 Trabajos")
+    stats_trabajos = gestor_trabajos.estadisticas()
+    st.markdown(f"""
+    **En curso / en cola:** {stats_trabajos['ejecutando']} / {stats_trabajos['en_cola']} ({stats_trabajos['trabajadores']} trabajadores)
+    """)
+    for trabajo_sesion in gestor_trabajos.listar(st.session_state.get('sesion'))[:5]:
+        st.caption(f"{ICONOS_ESTADO[trabajo_sesion.estado]} {trabajo_sesion.tipo} · `{trabajo_sesion.id}` · "
+                   f"{trabajo_sesion.progreso:.0%}")
+    
     st.markdown("---")
     st.markdown("### 👤 Info")
     st.markdown("""
@@ -578,7 +676,8 @@ with st.sidebar:
     
     if st.button("🗑️ Limpiar", use_container_width=True):
         for key in list(st.session_state.keys()):
-            del st.session_state[key]
+            if key != 'sesion':
+                del st.session_state[key]
         st.rerun()
 
 # Footer
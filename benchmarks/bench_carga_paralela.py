@@ -0,0 +1,31 @@
+# Benchmark: lectura de los Excel de entrada uno tras otro vs a la vez (hilos / procesos + Arrow IPC)
+# Uso: python benchmarks/bench_carga_paralela.py base_diagnosticos.xlsx "Reporte 45.xlsx" [tiendas.xlsx] [--motor auto] [--trabajadores N]
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from carga_paralela import EJECUTORES, leer_excels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('archivos', nargs='+')
+    parser.add_argument('--motor', default='auto')
+    parser.add_argument('--trabajadores', type=int, default=None, help='por defecto, un proceso por núcleo')
+    args = parser.parse_args()
+
+    rutas = {Path(ruta).name: ruta for ruta in args.archivos}
+    print(f"🖥️ {os.cpu_count()} núcleos | {len(rutas)} archivos")
+    for ejecutor in EJECUTORES[::-1]:  # secuencial primero: es la referencia
+        _, informe = leer_excels(rutas, args.motor, ejecutor=ejecutor, max_trabajadores=args.trabajadores)
+        lecturas = informe['lecturas'].values()
+        mas_lento = max(lectura['segundos'] for lectura in lecturas)
+        suma = sum(lectura['segundos'] for lectura in lecturas)
+        print(f"📊 {ejecutor:<10} ({informe['ejecutor']}) total {informe['segundos_total']:6.2f}s | "
+              f"suma de lecturas {suma:6.2f}s | más lento {mas_lento:6.2f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+# Benchmark: pd.merge original vs clave empaquetada (join_diagnostico.buscar_modificados)
+# Uso: python benchmarks/bench_join_diagnostico.py [--filas 100000 1000000 5000000]
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from join_diagnostico import COLUMNAS_BUSQUEDA, COLUMNAS_MODIFICADO, buscar_modificados
+
+
+def generar(filas, proporcion_diagnostico=0.6, semilla=0):
+    """Reporte y diagnóstico sintéticos con los tipos que entrega el Excel de SAP"""
+    rng = np.random.default_rng(semilla)
+    inicio = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700, filas), unit='D')
+    reporte = pd.DataFrame({
+        'Número de personal': rng.integers(10_000, 10_000 + max(filas // 4, 1), filas),
+        'Número ID': rng.integers(1, 20, filas),
+        'Clase absent./pres.': rng.choice(np.array(['0100', '0200', '0230', '0300', '0940'], dtype=object), filas),
+        'Inicio de validez': inicio,
+        'Fin de validez': inicio + pd.to_timedelta(rng.integers(0, 30, filas), unit='D'),
+        'Modificado el': pd.Timestamp('2024-01-01'),
+        'Modificado por': 'SAPUSER',
+    })
+    reporte = reporte.drop_duplicates(COLUMNAS_BUSQUEDA, ignore_index=True)
+    # Resto de columnas del Reporte 45 (el merge las copia todas)
+    for i in range(22):
+        reporte[f"Columna {i}"] = rng.choice(np.array(['A', 'B', 'C'], dtype=object), len(reporte))
+    diagnostico = reporte[COLUMNAS_BUSQUEDA].sample(frac=proporcion_diagnostico, random_state=semilla)
+    diagnostico['Modificado el'] = pd.Timestamp('2024-06-01')
+    diagnostico['Modificado por'] = rng.choice(np.array(['DIAG1', 'DIAG2'], dtype=object), len(diagnostico))
+    return reporte, diagnostico.reset_index(drop=True)
+
+
+def con_merge(reporte, diagnostico):
+    unido = pd.merge(
+        reporte,
+        diagnostico[COLUMNAS_BUSQUEDA + COLUMNAS_MODIFICADO],
+        on=COLUMNAS_BUSQUEDA,
+        how='left',
+        suffixes=('', '_diagnostico'),
+    )
+    return unido[[f"{c}_diagnostico" for c in COLUMNAS_MODIFICADO]]
+
+
+def con_clave_empaquetada(reporte, diagnostico):
+    return buscar_modificados(reporte, diagnostico)[0]
+
+
+def medir(funcion, *args):
+    """(resultado, segundos, pico de memoria en MB)"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return resultado, segundos, pico
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, nargs='+', default=[100_000, 1_000_000, 5_000_000])
+    args = parser.parse_args()
+
+    print(f"{'filas':>10} {'merge (s)':>10} {'empaquetada (s)':>16} {'aceleración':>12}"
+          f" {'merge (MB)':>11} {'empaquetada (MB)':>17}")
+    for filas in args.filas:
+        reporte, diagnostico = generar(filas)
+        esperado, t_merge, mb_merge = medir(con_merge, reporte, diagnostico)
+        obtenido, t_nuevo, mb_nuevo = medir(con_clave_empaquetada, reporte, diagnostico)
+        pd.testing.assert_frame_equal(
+            esperado.reset_index(drop=True), obtenido.reset_index(drop=True), check_dtype=False
+        )
+        print(f"{len(reporte):>10,} {t_merge:>10.3f} {t_nuevo:>16.3f} {t_merge / t_nuevo:>11.1f}x"
+              f" {mb_merge:>11.0f} {mb_nuevo:>17.0f}")
+
+
+if __name__ == '__main__':
+    main()
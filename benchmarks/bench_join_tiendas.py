@@ -0,0 +1,77 @@
+# Benchmark: limpiar_numero + pd.merge por texto vs CECO Int64 (join_tiendas.buscar_tiendas)
+# Uso: python benchmarks/bench_join_tiendas.py [--tiendas 3000] [--filas 1000000 5000000]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from join_tiendas import buscar_tiendas, parsear_ceco
+
+
+def generar(tiendas, filas, semilla=0):
+    """Reporte con centro_de_coste como texto (como sale del Paso 1) y maestro con myCECO numérico"""
+    rng = np.random.default_rng(semilla)
+    cecos = np.arange(1000, 1000 + tiendas)
+    maestro = pd.DataFrame({
+        'myCECO': cecos.astype(float),
+        'value_tienda': (rng.integers(1000, 99999, tiendas)).astype(str),
+        'nombre_tienda': [f"Tienda {i}" for i in range(tiendas)],
+    })
+    centros = rng.choice(np.append(cecos, [999_999]).astype(str), filas)
+    centros[rng.random(filas) < 0.05] = ''
+    reporte = pd.DataFrame({'centro_de_coste': centros, 'otra': rng.integers(0, 10, filas)})
+    return maestro, reporte
+
+
+def limpiar_numero(serie):
+    return (serie.astype(str)
+            .str.replace('.0', '')
+            .str.replace(',', '')
+            .str.strip()
+            .str.replace('nan', '')
+            .replace('', '0'))
+
+
+def con_texto(maestro, reporte):
+    """Antes: 5 operaciones .str por lado, sets de únicos para contar y merge sobre texto"""
+    maestro = maestro.assign(ceco_limpio=limpiar_numero(maestro['myCECO']))
+    reporte = reporte.assign(centro_limpio=limpiar_numero(reporte['centro_de_coste']))
+    coincidencias = set(reporte['centro_limpio'].unique()) & set(maestro['ceco_limpio'].unique())
+    resultado = pd.merge(reporte, maestro.drop('myCECO', axis=1),
+                         left_on='centro_limpio', right_on='ceco_limpio', how='left')
+    return resultado.drop(['centro_limpio', 'ceco_limpio'], axis=1), len(coincidencias)
+
+
+def con_enteros(maestro, reporte):
+    traidas, stats = buscar_tiendas(parsear_ceco(reporte['centro_de_coste']), parsear_ceco(maestro['myCECO']),
+                                    maestro.drop('myCECO', axis=1))
+    return pd.concat([reporte, traidas], axis=1), stats['cecos_con_tienda']
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tiendas', type=int, default=3_000)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000_000])
+    args = parser.parse_args()
+
+    for filas in args.filas:
+        maestro, reporte = generar(args.tiendas, filas)
+        (antes, _), t_antes = medir(con_texto, maestro, reporte)
+        (despues, _), t_despues = medir(con_enteros, maestro, reporte)
+        iguales = antes['value_tienda'].equals(despues['value_tienda'])
+        print(f"📊 {filas:>10,} filas | texto + merge {t_antes:6.2f}s | CECO Int64 {t_despues:6.2f}s | "
+              f"{t_antes / t_despues:5.1f}x | {t_despues / filas * 1e9:5.0f} ns/fila | iguales: {iguales}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Benchmark: normalizar_numeros_vectorizado original vs normalizar_numeros.normalizar_numeros
+# Uso: python benchmarks/bench_normalizar_numeros.py [--filas 1000000]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from normalizar_numeros import normalizar_numeros
+
+
+def normalizar_original(serie):
+    """Copia de la versión anterior de normalizar_numeros_vectorizado (sin prints)"""
+    serie_str = serie.astype(str)
+    serie_str = serie_str.str.replace(',', '.')
+    serie_num = pd.to_numeric(serie_str, errors='coerce')
+    mask_numerico = serie_num.notna()
+    resultado = serie_str.copy()
+    valores_enteros = (serie_num % 1 == 0) & mask_numerico
+    resultado.loc[valores_enteros] = serie_num.loc[valores_enteros].astype(int).astype(str)
+    valores_decimales = (serie_num % 1 != 0) & mask_numerico
+    if valores_decimales.any():
+        resultado.loc[valores_decimales] = serie_num.loc[valores_decimales].astype(str)
+    resultado = resultado.replace(['nan', 'None', 'NaT', '<NA>', ''], '')
+    return resultado
+
+
+def generar(filas, semilla=0):
+    """Columnas con la forma que tienen en el Reporte 45 después de leer el Excel"""
+    rng = np.random.default_rng(semilla)
+    nulos = rng.random(filas) < 0.1
+    centros = rng.choice([101.0, 102.0, 2050.0, 9999.0], filas)
+    centros[nulos] = np.nan
+    dias = rng.choice(np.array(['1', '2,5', '3,0', '10', '0,5', None], dtype=object), filas)
+    return {
+        'numero_de_personal (int)': pd.Series(rng.integers(10_000, 10_000 + filas // 4, filas)),
+        'clase_absentpres (texto)': pd.Series(rng.choice(['0100', '0200', '0230', '0940'], filas)),
+        'dias_presencabs (coma decimal)': pd.Series(dias),
+        'centro_de_coste (float con NaN)': pd.Series(centros),
+        'dias_naturales (float)': pd.Series(rng.integers(1, 60, filas).astype(float)),
+        'numero_id (texto alta cardinalidad)': pd.Series(rng.integers(0, filas, filas).astype(str)),
+    }
+
+
+def medir(funcion, serie, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion(serie)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return resultado, mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000_000])
+    args = parser.parse_args()
+
+    for filas in args.filas:
+        print(f"\n📊 {filas:,} valores por columna")
+        print(f"   {'columna':<38} {'original':>9} {'kernel':>9} {'x':>6}  iguales")
+        for nombre, serie in generar(filas).items():
+            esperado, t_original = medir(normalizar_original, serie)
+            obtenido, t_kernel = medir(normalizar_numeros, serie)
+            iguales = esperado.equals(obtenido) and esperado.dtype == obtenido.dtype
+            print(f"   {nombre:<38} {t_original:>8.3f}s {t_kernel:>8.3f}s {t_original / t_kernel:>5.1f}x  {iguales}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Benchmark: Paso 1 completo (validar + to_csv) vs incremental (huellas + solo filas cambiadas)
+# Uso: python benchmarks/bench_validacion_incremental.py base_diagnosticos.xlsx "Reporte 45.xlsx" [--cambios 0.001 0.01 0.1]
+import argparse
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from lectores_excel import leer_excel_rapido
+from part1_validation_reporte_45 import validar_ausentismos_df
+from validacion_incremental import EstadoIncremental, validar_incremental
+
+
+def cambiar(df_reporte, proporcion, semilla=0):
+    """Copia del reporte con una proporción de filas editadas, borradas y agregadas"""
+    rng = np.random.default_rng(semilla)
+    cantidad = max(1, int(len(df_reporte) * proporcion))
+    filas = rng.choice(len(df_reporte), cantidad, replace=False)
+    df = df_reporte.copy()
+    texto = [col for col in df.columns if pd.api.types.is_string_dtype(df[col])][0]
+    df.loc[filas[: cantidad // 2], texto] = 'CAMBIADO'
+    df = df.drop(index=filas[cantidad // 2:]).reset_index(drop=True)
+    return pd.concat([df, df_reporte.iloc[: cantidad - cantidad // 2]], ignore_index=True)
+
+
+def medir(funcion):
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('diagnostico')
+    parser.add_argument('reporte')
+    parser.add_argument('--cambios', type=float, nargs='+', default=[0.001, 0.01, 0.1])
+    args = parser.parse_args()
+
+    df_diagnostico = leer_excel_rapido(args.diagnostico)
+    df_reporte = leer_excel_rapido(args.reporte)
+    with tempfile.TemporaryDirectory() as directorio:
+        salida = Path(directorio) / 'salida.csv'
+        estado = EstadoIncremental(Path(directorio) / 'estado')
+        _, t_base = medir(lambda: validar_incremental(df_diagnostico, df_reporte, estado, validar_ausentismos_df))
+        print(f"🧬 Primera corrida (sin estado, guarda huellas): {t_base:.2f}s")
+
+        for proporcion in args.cambios:
+            df_hoy = cambiar(df_reporte, proporcion)
+            completo, t_completo = medir(lambda: validar_ausentismos_df(df_diagnostico, df_hoy).to_csv(
+                salida, index=False, encoding='utf-8-sig'))
+            esperado = salida.read_bytes()
+            _, t_incremental = medir(lambda: (validar_incremental(df_diagnostico, df_hoy, estado,
+                                                                  validar_ausentismos_df),
+                                              estado.escribir_csv(salida)))
+            identico = salida.read_bytes() == esperado
+            print(f"📊 {proporcion:>6.1%} de filas cambiadas | completo {t_completo:5.2f}s | "
+                  f"incremental {t_incremental:5.2f}s | {t_completo / t_incremental:4.1f}x | idéntico: {identico}")
+            # La base del día siguiente es el reporte original otra vez
+            medir(lambda: validar_incremental(df_diagnostico, df_reporte, estado, validar_ausentismos_df))
+
+
+if __name__ == '__main__':
+    main()
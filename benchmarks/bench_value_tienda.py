@@ -0,0 +1,92 @@
+# Benchmark: limpieza de value_tienda en dos pasadas (apply + app.py) vs limpiar_value_tienda
+# Uso: python benchmarks/bench_value_tienda.py [--tiendas 3000] [--filas 1000000 5000000]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from part2_dash_store_total import limpiar_value_tienda
+
+
+def generar(tiendas, filas, semilla=0):
+    """Maestro de tiendas (value con el 0 extra de SAP) y columna de CECO del reporte"""
+    rng = np.random.default_rng(semilla)
+    cecos = np.arange(1000, 1000 + tiendas)
+    maestro = pd.DataFrame({
+        'ceco': cecos,
+        'value_tienda': rng.integers(1000, 99999, tiendas) * 10,  # 12340 -> '1234'
+    })
+    maestro.loc[::50, 'value_tienda'] = np.nan  # tiendas sin value
+    # 5% del reporte con un CECO que no está en el maestro
+    reporte = pd.DataFrame({'ceco': rng.choice(np.append(cecos, [-1]), filas,
+                                               p=[0.95 / tiendas] * tiendas + [0.05])})
+    return maestro, reporte
+
+
+def quitar_ultimo_cero(valor):
+    valor_str = str(valor)
+    if valor_str.endswith('0') and len(valor_str) > 1:
+        return valor_str[:-1]
+    return valor_str
+
+
+def pasada_app(serie):
+    """La limpieza que hacía app.py sobre el resultado del Paso 2"""
+    return (serie.astype(str)
+            .str.replace('.0', '', regex=False)
+            .str.rstrip('.')
+            .apply(lambda x: x[:-1] if x.endswith('0') and len(x) > 1 else x))
+
+
+def limpieza_con_apply(serie):
+    return pasada_app(serie.apply(quitar_ultimo_cero))
+
+
+def dos_pasadas(maestro, reporte):
+    """Antes: apply por fila en el maestro y otra pasada (con lambda) sobre el reporte en app.py"""
+    maestro = maestro.assign(value_tienda=maestro['value_tienda'].apply(quitar_ultimo_cero))
+    resultado = reporte.merge(maestro, on='ceco', how='left').fillna('')
+    resultado['value_tienda'] = pasada_app(resultado['value_tienda'])
+    return resultado
+
+
+def una_pasada(maestro, reporte):
+    """Ahora: limpieza vectorizada sobre el maestro; el merge ya trae el valor final"""
+    maestro = maestro.assign(value_tienda=limpiar_value_tienda(maestro['value_tienda']))
+    return reporte.merge(maestro, on='ceco', how='left').fillna('')
+
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--tiendas', type=int, default=3_000)
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000_000])
+    args = parser.parse_args()
+
+    # Solo la limpieza, con tantos valores como filas tiene el reporte más grande
+    valores = generar(max(args.filas), 0)[0]['value_tienda']
+    _, t_apply = medir(limpieza_con_apply, valores)
+    _, t_vector = medir(limpiar_value_tienda, valores)
+    print(f"🔧 Limpieza de {len(valores):,} valores: apply {t_apply:.2f}s | vectorizada {t_vector:.2f}s | "
+          f"{t_apply / t_vector:.1f}x")
+
+    for filas in args.filas:
+        maestro, reporte = generar(args.tiendas, filas)
+        antes, t_antes = medir(dos_pasadas, maestro, reporte)
+        despues, t_despues = medir(una_pasada, maestro, reporte)
+        iguales = antes['value_tienda'].tolist() == despues['value_tienda'].tolist()
+        print(f"📊 {filas:>10,} filas | dos pasadas {t_antes:6.2f}s | una pasada {t_despues:6.2f}s | "
+              f"{t_antes / t_despues:5.1f}x | iguales: {iguales}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+# Datos sintéticos - REPORTE 45, DIAGNÓSTICO Y DASH STORES CON LAS MAÑAS DE SAP
+# Uso: python benchmarks/datos_sinteticos.py --filas 100000 --salida datos_sinteticos/ [--formatos xlsx csv]
+"""Genera entradas realistas sin datos reales: encabezados de SAP con columnas
+repetidas, decimales con coma ('3,5'), códigos con ceros a la izquierda ('0100'),
+centros de coste mezclados (101, '1,101', ' 101 ', vacío) y tasas configurables de
+coincidencia (reporte ↔ diagnóstico, reporte ↔ tiendas) y de claves repetidas.
+
+Los DataFrames salen con los tipos que entrega leer_excel_rapido (texto como
+'str', enteros, fechas, mezclas como object), así que el Paso 1 y el Paso 2 se
+pueden medir en memoria a cualquier tamaño sin pasar por Excel.
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from esquemas import DIAGNOSTICO_V1, REPORTE_45_V1, TIENDAS_V1
+
+# Excel no admite más filas por hoja (contando el encabezado)
+MAX_FILAS_XLSX = 1_048_575
+
+# Encabezados tal como los exporta SAP: los repetidos sin el sufijo '.1' del lector
+ENCABEZADOS_REPORTE = [re.sub(r'\.\d+$', '', col) for col in REPORTE_45_V1.columnas]
+ENCABEZADOS_DIAGNOSTICO = list(DIAGNOSTICO_V1.columnas)
+ENCABEZADOS_TIENDAS = list(TIENDAS_V1.columnas)
+
+CLASES = {'0100': 'Incapacidad general', '0110': 'Incapacidad laboral', '0200': 'Licencia maternidad',
+          '0210': 'Licencia paternidad', '0300': 'Vacaciones', '0410': 'Permiso remunerado',
+          'Z100': 'Calamidad doméstica', 'Z200': 'Suspensión'}
+DIAGNOSTICOS = [f"{letra}{numero:02d} Diagnóstico {letra}{numero:02d}" for letra in 'ABJKM' for numero in range(12)]
+FUNCIONES = [f"Función {i:02d}" for i in range(40)]
+DIVISIONES = {f"D{i:03d}": f"División {i}" for i in range(1, 13)}
+
+
+def _texto(valores, nulos=None):
+    """Columna de texto como la entrega el lector (dtype 'str', NaN en los vacíos)"""
+    valores = np.asarray(valores, dtype=object)
+    if nulos is not None:
+        valores = valores.copy()
+        valores[nulos] = np.nan
+    return pd.Series(valores, dtype='str')
+
+
+def _elegir(rng, opciones, filas):
+    opciones = np.asarray(list(opciones), dtype=object)
+    return opciones[rng.integers(0, len(opciones), filas)]
+
+
+def generar_tiendas(tiendas=3000, semilla=0):
+    """Dash Stores: myCECO numérico, Tienda con el 0 de más al final, Alias y Region"""
+    rng = np.random.default_rng(semilla)
+    cecos = 1000 + np.arange(tiendas) * 3
+    valor = rng.integers(1000, 99999, tiendas)
+    return pd.DataFrame({
+        'myCECO': cecos,
+        'Tienda': valor * 10,  # value_tienda viene con un 0 adicional
+        'Alias': _texto([f"Tienda {i:04d}" for i in range(tiendas)]),
+        'Region': _texto(_elegir(rng, ['Centro', 'Norte', 'Sur', 'Oriente', 'Occidente'], tiendas)),
+    })
+
+
+def _centros_de_coste(rng, cecos_tiendas, filas, coincidencia_tiendas):
+    """Mezcla que aparece en SAP: números, texto con miles ('1,101' o ' 1101 ') y vacíos"""
+    cecos = rng.choice(cecos_tiendas, filas).astype(object)
+    sin_tienda = rng.random(filas) >= coincidencia_tiendas
+    cecos[sin_tienda] = rng.integers(900_000, 999_999, int(sin_tienda.sum()))
+    formato = rng.random(filas)
+    con_miles = formato < 0.07
+    cecos[con_miles] = [f"{valor:,}" for valor in cecos[con_miles]]
+    con_espacios = (formato >= 0.07) & (formato < 0.1)
+    cecos[con_espacios] = [f" {valor} " for valor in cecos[con_espacios]]
+    cecos[(formato >= 0.1) & (formato < 0.13)] = np.nan
+    return cecos
+
+
+def generar_reporte(filas, tiendas=None, coincidencia_tiendas=0.95, semilla=0):
+    """Reporte 45 con columnas repetidas, decimales con coma y ceros a la izquierda
+
+    tiendas: DataFrame de generar_tiendas (sus CECO son los que coinciden).
+    Devuelve el DataFrame con los nombres que deja el lector ('Descripción.1').
+    """
+    rng = np.random.default_rng(semilla + 1)
+    tiendas = generar_tiendas() if tiendas is None else tiendas
+    empleados = max(filas // 4, 1)
+    personal = 10_000 + rng.integers(0, empleados, filas)
+    clases = _elegir(rng, CLASES, filas)
+    clases_bis = _elegir(rng, CLASES, filas)
+    inicio = np.datetime64('2024-01-01') + rng.integers(0, 365, filas).astype('timedelta64[D]')
+    fin = inicio + rng.integers(0, 30, filas).astype('timedelta64[D]')
+    modificado = inicio + rng.integers(0, 60, filas).astype('timedelta64[D]')
+    dias = rng.integers(1, 31, filas)
+    dias_texto = np.where(rng.random(filas) < 0.4, [f"{d},5" for d in dias], dias.astype(str)).astype(object)
+    divisiones = _elegir(rng, DIVISIONES, filas)
+    hay_diagnostico = rng.random(filas) < 0.7
+    con_descripcion = rng.random(filas) < 0.1
+
+    # Clase repetida: parte como número (100) y parte como texto ('0100'), como sale de SAP
+    clase_bis = clases_bis.copy()
+    numericas = np.array([codigo.isdigit() for codigo in clases_bis]) & (rng.random(filas) < 0.5)
+    clase_bis[numericas] = [int(codigo) for codigo in clases_bis[numericas]]
+
+    df = pd.DataFrame({
+        'Número de personal': personal,
+        'Nombre empl./cand.': _texto([f"EMPLEADO {numero}" for numero in personal]),
+        'Descripción': _texto(_elegir(rng, ['Ausentismo', 'Incapacidad', 'Licencia', 'Permiso'], filas)),
+        'Número ID': rng.integers(1, 10, filas),
+        'Clase absent./pres.': _texto(clases),
+        'Txt.cl.pres./ab.': _texto([CLASES[codigo] for codigo in clases]),
+        'Clase absent./pres..1': pd.Series(clase_bis, dtype=object),
+        'Txt.cl.pres./ab..1': _texto([CLASES[codigo] for codigo in clases_bis]),
+        'Descripc.enfermedad': _texto(_elegir(rng, DIAGNOSTICOS, filas), ~hay_diagnostico),
+        'Descripc.enfermedad.1': _texto(_elegir(rng, DIAGNOSTICOS, filas), rng.random(filas) < 0.8),
+        'Inicio de validez': inicio.astype('datetime64[s]'),
+        'Fin de validez': fin.astype('datetime64[s]'),
+        'Modificado el': modificado.astype('datetime64[s]'),
+        'Modificado por': _texto(_elegir(rng, [f"USR{i:03d}" for i in range(50)], filas)),
+        'División de personal': _texto(divisiones),
+        'Texto división pers.': _texto([DIVISIONES[codigo] for codigo in divisiones]),
+        'Días presenc./abs.': _texto(dias_texto),
+        'Días naturales': dias,
+        'Final salario enfer': np.where(rng.random(filas) < 0.1, rng.integers(1, 60, filas) * 0.5, np.nan),
+        'Área de personal': _texto(_elegir(rng, ['Operativo', 'Administrativo', 'Logística'], filas)),
+        'Texto subdiv.pers.': _texto(_elegir(rng, [f"Subdivisión {i}" for i in range(20)], filas)),
+        'Centro de coste': pd.Series(_centros_de_coste(rng, tiendas['myCECO'].to_numpy(dtype=np.int64),
+                                                       filas, coincidencia_tiendas), dtype=object),
+        'Descripción.1': _texto(_elegir(rng, [f"Sede {i}" for i in range(30)], filas), ~con_descripcion),
+        'Sexo': _texto(_elegir(rng, ['F', 'M'], filas)),
+        'Denominación función': _texto(_elegir(rng, FUNCIONES, filas)),
+        'ID entidad de seguridad social': _texto(_elegir(rng, [f"EPS{i:03d}" for i in range(15)], filas)),
+        'Subtipo': _elegir(rng, [1, 2, 10], filas).astype(np.int64),
+        'Área de nómina': _texto(_elegir(rng, ['NM', 'NQ'], filas)),
+        'Estado empleado': _texto(_elegir(rng, ['Activo', 'Retirado'], filas)),
+    })
+    return df
+
+
+def generar_diagnostico(df_reporte, coincidencia=0.6, duplicados=0.02, ajenas=0.1, semilla=0):
+    """Base de diagnósticos a partir del reporte
+
+    coincidencia: proporción de filas del reporte que aparecen en el diagnóstico.
+    duplicados: proporción de claves repetidas (otra fila con otro 'Modificado el').
+    ajenas: filas de más que no coinciden con ninguna del reporte.
+    """
+    rng = np.random.default_rng(semilla + 2)
+    filas = len(df_reporte)
+    elegidas = np.flatnonzero(rng.random(filas) < coincidencia)
+    claves = df_reporte.iloc[elegidas][ENCABEZADOS_DIAGNOSTICO[:5]].reset_index(drop=True)
+
+    extra = int(len(claves) * ajenas)
+    if extra:
+        otras = claves.sample(n=extra, replace=True, random_state=semilla).reset_index(drop=True)
+        otras['Número de personal'] = 900_000 + rng.integers(0, 99_999, extra)
+        claves = pd.concat([claves, otras], ignore_index=True)
+
+    repetidas = int(len(claves) * duplicados)
+    if repetidas:
+        claves = pd.concat([claves, claves.sample(n=repetidas, random_state=semilla)], ignore_index=True)
+
+    n = len(claves)
+    claves['Modificado el'] = (np.datetime64('2024-06-01') + rng.integers(0, 200, n).astype('timedelta64[D]')
+                               ).astype('datetime64[s]')
+    claves['Modificado por'] = _texto(_elegir(rng, [f"DIAG{i:02d}" for i in range(20)], n))
+    return claves.sample(frac=1, random_state=semilla).reset_index(drop=True)
+
+
+def generar(filas, tiendas=3000, coincidencia_diagnostico=0.6, duplicados_diagnostico=0.02,
+            coincidencia_tiendas=0.95, semilla=0):
+    """(reporte, diagnóstico, tiendas) listos para validar_ausentismos_df / agregar_tiendas_df"""
+    df_tiendas = generar_tiendas(tiendas, semilla)
+    df_reporte = generar_reporte(filas, df_tiendas, coincidencia_tiendas, semilla)
+    df_diagnostico = generar_diagnostico(df_reporte, coincidencia_diagnostico, duplicados_diagnostico,
+                                         semilla=semilla)
+    return df_reporte, df_diagnostico, df_tiendas
+
+
+def escribir_xlsx(df, ruta, encabezados=None):
+    """Libro de una hoja en modo write_only (los repetidos con su nombre de SAP)"""
+    import openpyxl
+
+    if len(df) > MAX_FILAS_XLSX:
+        raise ValueError(f"{len(df):,} filas no caben en una hoja de Excel (máximo {MAX_FILAS_XLSX:,})")
+    libro = openpyxl.Workbook(write_only=True)
+    hoja = libro.create_sheet()
+    hoja.append(list(encabezados or df.columns))
+    columnas = [df[col].to_numpy(dtype=object) for col in df.columns]
+    for fila in zip(*columnas):
+        hoja.append([None if valor is pd.NaT or (isinstance(valor, float) and valor != valor) else valor
+                     for valor in fila])
+    libro.save(ruta)
+    return ruta
+
+
+def escribir_csv(df, ruta, encabezados=None):
+    """Mismo contenido que el libro, en CSV utf-8-sig (los decimales con coma siguen como texto)"""
+    df.to_csv(ruta, index=False, header=list(encabezados or df.columns), encoding='utf-8-sig')
+    return ruta
+
+
+ESCRITORES = {'xlsx': escribir_xlsx, 'csv': escribir_csv}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100_000)
+    parser.add_argument('--tiendas', type=int, default=3000)
+    parser.add_argument('--coincidencia-diagnostico', type=float, default=0.6)
+    parser.add_argument('--duplicados-diagnostico', type=float, default=0.02)
+    parser.add_argument('--coincidencia-tiendas', type=float, default=0.95)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', default='datos_sinteticos')
+    parser.add_argument('--formatos', nargs='+', default=['xlsx'], choices=list(ESCRITORES))
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df_reporte, df_diagnostico, df_tiendas = generar(args.filas, args.tiendas, args.coincidencia_diagnostico,
+                                                     args.duplicados_diagnostico, args.coincidencia_tiendas,
+                                                     args.semilla)
+    print(f"🧪 Generado en {time.perf_counter() - inicio:.1f}s: reporte {len(df_reporte):,}, "
+          f"diagnóstico {len(df_diagnostico):,}, tiendas {len(df_tiendas):,}")
+
+    salida = Path(args.salida)
+    salida.mkdir(parents=True, exist_ok=True)
+    archivos = [('Reporte 45', df_reporte, ENCABEZADOS_REPORTE),
+                ('base_diagnosticos', df_diagnostico, None),
+                ('0002 Dash Stores', df_tiendas, None)]
+    for formato in args.formatos:
+        for nombre, df, encabezados in archivos:
+            ruta = salida / f"{nombre}.{formato}"
+            if formato == 'xlsx' and len(df) > MAX_FILAS_XLSX:
+                print(f"⚠️ {ruta.name}: {len(df):,} filas no caben en Excel, se omite")
+                continue
+            inicio = time.perf_counter()
+            ESCRITORES[formato](df, ruta, encabezados)
+            print(f"💾 {ruta} ({time.perf_counter() - inicio:.1f}s)")
+
+
+if __name__ == '__main__':
+    main()
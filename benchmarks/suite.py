@@ -0,0 +1,232 @@
+# Suite de rendimiento - CADA ETAPA DEL PASO 1 Y DEL PASO 2 A 10K, 100K, 1M Y 5M FILAS
+# Uso: python benchmarks/suite.py [--filas 10000 100000] [--con-excel] [--comparar <commit o archivo>]
+"""Mide cada etapa (InformeEjecucion) sobre datos sintéticos y guarda el resultado por commit.
+
+    python benchmarks/suite.py                       # 10k, 100k, 1M y 5M en memoria
+    python benchmarks/suite.py --filas 10000 100000 --con-excel --repeticiones 3
+
+Los resultados quedan en benchmarks/resultados/<commit>.jsonl (una línea por
+tamaño y etapa) y se comparan contra la corrida guardada más reciente de otro
+commit: una etapa que tarda más que --umbral (10 %) y más de --minimo-segundos
+se marca como regresión. Sin red ni datos reales; en un equipo con poca memoria
+los tamaños que no entran quedan registrados con su error y la suite sigue.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from datos_sinteticos import ENCABEZADOS_REPORTE, MAX_FILAS_XLSX, escribir_xlsx, generar
+from instrumentacion import InformeEjecucion, consola
+from lectores_excel import leer_excel_rapido
+from part1_validation_reporte_45 import renombrar_duplicadas, validar_ausentismos_df
+from part2_dash_store_total import agregar_tiendas_df, leer_csv_validado
+
+TAMANOS = [10_000, 100_000, 1_000_000, 5_000_000]
+DIRECTORIO_RESULTADOS = Path(__file__).resolve().parent / 'resultados'
+
+
+def commit_actual():
+    """Hash corto de HEAD (+ '-sucio' si hay cambios sin commitear); 'sin_git' fuera de un repo"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        cambios = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=RAIZ,
+                                 capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'sin_git'
+    return f"{commit}-sucio" if cambios else commit
+
+
+def entorno():
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'maquina': platform.node(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def archivos_excel(filas, directorio, generados):
+    """Los tres libros del tamaño (se escriben una vez y se reutilizan entre corridas)"""
+    directorio = Path(directorio) / f"{filas}"
+    directorio.mkdir(parents=True, exist_ok=True)
+    df_reporte, df_diagnostico, df_tiendas = generados
+    rutas = {}
+    for nombre, df, encabezados in [('Reporte 45', df_reporte, ENCABEZADOS_REPORTE),
+                                    ('base_diagnosticos', df_diagnostico, None),
+                                    ('0002 Dash Stores', df_tiendas, None)]:
+        ruta = directorio / f"{nombre}.xlsx"
+        if not ruta.exists():
+            escribir_xlsx(df, ruta, encabezados)
+        rutas[nombre] = ruta
+    return rutas
+
+
+def correr(filas, generados, directorio, con_excel):
+    """Una pasada completa: Paso 1 + CSV validado + Paso 2; devuelve las etapas medidas"""
+    df_reporte, df_diagnostico, df_tiendas = generados
+    informe = InformeEjecucion(f"{filas}")
+    ruta_csv = Path(directorio) / f"validado_{filas}.csv"
+
+    with consola(False):
+        if con_excel:
+            rutas = archivos_excel(filas, directorio, generados)
+            with informe.etapa('lectura_excel') as etapa:
+                df_reporte = renombrar_duplicadas(leer_excel_rapido(rutas['Reporte 45']))
+                df_diagnostico = renombrar_duplicadas(leer_excel_rapido(rutas['base_diagnosticos']))
+                df_tiendas = renombrar_duplicadas(leer_excel_rapido(rutas['0002 Dash Stores']))
+                etapa['filas'] = len(df_reporte) + len(df_diagnostico)
+
+        with informe.etapa('paso1', filas=len(df_reporte)):
+            df_validado = validar_ausentismos_df(df_diagnostico, df_reporte, informe=informe)
+            with informe.etapa('escritura', filas=len(df_validado)):
+                df_validado.to_csv(ruta_csv, index=False, encoding='utf-8-sig')
+        del df_validado
+
+        with informe.etapa('paso2', filas=len(df_reporte)):
+            with informe.etapa('lectura_csv') as etapa:
+                df_csv = leer_csv_validado(ruta_csv)
+                etapa['filas'] = len(df_csv)
+            df_final = agregar_tiendas_df(df_csv, df_tiendas, informe=informe)
+            with informe.etapa('escritura', filas=len(df_final)):
+                df_final.to_csv(Path(directorio) / f"final_{filas}.csv", index=False, encoding='utf-8-sig')
+    return informe.etapas
+
+
+def nombre_etapa(etapa):
+    return f"{etapa['padre']}/{etapa['etapa']}" if etapa['padre'] else etapa['etapa']
+
+
+def medir_tamano(filas, directorio, con_excel, repeticiones, semilla):
+    """{etapa: mejor medición de las repeticiones} para un tamaño"""
+    inicio = time.perf_counter()
+    generados = generar(filas, semilla=semilla)
+    print(f"\n🧪 {filas:,} filas generadas en {time.perf_counter() - inicio:.1f}s "
+          f"(diagnóstico {len(generados[1]):,}, tiendas {len(generados[2]):,})")
+    if con_excel and filas > MAX_FILAS_XLSX:
+        print(f"   ⚠️ {filas:,} filas no caben en una hoja de Excel: sin lectura_excel")
+    mejores = {}
+    for _ in range(repeticiones):
+        etapas = correr(filas, generados, directorio, con_excel and filas <= MAX_FILAS_XLSX)
+        for etapa in etapas:
+            nombre = nombre_etapa(etapa)
+            if nombre not in mejores or etapa['segundos'] < mejores[nombre]['segundos']:
+                mejores[nombre] = etapa
+    return mejores
+
+
+def guardar(resultados, ruta):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, 'a', encoding='utf-8') as f:
+        for resultado in resultados:
+            f.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+    return ruta
+
+
+def cargar(ruta):
+    """{(filas, etapa): segundos} de un archivo de resultados (la última medición gana)"""
+    mediciones = {}
+    with open(ruta, encoding='utf-8') as f:
+        for linea in f:
+            resultado = json.loads(linea)
+            if resultado.get('segundos') is not None:
+                mediciones[(resultado['filas'], resultado['etapa'])] = resultado['segundos']
+    return mediciones
+
+
+def referencia(comparar, commit, directorio):
+    """Archivo contra el que comparar: el indicado (ruta o commit) o el más reciente de otro commit"""
+    if comparar:
+        ruta = Path(comparar)
+        return ruta if ruta.exists() else directorio / f"{comparar}.jsonl"
+    anteriores = [ruta for ruta in directorio.glob('*.jsonl') if ruta.stem != commit]
+    return max(anteriores, key=lambda ruta: ruta.stat().st_mtime) if anteriores else None
+
+
+def comparar_resultados(actuales, anteriores, umbral, minimo_segundos):
+    """Imprime la tabla de cambios; devuelve las regresiones [(filas, etapa, antes, ahora)]"""
+    regresiones = []
+    print(f"\n{'filas':>10} {'etapa':<28} {'antes':>9} {'ahora':>9} {'cambio':>8}")
+    for resultado in actuales:
+        clave = (resultado['filas'], resultado['etapa'])
+        if clave not in anteriores or resultado.get('segundos') is None:
+            continue
+        antes, ahora = anteriores[clave], resultado['segundos']
+        cambio = (ahora - antes) / antes if antes else 0.0
+        marca = ''
+        if cambio > umbral and ahora - antes > minimo_segundos:
+            marca = ' ⚠️'
+            regresiones.append((clave[0], clave[1], antes, ahora))
+        elif cambio < -umbral and antes - ahora > minimo_segundos:
+            marca = ' ⚡'
+        print(f"{clave[0]:>10,} {clave[1]:<28} {antes:>8.3f}s {ahora:>8.3f}s {cambio:>+7.0%}{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=TAMANOS)
+    parser.add_argument('--con-excel', action='store_true',
+                        help='Mide también la lectura de los .xlsx (hasta el límite de filas de Excel)')
+    parser.add_argument('--repeticiones', type=int, default=1, help='Se guarda la mejor de N pasadas por etapa')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--datos', default=str(Path(tempfile.gettempdir()) / 'validador_benchmarks'),
+                        help='Directorio de los libros generados y los CSV intermedios')
+    parser.add_argument('--resultados', default=str(DIRECTORIO_RESULTADOS))
+    parser.add_argument('--comparar', default=None, help='Commit o archivo .jsonl de referencia')
+    parser.add_argument('--umbral', type=float, default=0.10)
+    parser.add_argument('--minimo-segundos', type=float, default=0.05)
+    parser.add_argument('--fallar-si-empeora', action='store_true', help='Código de salida 1 si hay regresiones')
+    args = parser.parse_args()
+
+    commit = commit_actual()
+    directorio_resultados = Path(args.resultados)
+    Path(args.datos).mkdir(parents=True, exist_ok=True)
+    comun = dict(commit=commit, fecha=datetime.now().isoformat(timespec='seconds'), **entorno())
+    print(f"⏱️ Suite en {commit} · {comun['pandas']=} · {comun['cpus']} CPU")
+
+    resultados = []
+    for filas in args.filas:
+        try:
+            mejores = medir_tamano(filas, args.datos, args.con_excel, args.repeticiones, args.semilla)
+        except MemoryError as e:
+            print(f"   ❌ {filas:,} filas: sin memoria ({e})")
+            resultados.append(dict(comun, filas=filas, etapa='*', segundos=None, error='MemoryError'))
+            continue
+        for nombre, etapa in mejores.items():
+            resultados.append(dict(comun, filas=filas, etapa=nombre, segundos=etapa['segundos'],
+                                   filas_etapa=etapa.get('filas'), memoria_pico_mb=etapa.get('memoria_pico_mb')))
+            print(f"   {nombre:<28} {etapa['segundos']:>8.3f}s {etapa.get('memoria_pico_mb') or 0:>8.0f} MB")
+
+    ruta = guardar(resultados, directorio_resultados / f"{commit}.jsonl")
+    print(f"\n💾 Resultados: {ruta}")
+
+    anterior = referencia(args.comparar, commit, directorio_resultados)
+    if anterior is None or not anterior.exists():
+        print("ℹ️ Sin resultados de otro commit para comparar")
+        return 0
+    print(f"🔍 Comparando con {anterior.name}")
+    regresiones = comparar_resultados(resultados, cargar(anterior), args.umbral, args.minimo_segundos)
+    if regresiones:
+        print(f"\n⚠️ {len(regresiones)} etapas más lentas que {anterior.stem} (umbral {args.umbral:.0%})")
+        return 1 if args.fallar_si_empeora else 0
+    print("\n✅ Sin regresiones")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,270 @@
+# Cache de Excel parseados - PARQUET DIRECCIONADO POR CONTENIDO
+import hashlib
+import io
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from lectores_excel import nombre_archivo
+
+try:
+    import pyarrow.parquet as pq
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    PARQUET_DISPONIBLE = False
+
+# Subir cuando cambie la forma de leer/tipar los Excel: invalida todo lo cacheado
+VERSION_CACHE = 1
+
+DIRECTORIO_POR_DEFECTO = os.environ.get('VALIDADOR_CACHE_DIR', 'cache')
+MAX_MB_POR_DEFECTO = int(os.environ.get('VALIDADOR_CACHE_MAX_MB', '2048'))
+
+# Columnas object con tipos mezclados (100 y '0100' en la misma columna, como sale de SAP):
+# Parquet no las acepta, así que viajan como texto + el tipo de cada celda en PREFIJO_TIPOS + nombre
+PREFIJO_TIPOS = '__tipos__'
+_NULO, _TEXTO, _ENTERO, _DECIMAL, _BOOLEANO, _FECHA = range(6)
+_CODIGO_TIPO = {str: _TEXTO, int: _ENTERO, float: _DECIMAL, bool: _BOOLEANO, pd.Timestamp: _FECHA,
+                np.int64: _ENTERO, np.float64: _DECIMAL, np.bool_: _BOOLEANO}
+_DESDE_TEXTO = {_TEXTO: str, _ENTERO: int, _DECIMAL: float, _BOOLEANO: lambda texto: texto == 'True',
+                _FECHA: pd.Timestamp}
+
+# Parquet solo guarda nombres de columna de texto (0 volvería '0'): los demás viajan como
+# PREFIJO_NOMBRE + código de tipo + '_' + texto
+PREFIJO_NOMBRE = '__nombre__'
+
+
+def hash_contenido(origen, tamano_bloque=1 << 20):
+    """SHA-256 de los bytes de un archivo (ruta) o de un buffer en memoria (o ArchivoEnMemoria)"""
+    sha = hashlib.sha256()
+    if isinstance(origen, io.BytesIO):
+        origen = origen.getbuffer()
+    origen = getattr(origen, 'datos', origen)
+    if isinstance(origen, (bytes, bytearray, memoryview)):
+        sha.update(origen)
+    else:
+        with open(origen, 'rb') as f:
+            for bloque in iter(lambda: f.read(tamano_bloque), b''):
+                sha.update(bloque)
+    return sha.hexdigest()
+
+
+def _es_mezclada(serie):
+    return serie.dtype == object and pd.api.types.infer_dtype(serie, skipna=True) not in ('string', 'empty')
+
+
+def _a_texto(valor, tipo):
+    return valor.isoformat() if tipo == _FECHA else str(valor)
+
+
+def _codificar_nombres(df):
+    nombres = {}
+    for col in df.columns:
+        if not isinstance(col, str):
+            tipo = _CODIGO_TIPO.get(type(col), _TEXTO)
+            nombres[col] = f"{PREFIJO_NOMBRE}{tipo}_{_a_texto(col, tipo)}"
+    return df.rename(columns=nombres) if nombres else df
+
+
+def _decodificar_nombres(df):
+    nombres = {}
+    for col in df.columns:
+        if col.startswith(PREFIJO_NOMBRE):
+            tipo, texto = col[len(PREFIJO_NOMBRE):].split('_', 1)
+            nombres[col] = _DESDE_TEXTO[int(tipo)](texto)
+    return df.rename(columns=nombres) if nombres else df
+
+
+def _restaurar_fechas(df, ruta):
+    """Parquet no tiene unidad de segundos: datetime64[s] vuelve [ms]; se devuelve la unidad original"""
+    for columna in pq.read_schema(ruta).pandas_metadata['columns']:
+        nombre, tipo = columna['field_name'], columna['numpy_type']
+        if columna['pandas_type'] == 'datetime' and nombre in df.columns and str(df[nombre].dtype) != tipo:
+            df[nombre] = df[nombre].astype(tipo)
+    return df
+
+
+def _codificar_mezcladas(df):
+    """Copia apta para Parquet: cada columna mezclada pasa a texto + columna de tipos (int8)
+
+    Los tipos se guardan celda por celda para que el acierto devuelva exactamente
+    lo que devuelve el lector (100 sigue siendo int, '0100' sigue siendo str).
+    Los nombres que no son texto se codifican con PREFIJO_NOMBRE.
+    """
+    df = _codificar_nombres(df)
+    mezcladas = [col for col in df.columns if _es_mezclada(df[col])]
+    if not mezcladas:
+        return df
+    df = df.copy()
+    for col in mezcladas:
+        valores = df[col].to_numpy(dtype=object)
+        tipos = np.fromiter((_CODIGO_TIPO.get(type(valor), _TEXTO) for valor in valores), dtype=np.int8,
+                            count=len(valores))
+        tipos[pd.isna(valores)] = _NULO
+        textos = np.array([None if tipo == _NULO else _a_texto(valor, tipo) for valor, tipo in zip(valores, tipos)],
+                          dtype=object)
+        df[col] = pd.Series(textos, index=df.index, dtype=object)
+        df[PREFIJO_TIPOS + str(col)] = tipos
+    return df
+
+
+def _decodificar_mezcladas(df):
+    """Inverso de _codificar_mezcladas: cada celda vuelve a su tipo original"""
+    columnas_tipos = [col for col in df.columns if str(col).startswith(PREFIJO_TIPOS)]
+    for columna_tipos in columnas_tipos:
+        col = columna_tipos[len(PREFIJO_TIPOS):]
+        tipos = df[columna_tipos].to_numpy()
+        textos = df[col].to_numpy(dtype=object)
+        valores = np.full(len(textos), None, dtype=object)
+        valores[tipos == _NULO] = np.nan  # el lector deja NaN en las celdas vacías
+        for tipo, convertir in _DESDE_TEXTO.items():
+            posiciones = np.flatnonzero(tipos == tipo)
+            if len(posiciones):
+                valores[posiciones] = [convertir(textos[i]) for i in posiciones]
+        df[col] = pd.Series(valores, index=df.index, dtype=object)
+    return _decodificar_nombres(df.drop(columns=columnas_tipos) if columnas_tipos else df)
+
+
+class CacheParquet:
+    """DataFrames parseados guardados como Parquet, clave = SHA-256 del archivo subido
+
+    Expulsión LRU por tamaño total del directorio (la fecha de modificación del
+    archivo marca el último uso) y contadores de aciertos/fallos.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_POR_DEFECTO, max_mb=MAX_MB_POR_DEFECTO):
+        self.directorio = Path(directorio)
+        self.max_bytes = int(max_mb) * 1024 * 1024
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        # A otro proceso viaja solo la carpeta (el lock no se puede copiar); sus contadores empiezan en 0
+        return type(self), (self.directorio, self.max_bytes // 1024 // 1024)
+
+    @property
+    def activo(self):
+        return PARQUET_DISPONIBLE
+
+    def clave(self, origen):
+        return f"v{VERSION_CACHE}_{hash_contenido(origen)}"
+
+    def _ruta(self, clave):
+        return self.directorio / f"{clave}.parquet"
+
+    def obtener(self, clave):
+        """DataFrame cacheado o None; cuenta acierto/fallo"""
+        ruta = self._ruta(clave)
+        if not self.activo or not ruta.exists():
+            with self._lock:
+                self.fallos += 1
+            return None
+        try:
+            df = _decodificar_mezcladas(_restaurar_fechas(pd.read_parquet(ruta), ruta))
+            os.utime(ruta)  # Marca de uso para el LRU
+        except Exception as e:
+            print(f"   ⚠️ Cache ilegible, se ignora ({ruta.name}): {e}")
+            with self._lock:
+                self.fallos += 1
+            return None
+        with self._lock:
+            self.aciertos += 1
+        return df
+
+    def guardar(self, clave, df):
+        """Guarda el DataFrame (las columnas de tipos mezclados, codificadas); si falla no se cachea"""
+        if not self.activo:
+            return False
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self._ruta(clave)
+        temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            _codificar_mezcladas(df).to_parquet(temporal, index=False)
+            os.replace(temporal, ruta)  # Atómico: otro proceso nunca ve un archivo a medias
+        except Exception as e:
+            print(f"   ⚠️ No se pudo cachear ({type(e).__name__}): {e}")
+            if temporal.exists():
+                temporal.unlink()
+            return False
+        self._expulsar()
+        return True
+
+    def _expulsar(self):
+        """Borra los menos usados hasta quedar por debajo del tamaño máximo"""
+        with self._lock:
+            archivos = []
+            for ruta in self.directorio.glob('*.parquet'):
+                try:
+                    info = ruta.stat()
+                except FileNotFoundError:
+                    continue
+                archivos.append((info.st_mtime, info.st_size, ruta))
+            total = sum(tamano for _, tamano, _ in archivos)
+            for _, tamano, ruta in sorted(archivos):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    ruta.unlink()
+                    total -= tamano
+                except FileNotFoundError:
+                    pass
+
+    def limpiar(self):
+        """Vacía el cache por completo"""
+        with self._lock:
+            for ruta in self.directorio.glob('*.parquet'):
+                ruta.unlink(missing_ok=True)
+
+    def contar(self, aciertos=0, fallos=0):
+        """Suma consultas hechas por una copia del cache en otro proceso (los trabajos del gestor)"""
+        with self._lock:
+            self.aciertos += aciertos
+            self.fallos += fallos
+
+    def estadisticas(self):
+        archivos = list(self.directorio.glob('*.parquet')) if self.directorio.exists() else []
+        consultas = self.aciertos + self.fallos
+        return {
+            'activo': self.activo,
+            'directorio': str(self.directorio),
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else 0.0,
+            'archivos': len(archivos),
+            'mb_usados': round(sum(r.stat().st_size for r in archivos) / 1024 / 1024, 2),
+            'mb_maximo': self.max_bytes // 1024 // 1024,
+        }
+
+
+def lectura_desde_cache(ruta, df, segundos):
+    """attrs['lectura'] de un DataFrame que salió del cache (mismas claves que las de los lectores)"""
+    return {
+        'archivo': nombre_archivo(ruta),
+        'motor': 'cache',
+        'filas': len(df),
+        'columnas': df.shape[1],
+        'segundos': round(segundos, 4),
+        'filas_por_segundo': round(len(df) / segundos) if segundos > 0 else None,
+    }
+
+
+def leer_con_cache(ruta, lector, cache=None):
+    """Devuelve lector(ruta), pasando antes por el cache si se indicó uno"""
+    if cache is None or not cache.activo:
+        return lector(ruta)
+
+    inicio = time.perf_counter()
+    clave = cache.clave(ruta)
+    df = cache.obtener(clave)
+    if df is not None:
+        df.attrs['lectura'] = lectura_desde_cache(ruta, df, time.perf_counter() - inicio)
+        return df
+
+    df = lector(ruta)
+    if df is not None:
+        cache.guardar(clave, df)
+    return df
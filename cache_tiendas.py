@@ -0,0 +1,102 @@
+# Cache del maestro de tiendas - TABLA CECO -> TIENDA PREPARADA UNA VEZ POR PROCESO
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from cache_excel import hash_contenido
+from instrumentacion import decir
+
+# Subir cuando cambie cómo se prepara la tabla (limpieza de value_tienda, claves...)
+VERSION_TABLA = 1
+
+# El maestro cambia ~1 vez al mes: con pocas versiones en memoria alcanza
+MAX_VERSIONES_POR_DEFECTO = 4
+
+
+class CacheTiendas:
+    """TablaTiendas preparadas en memoria, clave = SHA-256 del Excel de tiendas
+
+    Pensado para vivir una vez por proceso (st.cache_resource) y compartirse
+    entre sesiones: el primero que sube un maestro paga la lectura y la
+    preparación, los demás solo el hash. Un maestro nuevo es otra clave; las
+    versiones viejas salen por LRU o con invalidar().
+    """
+
+    def __init__(self, max_versiones=MAX_VERSIONES_POR_DEFECTO):
+        self.max_versiones = max_versiones
+        self.aciertos = 0
+        self.fallos = 0
+        self._tablas = OrderedDict()  # clave -> (tabla, info)
+        self._lock = threading.Lock()
+
+    def clave(self, origen, categoricas=True):
+        """origen: ruta del Excel o sus bytes"""
+        tipos = 'cat' if categoricas else 'obj'
+        return f"v{VERSION_TABLA}_{tipos}_{hash_contenido(origen)}"
+
+    def obtener(self, clave):
+        """TablaTiendas cacheada o None; cuenta acierto/fallo"""
+        with self._lock:
+            if clave not in self._tablas:
+                self.fallos += 1
+                return None
+            self._tablas.move_to_end(clave)
+            tabla, info = self._tablas[clave]
+            info['usos'] += 1
+            self.aciertos += 1
+            return tabla
+
+    def guardar(self, clave, tabla, segundos=None):
+        with self._lock:
+            self._tablas[clave] = (tabla, {
+                'clave': clave,
+                'version': clave.rsplit('_', 1)[-1][:12],
+                'tiendas': len(tabla),
+                'cecos': tabla.cecos_maestro,
+                'cargado': datetime.now().isoformat(timespec='seconds'),
+                'segundos_carga': round(segundos, 4) if segundos is not None else None,
+                'usos': 0,
+            })
+            self._tablas.move_to_end(clave)
+            while len(self._tablas) > self.max_versiones:
+                self._tablas.popitem(last=False)
+
+    def cargar(self, origen, preparar, categoricas=True):
+        """Tabla de origen desde el cache; si no está, preparar() la construye y se guarda
+
+        preparar: función sin argumentos que devuelve la TablaTiendas (o None si
+        el archivo no sirve; en ese caso no se cachea nada).
+        """
+        clave = self.clave(origen, categoricas)
+        tabla = self.obtener(clave)
+        if tabla is not None:
+            decir(f"   ⚡ Maestro de tiendas desde cache ({clave.rsplit('_', 1)[-1][:12]})")
+            return tabla
+
+        inicio = time.perf_counter()
+        tabla = preparar()
+        if tabla is not None:
+            self.guardar(clave, tabla, time.perf_counter() - inicio)
+        return tabla
+
+    def invalidar(self, clave=None):
+        """Descarta una versión (o todas, sin clave); la próxima carga relee el Excel"""
+        with self._lock:
+            if clave is None:
+                self._tablas.clear()
+            else:
+                self._tablas.pop(clave, None)
+
+    def estadisticas(self):
+        with self._lock:
+            versiones = [dict(info) for _, info in reversed(self._tablas.values())]
+        consultas = self.aciertos + self.fallos
+        return {
+            'version_tabla': VERSION_TABLA,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'tasa_aciertos': round(self.aciertos / consultas, 3) if consultas else 0.0,
+            'versiones': versiones,  # la más reciente primero
+            'vigente': versiones[0] if versiones else None,
+        }
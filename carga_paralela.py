@@ -0,0 +1,150 @@
+# Carga paralela - LOS EXCEL DE ENTRADA SE PARSEAN A LA VEZ (PROCESOS + ARROW IPC)
+import contextvars
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cache_excel import lectura_desde_cache
+from instrumentacion import consola, consola_activa
+from lectores_excel import como_origen, leer_excel_rapido, nombre_archivo
+
+try:
+    import pyarrow as pa
+    ARROW_DISPONIBLE = True
+except ImportError:
+    ARROW_DISPONIBLE = False
+
+# procesos: openpyxl es Python puro y no suelta el GIL, cada archivo en su núcleo
+EJECUTORES = ('procesos', 'hilos', 'secuencial')
+EJECUTOR_POR_DEFECTO = os.environ.get('VALIDADOR_EJECUTOR', 'procesos')
+
+# Sin fork: quien lee puede tener hilos (Streamlit, el gestor de trabajos) y fork copiaría sus locks a medias
+METODO_INICIO = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def a_ipc(df):
+    """DataFrame -> bytes Arrow IPC (columnas contiguas, sin pickle de objetos por celda)
+
+    None si Arrow no devolvería el mismo DataFrame: nombres que no son texto
+    (0 vuelve '0') o columnas object que cambian de tipo ([1, NaN] vuelve
+    float64 y en el CSV sería '1.0'). Se mira en el esquema (tabla vacía),
+    sin convertir los datos de vuelta.
+    """
+    tabla = pa.Table.from_pandas(df, preserve_index=False)
+    vuelta = tabla.schema.empty_table().to_pandas()
+    mismos_nombres = [(type(nombre), nombre) for nombre in df.columns] == \
+        [(type(nombre), nombre) for nombre in vuelta.columns]
+    if not mismos_nombres or df.dtypes.tolist() != vuelta.dtypes.tolist():
+        return None
+    destino = pa.BufferOutputStream()
+    with pa.ipc.new_stream(destino, tabla.schema) as escritor:
+        escritor.write_table(tabla)
+    return destino.getvalue().to_pybytes()
+
+
+def desde_ipc(datos):
+    return pa.ipc.open_stream(datos).read_all().to_pandas()
+
+
+def _leer_en_proceso(ruta, motor, detalle=True):
+    """Corre en el proceso hijo: parsea y devuelve (formato, datos, attrs de lectura)
+
+    detalle: la consola del proceso que pidió la lectura (el hijo no hereda su contexto).
+    """
+    with consola(detalle):
+        df = leer_excel_rapido(ruta, motor)
+    lectura = dict(df.attrs['lectura'])
+    if ARROW_DISPONIBLE:
+        try:
+            datos = a_ipc(df)
+        except pa.ArrowException:
+            datos = None  # columna object mezclada que Arrow no representa
+        if datos is not None:
+            return 'arrow', datos, lectura
+    # Arrow cambiaría nombres o tipos: pickle normal, llega igual que con 'secuencial'
+    return 'pickle', df, lectura
+
+
+def _leer_directo(ruta, motor):
+    df = leer_excel_rapido(ruta, motor)
+    return 'dataframe', df, dict(df.attrs['lectura'])
+
+
+def _ejecutor(ejecutor, trabajadores):
+    if ejecutor == 'procesos':
+        return ProcessPoolExecutor(max_workers=trabajadores, mp_context=multiprocessing.get_context(METODO_INICIO))
+    return ThreadPoolExecutor(max_workers=trabajadores)
+
+
+def leer_excels(rutas, motor='auto', cache=None, ejecutor=EJECUTOR_POR_DEFECTO, max_trabajadores=None):
+    """Lee varios Excel a la vez: {nombre: ruta} -> ({nombre: DataFrame o None}, informe)
+
+    Cada origen puede ser una ruta o el archivo ya en memoria (ArchivoEnMemoria,
+    bytes, memoryview, BytesIO): a los procesos viajan los bytes, no una copia en disco.
+
+    Los que están en cache (CacheParquet) no se parsean; el resto va a un pool
+    de procesos (o hilos) y vuelve como Arrow IPC. Con un solo archivo
+    pendiente se lee en el proceso actual (no vale la pena arrancar el pool).
+    El informe trae el tiempo de cada lectura y el total de pared.
+    """
+    if ejecutor not in EJECUTORES:
+        raise ValueError(f"Ejecutor no soportado: {ejecutor}. Opciones: {list(EJECUTORES)}")
+
+    inicio = time.perf_counter()
+    resultados, claves, pendientes = {}, {}, {}
+    rutas = {nombre: como_origen(ruta) for nombre, ruta in rutas.items()}
+    for nombre, ruta in rutas.items():
+        if cache is not None and cache.activo:
+            inicio_cache = time.perf_counter()
+            claves[nombre] = cache.clave(ruta)
+            df = cache.obtener(claves[nombre])
+            if df is not None:
+                df.attrs['lectura'] = lectura_desde_cache(ruta, df, time.perf_counter() - inicio_cache)
+                resultados[nombre] = df
+                continue
+        pendientes[nombre] = ruta
+
+    trabajadores = min(len(pendientes), max_trabajadores or os.cpu_count() or 1)
+    modo = ejecutor if len(pendientes) > 1 and trabajadores > 1 else 'secuencial'
+    pool = None if modo == 'secuencial' else _ejecutor(modo, trabajadores)
+    futuros = {}
+    if modo == 'procesos':
+        futuros = {nombre: pool.submit(_leer_en_proceso, ruta, motor, consola_activa())
+                   for nombre, ruta in pendientes.items()}
+    elif pool is not None:
+        # Cada hilo corre en una copia del contexto: la consola encendida/apagada del que llama vale ahí también
+        futuros = {nombre: pool.submit(contextvars.copy_context().run, _leer_directo, ruta, motor)
+                   for nombre, ruta in pendientes.items()}
+
+    try:
+        for nombre, ruta in pendientes.items():
+            try:
+                if pool is None:
+                    formato, datos, lectura = _leer_directo(ruta, motor)
+                else:
+                    formato, datos, lectura = futuros[nombre].result()
+            except Exception as e:
+                print(f"❌ Error leyendo {nombre_archivo(ruta)}: {e}")
+                resultados[nombre] = None
+                continue
+            inicio_traspaso = time.perf_counter()
+            df = desde_ipc(datos) if formato == 'arrow' else datos
+            lectura['traspaso'] = formato
+            lectura['segundos_traspaso'] = round(time.perf_counter() - inicio_traspaso, 4)
+            df.attrs['lectura'] = lectura
+            if nombre in claves:
+                cache.guardar(claves[nombre], df)
+            resultados[nombre] = df
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    informe = {
+        'ejecutor': modo,
+        'trabajadores': trabajadores if pool is not None else 1,
+        'segundos_total': round(time.perf_counter() - inicio, 4),
+        'lecturas': {nombre: (df.attrs['lectura'] if df is not None else None)
+                     for nombre, df in resultados.items()},
+    }
+    return {nombre: resultados[nombre] for nombre in rutas}, informe
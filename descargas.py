@@ -0,0 +1,107 @@
+# Descargas - CSV POR BLOQUES, COMPRIMIDO EN LA MISMA PASADA, Y XLSX EN STREAMING
+import gzip
+import io
+import zipfile
+from pathlib import Path
+
+from formatos import FORMATOS_COLUMNARES, escribir_resultado, formato_de
+
+# Bloques de filas que se serializan a la vez (acota la memoria por descarga)
+FILAS_POR_BLOQUE = 50_000
+
+COMPRESIONES = {
+    None: ('.csv', 'text/csv'),
+    'gzip': ('.csv.gz', 'application/gzip'),
+    'zip': ('.zip', 'application/zip'),
+}
+
+# Formatos columnares (formatos.FORMATOS_COLUMNARES): se escriben enteros (ya van comprimidos por columna)
+MIMES_COLUMNARES = {
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Excel nativo: también se escribe entero, pero por bloques de filas (excel_salida)
+MIME_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+def csv_por_bloques(df, filas_por_bloque=FILAS_POR_BLOQUE, encoding='utf-8-sig'):
+    """Genera el CSV del DataFrame en trozos de bytes (BOM solo en el primero)"""
+    codificacion_resto = 'utf-8' if encoding == 'utf-8-sig' else encoding
+    if len(df) == 0:
+        yield df.to_csv(index=False).encode(encoding)
+        return
+    for inicio in range(0, len(df), filas_por_bloque):
+        bloque = df.iloc[inicio:inicio + filas_por_bloque]
+        texto = bloque.to_csv(index=False, header=(inicio == 0))
+        yield texto.encode(encoding if inicio == 0 else codificacion_resto)
+
+
+def escribir_csv(df, destino, compresion=None, nombre_interno='reporte.csv',
+                 filas_por_bloque=FILAS_POR_BLOQUE):
+    """Escribe el CSV bloque a bloque en un archivo binario abierto, comprimiendo si se pide"""
+    if compresion not in COMPRESIONES:
+        raise ValueError(f"Compresión no soportada: {compresion}. Opciones: {list(COMPRESIONES)}")
+
+    if compresion == 'gzip':
+        with gzip.GzipFile(fileobj=destino, mode='wb', filename=nombre_interno) as salida:
+            for bloque in csv_por_bloques(df, filas_por_bloque):
+                salida.write(bloque)
+    elif compresion == 'zip':
+        with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+            with archivo_zip.open(nombre_interno, 'w', force_zip64=True) as salida:
+                for bloque in csv_por_bloques(df, filas_por_bloque):
+                    salida.write(bloque)
+    else:
+        for bloque in csv_por_bloques(df, filas_por_bloque):
+            destino.write(bloque)
+
+
+def _extension_y_mime(formato, compresion):
+    if formato_de('', formato) in FORMATOS_COLUMNARES:
+        return MIMES_COLUMNARES[formato]
+    if formato == 'xlsx':
+        return '.xlsx', MIME_XLSX
+    return COMPRESIONES.get(compresion, COMPRESIONES[None])
+
+
+def preparar_descarga(df, nombre_base, compresion=None, filas_por_bloque=FILAS_POR_BLOQUE, formato='csv',
+                      ruta_base=None):
+    """Archivo listo para st.download_button sin armar el CSV entero como string
+
+    Solo existe a la vez un bloque serializado más los bytes finales (ya
+    comprimidos si se pidió), que es lo que Streamlit tiene que servir.
+    formato 'parquet' o 'arrow' ignora compresion y lleva los tipos en el archivo;
+    'xlsx' también la ignora (el .xlsx ya es un zip) y deja los IDs como texto.
+    ruta_base: si se da, el archivo se escribe en disco (ruta_base + extensión) y
+    en lugar de los bytes se devuelve esa ruta: quien guarda el resultado (un
+    trabajo terminado) retiene solo la ruta y los bytes se leen al descargar.
+    Devuelve (BytesIO posicionado al inicio o ruta, nombre de archivo, mime, tamaño en bytes).
+    """
+    extension, mime = _extension_y_mime(formato, compresion)
+    if ruta_base is not None:
+        ruta = Path(f"{ruta_base}{extension}")
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        with open(ruta, 'wb') as archivo:
+            _escribir_descarga(df, archivo, nombre_base, compresion, filas_por_bloque, formato)
+        return ruta, f"{nombre_base}{extension}", mime, ruta.stat().st_size
+
+    archivo = io.BytesIO()
+    _escribir_descarga(df, archivo, nombre_base, compresion, filas_por_bloque, formato)
+    tamano = archivo.tell()
+    archivo.seek(0)
+    return archivo, f"{nombre_base}{extension}", mime, tamano
+
+
+def _escribir_descarga(df, archivo, nombre_base, compresion, filas_por_bloque, formato):
+    if formato_de('', formato) in FORMATOS_COLUMNARES or formato == 'xlsx':
+        escribir_resultado(df, archivo, formato)
+    else:
+        escribir_csv(df, archivo, compresion, f"{nombre_base}.csv", filas_por_bloque)
+
+
+def formatear_tamano(num_bytes):
+    for unidad in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024 or unidad == 'GB':
+            return f"{num_bytes:.1f} {unidad}" if unidad != 'B' else f"{num_bytes} B"
+        num_bytes /= 1024
@@ -0,0 +1,164 @@
+# Esquemas - LAYOUTS DE SAP VERSIONADOS, VALIDADOS SOLO CON LA FILA DE ENCABEZADOS
+import re
+import time
+import unicodedata
+from functools import lru_cache
+
+from instrumentacion import decir
+from lectores_excel import leer_encabezados, nombre_archivo
+
+
+class Esquema:
+    """Layout de un archivo de entrada: encabezado (como lo entrega el lector) -> snake_case
+
+    Los duplicados van con el sufijo que agrega el lector ('Descripción.1').
+    requeridas: sin ellas el archivo se rechaza antes de cargarlo.
+    """
+
+    def __init__(self, nombre, version, columnas, requeridas, descripcion=''):
+        self.nombre = nombre
+        self.version = version
+        self.columnas = dict(columnas)
+        self.requeridas = list(requeridas)
+        self.descripcion = descripcion
+
+    def validar(self, encabezados):
+        presentes = set(encabezados)
+        faltantes = [col for col in self.requeridas if col not in presentes]
+        return {
+            'esquema': self.nombre,
+            'version': self.version,
+            'valido': not faltantes,
+            'faltantes': faltantes,
+            'opcionales_faltantes': [col for col in self.columnas
+                                     if col not in presentes and col not in self.requeridas],
+            'desconocidas': [col for col in encabezados if col not in self.columnas],
+            'mapeo': {col: nombre_snake(col) for col in encabezados},
+        }
+
+
+REPORTE_45_V1 = Esquema(
+    'reporte_45', 1,
+    {
+        'Número de personal': 'numero_de_personal',
+        'Nombre empl./cand.': 'nombre_emplcand',
+        'Descripción': 'descripcion',
+        'Número ID': 'numero_id',
+        'Clase absent./pres.': 'clase_absentpres',
+        'Txt.cl.pres./ab.': 'txtclpresab',
+        'Clase absent./pres..1': 'clase_absentpres1',
+        'Txt.cl.pres./ab..1': 'txtclpresab1',
+        'Descripc.enfermedad': 'descripcenfermedad',
+        'Descripc.enfermedad.1': 'descripcenfermedad1',
+        'Inicio de validez': 'inicio_de_validez',
+        'Fin de validez': 'fin_de_validez',
+        'Modificado el': 'modificado_el',
+        'Modificado por': 'modificado_por',
+        'División de personal': 'division_de_personal',
+        'Texto división pers.': 'texto_division_pers',
+        'Días presenc./abs.': 'dias_presencabs',
+        'Días naturales': 'dias_naturales',
+        'Final salario enfer': 'final_salario_enfer',
+        'Área de personal': 'area_de_personal',
+        'Texto subdiv.pers.': 'texto_subdivpers',
+        'Centro de coste': 'centro_de_coste',
+        'Descripción.1': 'descripcion1',
+        'Sexo': 'sexo',
+        'Denominación función': 'denominacion_funcion',
+        'ID entidad de seguridad social': 'id_entidad_de_seguridad_social',
+        'Subtipo': 'subtipo',
+        'Área de nómina': 'area_de_nomina',
+        'Estado empleado': 'estado_empleado',
+    },
+    requeridas=['Número de personal', 'Número ID', 'Clase absent./pres.', 'Inicio de validez',
+                'Fin de validez', 'Modificado el', 'Modificado por', 'Centro de coste'],
+    descripcion='Reporte 45 de SAP (ausentismos)',
+)
+
+DIAGNOSTICO_V1 = Esquema(
+    'diagnostico', 1,
+    {
+        'Número de personal': 'numero_de_personal',
+        'Número ID': 'numero_id',
+        'Clase absent./pres.': 'clase_absentpres',
+        'Inicio de validez': 'inicio_de_validez',
+        'Fin de validez': 'fin_de_validez',
+        'Modificado el': 'modificado_el',
+        'Modificado por': 'modificado_por',
+    },
+    requeridas=['Número de personal', 'Número ID', 'Clase absent./pres.', 'Inicio de validez',
+                'Fin de validez', 'Modificado el', 'Modificado por'],
+    descripcion='Base de diagnósticos (solo aporta Modificado el / por)',
+)
+
+TIENDAS_V1 = Esquema(
+    'tiendas', 1,
+    {
+        'myCECO': 'myceco',
+        'Tienda': 'tienda',
+        'Alias': 'alias',
+        'Region': 'region',
+    },
+    requeridas=['myCECO'],
+    descripcion='0002 Dash Stores (centro de coste -> tienda)',
+)
+
+# Versiones de cada layout, de la más nueva a la más vieja
+ESQUEMAS = {
+    'reporte_45': [REPORTE_45_V1],
+    'diagnostico': [DIAGNOSTICO_V1],
+    'tiendas': [TIENDAS_V1],
+}
+
+# Tabla precalculada de todos los layouts: evita el regex por columna en cada carga
+MAPEO_COLUMNAS = {
+    encabezado: snake
+    for versiones in ESQUEMAS.values()
+    for esquema in versiones
+    for encabezado, snake in esquema.columnas.items()
+}
+
+
+@lru_cache(maxsize=1024)
+def _a_snake_case(nombre):
+    """snake_case sin acentos para encabezados que no están en ningún esquema"""
+    nombre_sin_acentos = unicodedata.normalize('NFD', str(nombre))
+    nombre_sin_acentos = ''.join(char for char in nombre_sin_acentos if unicodedata.category(char) != 'Mn')
+    nombre_snake = re.sub(r'[^\w\s]', '', nombre_sin_acentos.lower())
+    nombre_snake = re.sub(r'\s+', '_', nombre_snake)
+    return re.sub(r'_+', '_', nombre_snake).strip('_')
+
+
+def nombre_snake(encabezado):
+    snake = MAPEO_COLUMNAS.get(encabezado) if isinstance(encabezado, str) else None
+    return snake if snake is not None else _a_snake_case(encabezado)
+
+
+def validar_encabezados(nombre, encabezados):
+    """Resultado de la versión más nueva del layout que acepte los encabezados
+
+    Si ninguna los acepta se devuelve el de la versión vigente (con sus faltantes).
+    """
+    if nombre not in ESQUEMAS:
+        raise ValueError(f"Esquema desconocido: {nombre}. Opciones: {list(ESQUEMAS)}")
+    encabezados = list(encabezados)
+    resultados = [esquema.validar(encabezados) for esquema in ESQUEMAS[nombre]]
+    return next((r for r in resultados if r['valido']), resultados[0])
+
+
+def verificar_archivo(ruta, nombre):
+    """Valida un archivo (ruta o en memoria) leyendo SOLO su fila de encabezados, antes de la carga completa"""
+    inicio = time.perf_counter()
+    resultado = validar_encabezados(nombre, leer_encabezados(ruta))
+    resultado['archivo'] = nombre_archivo(ruta)
+    resultado['segundos'] = round(time.perf_counter() - inicio, 4)
+
+    if resultado['valido']:
+        decir(f"   🧾 {resultado['archivo']}: layout {nombre} v{resultado['version']} "
+              f"({resultado['segundos'] * 1000:.1f} ms)")
+        if resultado['desconocidas']:
+            print(f"      ⚠️ Columnas fuera del esquema: {resultado['desconocidas']}")
+    else:
+        print(f"❌ {resultado['archivo']} no tiene el layout de {nombre}: "
+              f"faltan {resultado['faltantes']}")
+    return resultado
@@ -0,0 +1,445 @@
+# Salida en Excel - .XLSX EN STREAMING (MEMORIA CONSTANTE), TIPOS POR COLUMNA Y HOJAS PARTIDAS
+import datetime as dt
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import decir
+from lectores_excel import OPENPYXL_DISPONIBLE, abrir_origen
+
+if OPENPYXL_DISPONIBLE:
+    import openpyxl
+
+try:
+    import xlsxwriter
+    XLSXWRITER_DISPONIBLE = True
+except ImportError:
+    XLSXWRITER_DISPONIBLE = False
+
+# nativo: XML de la hoja armado por bloques directo al zip (solo biblioteca estándar,
+# mucho más rápido); xlsxwriter: constant_memory, celda por celda (referencia)
+MOTORES_XLSX = ('auto', 'nativo', 'xlsxwriter')
+
+# Filas de datos por hoja: el límite de Excel (1.048.576) menos el encabezado
+MAX_FILAS_HOJA = 1_048_575
+
+# Filas que se convierten y serializan a la vez (acota la memoria extra)
+FILAS_POR_BLOQUE = 50_000
+
+# Columnas con más valores distintos que esto (IDs) no guardan el XML de cada valor: se arma por bloque
+MAX_UNICOS_XML = FILAS_POR_BLOQUE
+
+# Medidas que se escriben como número; el resto (IDs, centros de coste, códigos) va como texto
+COLUMNAS_NUMERO = ('dias_presencabs', 'dias_naturales', 'final_salario_enfer')
+
+# Encabezado de todas las hojas, de ambos motores: se cambia acá y solo acá
+PLANTILLA_ENCABEZADO = {
+    'negrita': True,
+    'color_fuente': 'FFFFFF',
+    'relleno': '1F4E79',
+    'borde': True,
+    'ajustar_texto': True,
+    'ancho_minimo': 10,
+    'ancho_maximo': 40,
+    'fijar_encabezado': True,
+    'filtro': True,
+}
+
+FORMATO_FECHA = 'yyyy-mm-dd'
+FORMATO_FECHA_HORA = 'yyyy-mm-dd hh:mm:ss'
+
+# Excel: 32.767 caracteres por celda
+MAX_CARACTERES_CELDA = 32_767
+
+_FECHA_ISO = re.compile(r'^\d{4}-\d{2}-\d{2}( \d{2}:\d{2}:\d{2})?$')
+_CARACTERES_INVALIDOS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+_NOMBRE_HOJA_INVALIDO = re.compile(r"[\[\]:*?/\\']")
+_EPOCA_EXCEL = dt.datetime(1899, 12, 30)
+
+
+def _motor(motor):
+    if motor not in MOTORES_XLSX:
+        raise ValueError(f"Motor de escritura no soportado: {motor}. Opciones: {list(MOTORES_XLSX)}")
+    if motor == 'auto':
+        motor = 'nativo'
+    if motor == 'xlsxwriter' and not XLSXWRITER_DISPONIBLE:
+        raise ValueError("El motor xlsxwriter no está instalado (pip install xlsxwriter)")
+    return motor
+
+
+def _vacio(valor):
+    return valor is None or valor == '' or (isinstance(valor, float) and np.isnan(valor))
+
+
+def _unicos(serie):
+    """Valores distintos no vacíos (sin nulos ni '')"""
+    return np.array([valor for valor in pd.unique(serie.to_numpy(dtype=object)) if not _vacio(valor)], dtype=object)
+
+
+def tipo_columna(nombre, serie, unicos=None):
+    """'fecha', 'fecha_hora', 'numero' o 'texto', mirando solo los valores distintos"""
+    unicos = _unicos(serie) if unicos is None else unicos
+    if not len(unicos):
+        return 'texto'
+    if serie.dtype.kind == 'M':
+        fechas = pd.Series(unicos, dtype='datetime64[ns]')
+        return 'fecha_hora' if (fechas != fechas.dt.normalize()).any() else 'fecha'
+    if all(isinstance(valor, str) and _FECHA_ISO.match(valor) for valor in unicos):
+        try:
+            fechas = pd.to_datetime(pd.Series(unicos), format='ISO8601')
+        except (ValueError, TypeError):
+            return 'texto'
+        return 'fecha_hora' if (fechas != fechas.dt.normalize()).any() else 'fecha'
+    if nombre in COLUMNAS_NUMERO:
+        numeros = pd.to_numeric(pd.Series(unicos, dtype=object), errors='coerce')
+        # inf / '1e400' no son un número válido de SpreadsheetML (<v>inf</v> rompe el libro): van como texto
+        if np.isfinite(numeros.to_numpy(dtype=np.float64, na_value=np.nan)).all():
+            return 'numero'
+    return 'texto'
+
+
+def _numero(valor):
+    """int o float como los escribe el CSV: 26.0 sigue siendo float ('26.0') y '27' es int"""
+    if isinstance(valor, str):
+        try:
+            return int(valor)
+        except ValueError:
+            return float(valor)
+    if isinstance(valor, (int, np.integer)):
+        return int(valor)
+    return float(valor)
+
+
+def _convertir_unicos(unicos, tipo):
+    """Valores de Python listos para la celda: date / datetime / int / float / str"""
+    if tipo in ('fecha', 'fecha_hora'):
+        fechas = pd.to_datetime(pd.Series(unicos, dtype=object), format='ISO8601')
+        if tipo == 'fecha':
+            return np.array([marca.date() for marca in fechas], dtype=object)
+        return np.array([marca.to_pydatetime() for marca in fechas], dtype=object)
+    if tipo == 'numero':
+        return np.array([_numero(valor) for valor in unicos], dtype=object)
+    return np.array([str(valor)[:MAX_CARACTERES_CELDA] for valor in unicos], dtype=object)
+
+
+# Estilo de cada tipo de celda: posición en cellXfs de _estilos_xml()
+_ESTILO = {'numero': 0, 'encabezado': 1, 'texto': 2, 'fecha': 3, 'fecha_hora': 4}
+
+
+def _xml_texto(texto):
+    texto = escape(_CARACTERES_INVALIDOS.sub('', texto))
+    return f'<t xml:space="preserve">{texto}</t>' if texto != texto.strip() else f'<t>{texto}</t>'
+
+
+def _xml_celda(valor, tipo):
+    """Lo que sigue a '<c r="A1"' para un valor ya convertido"""
+    if tipo in ('fecha', 'fecha_hora'):
+        if not isinstance(valor, dt.datetime):
+            valor = dt.datetime(valor.year, valor.month, valor.day)
+        serial = (valor - _EPOCA_EXCEL) / dt.timedelta(days=1)
+        return f' s="{_ESTILO[tipo]}"><v>{serial:.10g}</v></c>'
+    if tipo == 'numero':
+        return f'><v>{valor!r}</v></c>'
+    return f' s="{_ESTILO[tipo]}" t="inlineStr"><is>{_xml_texto(valor)}</is></c>'
+
+
+class _Columna:
+    """Conversión de una columna: se tipa y convierte solo sobre los valores distintos
+
+    Por bloque solo se buscan las posiciones de sus valores entre los distintos:
+    nunca hay una copia convertida de la columna entera.
+    """
+
+    def __init__(self, nombre, serie):
+        self.nombre = str(nombre)
+        self.serie = serie
+        unicos = _unicos(serie)
+        self.tipo = tipo_columna(nombre, serie, unicos)
+        self._indice = pd.Index(unicos, dtype=object)
+        # La última posición es la celda vacía: ahí caen nulos, '' y lo que no está en el índice
+        self.valores = np.append(_convertir_unicos(unicos, self.tipo) if len(unicos) else
+                                 np.empty(0, dtype=object), None)
+        self._xml = None
+        ancho = max([len(self.nombre)] + [len(str(valor)) for valor in self.valores[:1000] if valor is not None])
+        self.ancho = min(max(ancho + 2, PLANTILLA_ENCABEZADO['ancho_minimo']), PLANTILLA_ENCABEZADO['ancho_maximo'])
+
+    def _posiciones(self, inicio, fin):
+        posiciones = self._indice.get_indexer(self.serie.iloc[inicio:fin].to_numpy(dtype=object))
+        return np.where(posiciones < 0, len(self.valores) - 1, posiciones)
+
+    def bloque(self, inicio, fin):
+        return self.valores[self._posiciones(inicio, fin)]
+
+    def bloque_xml(self, inicio, fin):
+        """Fragmento XML de cada celda del bloque ('' = celda vacía, no se escribe)"""
+        if len(self.valores) > MAX_UNICOS_XML:
+            return np.array([_xml_celda(valor, self.tipo) if valor is not None else ''
+                             for valor in self.bloque(inicio, fin)], dtype=object)
+        if self._xml is None:
+            self._xml = np.array([_xml_celda(valor, self.tipo) for valor in self.valores[:-1]] + [''], dtype=object)
+        return self._xml[self._posiciones(inicio, fin)]
+
+
+def _nombres_hojas(nombre_hoja, filas, max_filas):
+    partes = max(1, -(-filas // max_filas))
+    nombre_hoja = _NOMBRE_HOJA_INVALIDO.sub('_', nombre_hoja)[:28] or 'reporte'  # 31 menos el sufijo '_NN'
+    return [nombre_hoja if parte == 0 else f"{nombre_hoja}_{parte + 1}" for parte in range(partes)]
+
+
+def _filas(columnas, inicio, fin):
+    for bloque_inicio in range(inicio, fin, FILAS_POR_BLOQUE):
+        bloque_fin = min(bloque_inicio + FILAS_POR_BLOQUE, fin)
+        yield from zip(*[columna.bloque(bloque_inicio, bloque_fin) for columna in columnas])
+
+
+def letra_columna(indice):
+    """0 -> 'A', 25 -> 'Z', 26 -> 'AA'"""
+    letras = ''
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_NS_MAIN = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_NS_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_NS_PAQUETE = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_TIPO_HOJA_CALCULO = 'application/vnd.openxmlformats-officedocument.spreadsheetml'
+
+
+def _estilos_xml():
+    """styles.xml: fuente, relleno y borde del encabezado salen de PLANTILLA_ENCABEZADO"""
+    plantilla = PLANTILLA_ENCABEZADO
+    negrita = '<b/>' if plantilla['negrita'] else ''
+    if plantilla['borde']:
+        borde = ''.join(f'<{lado} style="thin"><color auto="1"/></{lado}>' for lado in ('left', 'right', 'top', 'bottom'))
+    else:
+        borde = '<left/><right/><top/><bottom/>'
+    ajustar = ' wrapText="1"' if plantilla['ajustar_texto'] else ''
+    return (
+        f'{_XML}<styleSheet xmlns="{_NS_MAIN}">'
+        f'<numFmts count="3"><numFmt numFmtId="164" formatCode="@"/>'
+        f'<numFmt numFmtId="165" formatCode="{FORMATO_FECHA}"/>'
+        f'<numFmt numFmtId="166" formatCode="{FORMATO_FECHA_HORA}"/></numFmts>'
+        f'<fonts count="2"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font>'
+        f'<font>{negrita}<sz val="11"/><color rgb="FF{plantilla["color_fuente"]}"/>'
+        f'<name val="Calibri"/><family val="2"/></font></fonts>'
+        f'<fills count="3"><fill><patternFill patternType="none"/></fill>'
+        f'<fill><patternFill patternType="gray125"/></fill>'
+        f'<fill><patternFill patternType="solid"><fgColor rgb="FF{plantilla["relleno"]}"/>'
+        f'<bgColor indexed="64"/></patternFill></fill></fills>'
+        f'<borders count="2"><border><left/><right/><top/><bottom/><diagonal/></border>'
+        f'<border>{borde}<diagonal/></border></borders>'
+        f'<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        f'<cellXfs count="5"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        f'<xf numFmtId="0" fontId="1" fillId="2" borderId="1" xfId="0" applyFont="1" applyFill="1" '
+        f'applyBorder="1" applyAlignment="1"><alignment vertical="center"{ajustar}/></xf>'
+        f'<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        f'<xf numFmtId="165" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+        f'<xf numFmtId="166" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+        f'<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        f'<dxfs count="0"/><tableStyles count="0"/></styleSheet>'
+    )
+
+
+def _escribir_hoja_nativa(salida, columnas, inicio, fin, seleccionada):
+    """Escribe sheetN.xml en salida (binario); devuelve la última celda ('AD1001')"""
+    plantilla = PLANTILLA_ENCABEZADO
+    letras = [letra_columna(c) for c in range(len(columnas))] or ['A']
+    ultima = f"{letras[-1]}{fin - inicio + 1}"
+    pestana = ' tabSelected="1"' if seleccionada else ''
+    panel = ''
+    if plantilla['fijar_encabezado']:
+        panel = '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/><selection pane="bottomLeft"/>'
+    anchos = ''.join(f'<col min="{c}" max="{c}" width="{columna.ancho}" customWidth="1"/>'
+                     for c, columna in enumerate(columnas, start=1))
+    anchos = f'<cols>{anchos}</cols>' if anchos else ''
+    encabezado = ''.join(f'<c r="{letra}1" s="{_ESTILO["encabezado"]}" t="inlineStr"><is>{_xml_texto(columna.nombre)}</is></c>'
+                         for letra, columna in zip(letras, columnas))
+    salida.write((
+        f'{_XML}<worksheet xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><dimension ref="A1:{ultima}"/>'
+        f'<sheetViews><sheetView{pestana} workbookViewId="0">{panel}</sheetView></sheetViews>'
+        f'<sheetFormatPr defaultRowHeight="15"/>{anchos}<sheetData><row r="1">{encabezado}</row>'
+    ).encode('utf-8'))
+
+    for bloque_inicio in range(inicio, fin, FILAS_POR_BLOQUE):
+        bloque_fin = min(bloque_inicio + FILAS_POR_BLOQUE, fin)
+        primera = bloque_inicio - inicio + 2
+        numeros = np.arange(primera, primera + bloque_fin - bloque_inicio).astype(str).astype(object)
+        # Una fila de la matriz por fila de la hoja: <row>, sus celdas y </row>; se une todo de una vez
+        partes = np.empty((len(numeros), len(columnas) + 2), dtype=object)
+        partes[:, 0] = '<row r="' + numeros + '">'
+        partes[:, -1] = '</row>'
+        for c, (letra, columna) in enumerate(zip(letras, columnas), start=1):
+            xml = columna.bloque_xml(bloque_inicio, bloque_fin)
+            partes[:, c] = np.where(xml == '', '', f'<c r="{letra}' + numeros + '"' + xml)
+        salida.write(''.join(partes.ravel()).encode('utf-8'))
+
+    filtro = f'<autoFilter ref="A1:{ultima}"/>' if plantilla['filtro'] and columnas else ''
+    salida.write((f'</sheetData>{filtro}<pageMargins left="0.7" right="0.7" top="0.75" bottom="0.75" '
+                  f'header="0.3" footer="0.3"/></worksheet>').encode('utf-8'))
+    return ultima
+
+
+def _escribir_nativo(destino, columnas, filas, hojas, max_filas):
+    """Paquete .xlsx mínimo (sin tema ni propiedades); cada hoja se comprime mientras se genera"""
+    ultimas = []
+    with zipfile.ZipFile(destino, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as libro:
+        for parte, nombre in enumerate(hojas):
+            with libro.open(f'xl/worksheets/sheet{parte + 1}.xml', 'w', force_zip64=True) as salida:
+                inicio, fin = parte * max_filas, min((parte + 1) * max_filas, filas)
+                ultimas.append(_escribir_hoja_nativa(salida, columnas, inicio, fin, parte == 0))
+
+        numeros = range(1, len(hojas) + 1)
+        tipos_hojas = ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                              f'ContentType="{_TIPO_HOJA_CALCULO}.worksheet+xml"/>' for i in numeros)
+        libro.writestr('[Content_Types].xml', (
+            f'{_XML}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            f'<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            f'<Default Extension="xml" ContentType="application/xml"/>'
+            f'<Override PartName="/xl/workbook.xml" ContentType="{_TIPO_HOJA_CALCULO}.sheet.main+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{_TIPO_HOJA_CALCULO}.styles+xml"/>'
+            f'{tipos_hojas}</Types>'))
+        libro.writestr('_rels/.rels', (
+            f'{_XML}<Relationships xmlns="{_NS_PAQUETE}"><Relationship Id="rId1" '
+            f'Type="{_NS_REL}/officeDocument" Target="xl/workbook.xml"/></Relationships>'))
+        relaciones = ''.join(f'<Relationship Id="rId{i}" Type="{_NS_REL}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                             for i in numeros)
+        libro.writestr('xl/_rels/workbook.xml.rels', (
+            f'{_XML}<Relationships xmlns="{_NS_PAQUETE}">{relaciones}'
+            f'<Relationship Id="rId{len(hojas) + 1}" Type="{_NS_REL}/styles" Target="styles.xml"/></Relationships>'))
+
+        hojas_xml = ''.join(f'<sheet name={quoteattr(nombre)} sheetId="{i}" r:id="rId{i}"/>'
+                            for i, nombre in zip(numeros, hojas))
+        nombres_definidos = ''
+        if PLANTILLA_ENCABEZADO['filtro'] and columnas:
+            # Rango del autofiltro de cada hoja, con referencias absolutas: 'reporte'!$A$1:$AD$1001
+            rangos = []
+            for i, (nombre, ultima) in enumerate(zip(hojas, ultimas)):
+                columna, fila = re.match(r'([A-Z]+)(\d+)$', ultima).groups()
+                rangos.append(f'<definedName name="_xlnm._FilterDatabase" localSheetId="{i}" hidden="1">'
+                              f"{escape(repr(nombre))}!$A$1:${columna}${fila}</definedName>")
+            nombres_definidos = f"<definedNames>{''.join(rangos)}</definedNames>"
+        libro.writestr('xl/workbook.xml', (
+            f'{_XML}<workbook xmlns="{_NS_MAIN}" xmlns:r="{_NS_REL}"><bookViews><workbookView/></bookViews>'
+            f'<sheets>{hojas_xml}</sheets>{nombres_definidos}<calcPr calcId="124519" fullCalcOnLoad="1"/></workbook>'))
+        libro.writestr('xl/styles.xml', _estilos_xml())
+
+
+def _escribir_xlsxwriter(destino, columnas, filas, hojas, max_filas):
+    libro = xlsxwriter.Workbook(destino, {'constant_memory': True, 'in_memory': False,
+                                          'strings_to_formulas': False, 'strings_to_urls': False})
+    plantilla = PLANTILLA_ENCABEZADO
+    encabezado = libro.add_format({
+        'bold': plantilla['negrita'], 'font_color': f"#{plantilla['color_fuente']}",
+        'bg_color': f"#{plantilla['relleno']}", 'border': 1 if plantilla['borde'] else 0,
+        'text_wrap': plantilla['ajustar_texto'], 'valign': 'vcenter',
+    })
+    formatos = {
+        'fecha': libro.add_format({'num_format': FORMATO_FECHA}),
+        'fecha_hora': libro.add_format({'num_format': FORMATO_FECHA_HORA}),
+        'texto': libro.add_format({'num_format': '@'}),
+    }
+    escritores = []
+    for columna in columnas:
+        if columna.tipo in ('fecha', 'fecha_hora'):
+            escritores.append(lambda hoja, f, c, valor, formato=formatos[columna.tipo]:
+                              hoja.write_datetime(f, c, valor, formato))
+        elif columna.tipo == 'numero':
+            escritores.append(lambda hoja, f, c, valor: hoja.write_number(f, c, valor))
+        else:
+            escritores.append(lambda hoja, f, c, valor, formato=formatos['texto']:
+                              hoja.write_string(f, c, valor, formato))
+
+    for parte, nombre in enumerate(hojas):
+        hoja = libro.add_worksheet(nombre)
+        inicio, fin = parte * max_filas, min((parte + 1) * max_filas, filas)
+        for c, columna in enumerate(columnas):
+            hoja.set_column(c, c, columna.ancho)
+            hoja.write_string(0, c, columna.nombre, encabezado)
+        if plantilla['fijar_encabezado']:
+            hoja.freeze_panes(1, 0)
+        if plantilla['filtro'] and columnas:
+            hoja.autofilter(0, 0, max(fin - inicio, 1), len(columnas) - 1)
+        for f, fila in enumerate(_filas(columnas, inicio, fin), start=1):
+            for c, valor in enumerate(fila):
+                if valor is not None:
+                    escritores[c](hoja, f, c, valor)
+    libro.close()
+
+
+def escribir_xlsx(df, destino, nombre_hoja='reporte', motor='auto', max_filas_hoja=MAX_FILAS_HOJA):
+    """Escribe df como .xlsx por bloques de filas, sin armar el libro en memoria
+
+    destino: ruta o archivo binario abierto. IDs, centros de coste y códigos
+    van como texto (conservan ceros y no pasan a notación científica), las
+    columnas con fechas ISO como fechas de Excel y COLUMNAS_NUMERO como
+    números. Más filas que max_filas_hoja -> hojas nombre_hoja, nombre_hoja_2...
+    cada una con el encabezado de PLANTILLA_ENCABEZADO.
+    motor: 'nativo' (por defecto) o 'xlsxwriter' (constant_memory). Devuelve
+    los nombres de las hojas.
+    """
+    motor = _motor(motor)
+    columnas = [_Columna(nombre, df[nombre]) for nombre in df.columns]
+    hojas = _nombres_hojas(nombre_hoja, len(df), max_filas_hoja)
+    if len(hojas) > 1:
+        decir(f"   📑 {len(df):,} filas no caben en una hoja: {len(hojas)} hojas de hasta {max_filas_hoja:,}")
+    if motor == 'xlsxwriter':
+        _escribir_xlsxwriter(destino, columnas, len(df), hojas, max_filas_hoja)
+    else:
+        _escribir_nativo(destino, columnas, len(df), hojas, max_filas_hoja)
+    return hojas
+
+
+def _a_texto(valor, con_hora):
+    if isinstance(valor, (dt.datetime, pd.Timestamp)):
+        return valor.strftime('%Y-%m-%d %H:%M:%S' if con_hora else '%Y-%m-%d')
+    if isinstance(valor, dt.date):
+        return valor.strftime('%Y-%m-%d')
+    return str(valor)
+
+
+def _hoja_como_objetos(hoja):
+    """Valores tal como los guarda la celda: <v>26.0</v> vuelve float y <v>26</v> int (pd.read_excel los junta)"""
+    filas = hoja.iter_rows(values_only=True)
+    nombres = [str(nombre) for nombre in next(filas, ())]
+    columnas = list(zip(*filas)) or [()] * len(nombres)
+    return pd.DataFrame({nombre: np.array(valores, dtype=object) for nombre, valores in zip(nombres, columnas)})
+
+
+def leer_xlsx_resultado(origen):
+    """Lee un .xlsx de escribir_xlsx (todas sus hojas) con todo como texto, igual que el CSV
+
+    Las fechas vuelven a 'AAAA-MM-DD' (con hora solo si alguna la tiene) y los
+    números a su texto, para que el Paso 2 reciba lo mismo que de un CSV: el
+    motor nativo deja 26.0 como '26.0' en la celda y acá se lee así (xlsxwriter
+    escribe 26, y vuelve '26').
+    """
+    if not OPENPYXL_DISPONIBLE:
+        raise ValueError("Leer un .xlsx necesita openpyxl (pip install openpyxl)")
+    libro = openpyxl.load_workbook(abrir_origen(origen), read_only=True, data_only=True, keep_links=False)
+    try:
+        hojas = [_hoja_como_objetos(hoja) for hoja in libro.worksheets]
+    finally:
+        libro.close()
+    df = pd.concat(hojas, ignore_index=True) if len(hojas) > 1 else hojas[0]
+    for col in df.columns:
+        valores = df[col].to_numpy(dtype=object)
+        # 26 y 26.0 son iguales para factorize: los float se agrupan aparte para no perder su '.0'
+        flotantes = np.fromiter((isinstance(valor, float) for valor in valores), dtype=bool, count=len(valores))
+        codigos = np.full(len(valores), -1)
+        unicos = []
+        for grupo in (flotantes, ~flotantes):
+            codigos_grupo, unicos_grupo = pd.factorize(valores[grupo])
+            codigos[grupo] = np.where(codigos_grupo < 0, -1, codigos_grupo + len(unicos))
+            unicos.extend(unicos_grupo)
+        con_hora = any(isinstance(valor, (dt.datetime, pd.Timestamp)) and
+                       (valor.hour, valor.minute, valor.second) != (0, 0, 0) for valor in unicos)
+        textos = np.array([_a_texto(valor, con_hora) for valor in unicos] + [np.nan], dtype=object)
+        df[col] = pd.array(textos[np.where(codigos < 0, len(unicos), codigos)], dtype='str')
+    return df
@@ -0,0 +1,86 @@
+# Formatos de resultado - CSV, XLSX NATIVO, PARQUET Y ARROW IPC CON EL ESQUEMA ADENTRO
+from pathlib import Path
+
+import pandas as pd
+
+from cache_excel import PARQUET_DISPONIBLE
+from excel_salida import escribir_xlsx
+from instrumentacion import decir
+from lectores_excel import nombre_archivo
+
+if PARQUET_DISPONIBLE:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+FORMATOS_SALIDA = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'arrow': '.arrow',  # Arrow IPC (archivo Feather v2)
+    'xlsx': '.xlsx',  # IDs como texto, fechas como fechas (excel_salida)
+}
+
+# Extensiones que se reconocen al leer (además de las de FORMATOS_SALIDA)
+EXTENSIONES = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+    '.xlsx': 'xlsx',
+}
+
+FORMATOS_COLUMNARES = ('parquet', 'arrow')
+
+
+def formato_de(ruta, formato=None):
+    """Formato pedido o, si no se pide, el de la extensión ('csv' si no se reconoce)
+
+    ruta: ruta o archivo en memoria con nombre (ArchivoEnMemoria, archivo subido)
+    """
+    if formato is None:
+        formato = EXTENSIONES.get(Path(nombre_archivo(ruta)).suffix.lower(), 'csv')
+    if formato not in FORMATOS_SALIDA:
+        raise ValueError(f"Formato no soportado: {formato}. Opciones: {list(FORMATOS_SALIDA)}")
+    if formato in FORMATOS_COLUMNARES and not PARQUET_DISPONIBLE:
+        raise ValueError(f"El formato {formato} necesita pyarrow (pip install pyarrow)")
+    return formato
+
+
+def con_extension(ruta, formato):
+    """ruta con la extensión del formato (para las salidas con nombre automático)"""
+    return Path(ruta).with_suffix(FORMATOS_SALIDA[formato])
+
+
+def escribir_resultado(df, destino, formato):
+    """Escribe a una ruta o a un archivo binario abierto (BytesIO para descargas)
+
+    Parquet y Arrow guardan los tipos: los IDs siguen siendo texto (con sus
+    ceros a la izquierda) y las categóricas siguen siendo categóricas al leer.
+    xlsx se escribe por bloques, con los IDs como texto para que Excel no los toque.
+    """
+    if formato == 'csv':
+        df.to_csv(destino, index=False, encoding='utf-8-sig')
+    elif formato == 'xlsx':
+        escribir_xlsx(df, destino)
+    elif formato == 'parquet':
+        df.to_parquet(destino, index=False)
+    else:
+        feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), destino)
+
+
+def guardar_resultado(df, ruta, formato=None):
+    """Escribe el resultado UNA vez en el formato elegido (por defecto, según la extensión)"""
+    ruta = Path(ruta)
+    formato = formato_de(ruta, formato)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    escribir_resultado(df, ruta, formato)
+    decir(f"💾 GUARDADO ({formato}): {ruta}")
+    return ruta
+
+
+def leer_columnar(origen, formato):
+    """Parquet / Arrow IPC de un paso anterior: los tipos vienen en el archivo, sin mapa de dtypes"""
+    if formato == 'parquet':
+        return pd.read_parquet(origen)
+    return pd.read_feather(origen)
@@ -0,0 +1,247 @@
+# Historial de ausentismos - SQLITE POR PERIODO CON ÍNDICES POR EMPLEADO, CECO Y CLASE
+# Uso: python historial_ausentismos.py salidas/2024/reporte_tiendas_*.csv [--historial ruta.sqlite]
+"""Todos los reportes finales (Paso 2) en una base local, consultable en milisegundos.
+
+    historial = HistorialAusentismos()
+    historial.ingerir(df_final)                        # o agregar_tiendas_modificado(..., historial=historial)
+    historial.consultar(numero_de_personal='1636', desde='2024-01', hasta='2024-12')
+
+Cada fila lleva su periodo (AAAA-MM): el que se indique al ingerir o el mes de
+'inicio_de_validez'. El periodo es la partición: volver a ingerir un periodo
+reemplaza sus filas (la última corrida manda, sin duplicados). Los índices
+empiezan por numero_de_personal, centro_de_coste y clase_absentpres, seguidos
+del periodo, así que una búsqueda por cualquiera de ellos en un rango de meses
+solo toca sus filas aunque haya años guardados.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from instrumentacion import decir
+from lectores_excel import nombre_archivo
+from part2_dash_store_total import leer_validado
+
+RUTA_POR_DEFECTO = os.environ.get('VALIDADOR_HISTORIAL', 'almacen/historial.sqlite')
+
+# Columnas indexadas (cada índice: columna + periodo)
+COLUMNAS_INDICE = ('numero_de_personal', 'centro_de_coste', 'clase_absentpres')
+
+# Columna de la que sale el periodo cuando no se indica uno
+COLUMNA_PERIODO = 'inicio_de_validez'
+SIN_PERIODO = 'sin_periodo'
+
+# Tope de filas por consulta (la página no debe traer años enteros a memoria)
+LIMITE_POR_DEFECTO = 10_000
+
+FILAS_POR_LOTE = 50_000
+
+# Filas que ANALYZE muestrea por índice tras cada ingesta (milisegundos aunque haya millones)
+FILAS_ANALISIS = 2_000
+
+
+def _columna_sql(nombre):
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def periodos_de(df, periodo=None):
+    """Periodo de cada fila: el indicado o 'AAAA-MM' de inicio_de_validez (SIN_PERIODO si no hay fecha)"""
+    if periodo is not None:
+        return np.full(len(df), str(periodo), dtype=object)
+    if COLUMNA_PERIODO not in df.columns:
+        return np.full(len(df), SIN_PERIODO, dtype=object)
+    # Se parsean solo las fechas distintas (unas cientas por reporte)
+    codigos, unicas = pd.factorize(df[COLUMNA_PERIODO].astype(object))
+    fechas = pd.to_datetime(pd.Series(unicas, dtype=object), errors='coerce', format='mixed')
+    por_fecha = np.append(fechas.dt.strftime('%Y-%m').fillna(SIN_PERIODO).to_numpy(dtype=object), SIN_PERIODO)
+    return por_fecha[np.where(codigos < 0, len(unicas), codigos)]
+
+
+class HistorialAusentismos:
+    """Reportes finales acumulados en SQLite, una tabla 'registros' con periodo + columnas del reporte
+
+    Los valores se guardan como texto, tal como salen en el CSV. Cada operación
+    abre su propia conexión (WAL): la página de búsqueda consulta mientras un
+    trabajo o el lote ingieren.
+    """
+
+    def __init__(self, ruta=RUTA_POR_DEFECTO):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        with self._conexion() as conexion:
+            conexion.execute("CREATE TABLE IF NOT EXISTS ingestas (id INTEGER PRIMARY KEY, archivo TEXT, "
+                             "fecha TEXT, periodos TEXT, filas INTEGER, segundos REAL)")
+            # Resumen por periodo al día con cada ingesta: listar periodos no recorre 'registros'
+            conexion.execute("CREATE TABLE IF NOT EXISTS periodos (periodo TEXT PRIMARY KEY, filas INTEGER, "
+                             "ingesta INTEGER)")
+
+    @contextmanager
+    def _conexion(self):
+        with closing(sqlite3.connect(self.ruta, timeout=60)) as conexion:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=NORMAL')
+            with conexion:  # una transacción: commit al salir, rollback si falla
+                yield conexion
+
+    @staticmethod
+    def _columnas(conexion):
+        """Columnas de 'registros' en orden ([] si todavía no se ingirió nada)"""
+        return [fila[1] for fila in conexion.execute("PRAGMA table_info(registros)")]
+
+    def _preparar_tabla(self, conexion, columnas):
+        """Crea 'registros' con las columnas del primer reporte (y sus índices) o agrega las que falten
+
+        Corre dentro de la transacción de ingerir(), que ya tiene el candado de
+        escritura (BEGIN IMMEDIATE): dos procesos que llegan a la base vacía a la
+        vez no ven los dos 'sin tabla', el segundo espera y encuentra la del primero.
+        """
+        existentes = self._columnas(conexion)
+        if not existentes:
+            todas = ['periodo', 'ingesta'] + columnas + [col for col in COLUMNAS_INDICE if col not in columnas]
+            conexion.execute(f"CREATE TABLE IF NOT EXISTS registros "
+                             f"({', '.join(f'{_columna_sql(col)} TEXT' for col in todas)})")
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_periodo ON registros (periodo)")
+            for col in COLUMNAS_INDICE:
+                conexion.execute(f"CREATE INDEX IF NOT EXISTS idx_{col} ON registros ({col}, periodo)")
+            return
+        for col in columnas:
+            if col not in existentes:
+                conexion.execute(f"ALTER TABLE registros ADD COLUMN {_columna_sql(col)} TEXT")
+
+    def ingerir(self, df_final, periodo=None, archivo=''):
+        """Guarda el reporte final reemplazando los periodos que trae
+
+        periodo: 'AAAA-MM' para todas las filas (p. ej. el del lote); si no, el mes
+        de inicio_de_validez de cada fila. Las columnas nuevas se agregan a la tabla.
+        Devuelve {'filas', 'periodos', 'reemplazadas', 'segundos'}.
+        """
+        inicio = time.perf_counter()
+        periodos = periodos_de(df_final, periodo)
+        distintos, filas_por_periodo = np.unique(periodos.astype(str), return_counts=True)
+        distintos = distintos.tolist()
+        columnas = [str(col) for col in df_final.columns if col not in ('periodo', 'ingesta')]
+        valores = [periodos]
+        for col in columnas:
+            serie = df_final[col]
+            valores.append(np.where(serie.isna().to_numpy(), None, serie.astype(str).to_numpy(dtype=object)))
+
+        with self._conexion() as conexion:
+            # Candado de escritura ANTES de mirar el esquema (sqlite3 no abre la transacción para DDL)
+            conexion.execute("BEGIN IMMEDIATE")
+            self._preparar_tabla(conexion, columnas)
+            id_ingesta = conexion.execute(
+                "INSERT INTO ingestas (archivo, fecha, periodos, filas) VALUES (?, ?, ?, ?)",
+                (archivo, datetime.now().isoformat(timespec='seconds'), ','.join(distintos), len(df_final))).lastrowid
+            reemplazadas = conexion.execute(
+                f"DELETE FROM registros WHERE periodo IN ({', '.join('?' * len(distintos))})", distintos).rowcount
+            insertar = (f"INSERT INTO registros (periodo, ingesta, {', '.join(map(_columna_sql, columnas))}) "
+                        f"VALUES (?, {id_ingesta}, {', '.join('?' * len(columnas))})")
+            for inicio_lote in range(0, len(df_final), FILAS_POR_LOTE):
+                conexion.executemany(insertar, zip(*[valor[inicio_lote:inicio_lote + FILAS_POR_LOTE]
+                                                     for valor in valores]))
+            conexion.executemany("INSERT OR REPLACE INTO periodos VALUES (?, ?, ?)",
+                                 [(p, int(n), id_ingesta) for p, n in zip(distintos, filas_por_periodo)])
+            # Estadísticas por muestreo: con varios filtros el planificador elige el índice más selectivo
+            conexion.execute(f"PRAGMA analysis_limit = {FILAS_ANALISIS}")
+            conexion.execute("ANALYZE registros")
+            segundos = round(time.perf_counter() - inicio, 4)
+            conexion.execute("UPDATE ingestas SET segundos = ? WHERE id = ?", (segundos, id_ingesta))
+        decir(f"   📚 Historial: {len(df_final):,} filas en {len(distintos)} periodo(s) "
+              f"({reemplazadas:,} reemplazadas, {segundos}s)")
+        return {'filas': len(df_final), 'periodos': distintos, 'reemplazadas': reemplazadas, 'segundos': segundos}
+
+    def ingerir_archivo(self, origen, periodo=None):
+        """Ingiere un resultado guardado del Paso 2 (CSV, Parquet, Arrow o xlsx)"""
+        return self.ingerir(leer_validado(origen), periodo, nombre_archivo(origen))
+
+    def consultar(self, numero_de_personal=None, centro_de_coste=None, clase_absentpres=None,
+                  desde=None, hasta=None, limite=LIMITE_POR_DEFECTO):
+        """Filas que cumplen todos los filtros dados, por periodo e inicio de validez
+
+        desde / hasta: periodos 'AAAA-MM' (inclusive). Sin filtros por columna
+        devuelve las primeras filas del rango. df.attrs['consulta'] lleva los
+        segundos y si se cortó en el límite.
+        """
+        inicio = time.perf_counter()
+        filtros = {'numero_de_personal': numero_de_personal, 'centro_de_coste': centro_de_coste,
+                   'clase_absentpres': clase_absentpres}
+        condiciones, parametros = [], []
+        for col, valor in filtros.items():
+            if valor not in (None, ''):
+                condiciones.append(f"{col} = ?")
+                parametros.append(str(valor).strip())
+        if desde:
+            condiciones.append("periodo >= ?")
+            parametros.append(str(desde))
+        if hasta:
+            condiciones.append("periodo <= ?")
+            parametros.append(str(hasta))
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ''
+
+        with self._conexion() as conexion:
+            columnas = [col for col in self._columnas(conexion) if col != 'ingesta']
+            if not columnas:
+                df = pd.DataFrame()
+                df.attrs['consulta'] = {'filas': 0, 'truncada': False, 'segundos': 0.0}
+                return df
+            orden = f"periodo, {_columna_sql(COLUMNA_PERIODO)}" if COLUMNA_PERIODO in columnas else "periodo"
+            cursor = conexion.execute(
+                f"SELECT {', '.join(map(_columna_sql, columnas))} FROM registros {donde} "
+                f"ORDER BY {orden} LIMIT ?", parametros + [int(limite) + 1])
+            filas = cursor.fetchall()
+        df = pd.DataFrame(filas[:limite], columns=columnas, dtype=object)
+        df.attrs['consulta'] = {
+            'filas': len(df),
+            'truncada': len(filas) > limite,
+            'segundos': round(time.perf_counter() - inicio, 4),
+        }
+        return df
+
+    def periodos(self):
+        """Una fila por periodo guardado: filas y fecha de su última ingesta"""
+        with self._conexion() as conexion:
+            filas = conexion.execute(
+                "SELECT p.periodo, p.filas, i.fecha FROM periodos p JOIN ingestas i ON i.id = p.ingesta "
+                "ORDER BY p.periodo").fetchall()
+        return pd.DataFrame(filas, columns=['periodo', 'filas', 'ingerido'])
+
+    def estadisticas(self):
+        with self._conexion() as conexion:
+            filas, periodos = conexion.execute("SELECT COALESCE(SUM(filas), 0), COUNT(*) FROM periodos").fetchone()
+            ingestas, ultima = conexion.execute("SELECT COUNT(*), MAX(fecha) FROM ingestas").fetchone()
+        return {
+            'ruta': str(self.ruta),
+            'filas': filas,
+            'periodos': periodos,
+            'ingestas': ingestas,
+            'ultima_ingesta': ultima,
+            'mb': round(self.ruta.stat().st_size / 1024 / 1024, 2) if self.ruta.exists() else 0.0,
+        }
+
+
+def main():
+    from lote_nomina import periodo_de
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('archivos', nargs='+', help='Resultados del Paso 2 (CSV, Parquet, Arrow o xlsx)')
+    parser.add_argument('--historial', default=RUTA_POR_DEFECTO)
+    parser.add_argument('--periodo-del-nombre', action='store_true',
+                        help='Periodo tomado del nombre del archivo (2024-03, 202403...) en vez de las fechas')
+    args = parser.parse_args()
+
+    historial = HistorialAusentismos(args.historial)
+    for archivo in args.archivos:
+        historial.ingerir_archivo(archivo, periodo_de(archivo) if args.periodo_del_nombre else None)
+    print(f"✅ {historial.estadisticas()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,243 @@
+# Instrumentación - ETAPAS CRONOMETRADAS (FILAS, TIEMPO, MEMORIA PICO) Y CONSOLA OPCIONAL
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+    RSS_DISPONIBLE = True
+except ImportError:  # Windows
+    RSS_DISPONIBLE = False
+
+# rss: pico de memoria residente muestreado (barato); tracemalloc: asignaciones de
+# Python/NumPy exactas por etapa pero ~10x más lento, solo para diagnosticar
+MODOS_MEMORIA = ('rss', 'tracemalloc', 'ninguna')
+MODO_MEMORIA_POR_DEFECTO = os.environ.get('VALIDADOR_MEMORIA', 'rss')
+
+# Etapas de cada paso, en orden (la app calcula el avance con ellas)
+ETAPAS_PASO1 = ('verificacion', 'lectura', 'join', 'renombrado', 'normalizacion', 'limpieza', 'escritura')
+ETAPAS_PASO2 = ('verificacion', 'lectura', 'maestro_tiendas', 'cruce_tiendas', 'limpieza', 'reorden', 'escritura')
+
+_CONSOLA = contextvars.ContextVar('consola', default=os.environ.get('VALIDADOR_CONSOLA', '1') != '0')
+
+_MB = 1024 * 1024
+
+# Cada cuánto el hilo de muestreo lee la memoria residente durante una etapa
+INTERVALO_MUESTREO = float(os.environ.get('VALIDADOR_MUESTREO_MS', '10')) / 1000
+
+
+def consola_activa():
+    """¿Se imprime el detalle del proceso? (las muestras caras solo se calculan si sí)"""
+    return _CONSOLA.get()
+
+
+def decir(*args, **kwargs):
+    """print() que no hace nada con la consola apagada"""
+    if _CONSOLA.get():
+        print(*args, **kwargs)
+
+
+@contextmanager
+def consola(activa=True):
+    """Enciende o apaga el detalle en consola dentro del bloque (por hilo / tarea)"""
+    token = _CONSOLA.set(activa)
+    try:
+        yield
+    finally:
+        _CONSOLA.reset(token)
+
+
+def _rss_pico():
+    """Pico de memoria residente del proceso en bytes (None si no se puede medir)"""
+    if not RSS_DISPONIBLE:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if os.uname().sysname == 'Darwin' else pico * 1024  # Linux lo da en KB
+
+
+def _rss_actual():
+    """Memoria residente actual del proceso en bytes (Linux; None si no se puede leer)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class _MuestreoRss:
+    """Hilo que lee el RSS actual cada intervalo y guarda el máximo desde el último reiniciar()
+
+    El máximo es de este objeto, no del kernel: a diferencia de volver el pico
+    del proceso a cero (/proc/self/clear_refs), una corrida no le borra el
+    pico a otra que mide a la vez. Corre solo mientras haya una etapa abierta.
+    """
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self._pico = _rss_actual() or 0
+        self._lock = threading.Lock()
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='muestreo_rss', daemon=True)
+        self._hilo.start()
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            self.tomar()
+
+    def tomar(self):
+        """Lee el RSS ahora y devuelve el máximo visto"""
+        rss = _rss_actual() or 0
+        with self._lock:
+            self._pico = max(self._pico, rss)
+            return self._pico
+
+    def reiniciar(self):
+        with self._lock:
+            self._pico = _rss_actual() or 0
+
+    def detener(self):
+        self._parar.set()
+        self._hilo.join()
+
+
+class InformeEjecucion:
+    """Etapas de una corrida: filas, segundos y memoria pico de cada una
+
+        informe = InformeEjecucion('paso1')
+        with informe.etapa('join', filas=len(df)) as etapa:
+            ...
+            etapa['filas'] = len(resultado)
+        informe.exportar_jsonl('salidas/etapas.jsonl')
+
+    Las etapas se pueden anidar (queda 'padre' y 'nivel'); el pico de una etapa
+    incluye el de sus hijas. observadores: funciones llamadas con cada etapa al
+    cerrarse (p. ej. la barra de progreso de la app).
+    memoria: 'rss' (por defecto), 'tracemalloc' o 'ninguna'. Con rss en Linux el
+    pico es el máximo residente muestreado durante la etapa (cada
+    INTERVALO_MUESTREO, por un hilo del informe); en otros sistemas es el del
+    proceso hasta ese momento (queda en 'memoria_medida'); con tracemalloc es
+    lo que la etapa sumó sobre lo que ya había al empezar. Las lecturas en
+    procesos hijos no se ven; el RSS es del proceso, así que dos corridas a la
+    vez en el mismo proceso se suman (el gestor de trabajos las separa en
+    procesos) pero ninguna reinicia la medición de la otra.
+    """
+
+    def __init__(self, nombre='corrida', memoria=MODO_MEMORIA_POR_DEFECTO, observadores=None):
+        if memoria not in MODOS_MEMORIA:
+            raise ValueError(f"Modo de memoria no soportado: {memoria}. Opciones: {list(MODOS_MEMORIA)}")
+        if memoria == 'rss' and not RSS_DISPONIBLE:
+            memoria = 'ninguna'
+        self.nombre = nombre
+        self.id = uuid.uuid4().hex[:12]
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+        self.memoria = memoria
+        self.observadores = list(observadores or [])
+        self.etapas = []
+        self._abiertas = []  # [etapa, pico de las hijas ya cerradas]
+        self._rss_por_etapa = memoria == 'rss' and _rss_actual() is not None
+        self._muestreo = None  # _MuestreoRss mientras haya etapas abiertas
+
+    def _pico_actual(self):
+        if self.memoria == 'tracemalloc':
+            return tracemalloc.get_traced_memory()[1]
+        if self._rss_por_etapa:
+            return self._muestreo.tomar()
+        if self.memoria == 'rss':
+            return _rss_pico()
+        return None
+
+    def _reiniciar_pico(self):
+        if self.memoria == 'tracemalloc':
+            tracemalloc.reset_peak()
+        elif self._rss_por_etapa:
+            self._muestreo.reiniciar()
+
+    @contextmanager
+    def etapa(self, nombre, **datos):
+        """Cronometra el bloque; el dict que entrega se puede completar (filas, detalles)"""
+        detener_traza = self.memoria == 'tracemalloc' and not tracemalloc.is_tracing()
+        if detener_traza:
+            tracemalloc.start()
+        if self._rss_por_etapa and not self._abiertas:
+            self._muestreo = _MuestreoRss()
+        padre = self._abiertas[-1] if self._abiertas else None
+        if padre is not None:
+            # El pico de la madre hasta acá no se pierde al reiniciar para la hija
+            padre[1] = max(padre[1] or 0, self._pico_actual() or 0)
+        self._reiniciar_pico()
+        base = tracemalloc.get_traced_memory()[0] if self.memoria == 'tracemalloc' else 0
+
+        registro = {
+            'corrida': self.id,
+            'informe': self.nombre,
+            'etapa': nombre,
+            'padre': padre[0]['etapa'] if padre is not None else None,
+            'nivel': len(self._abiertas),
+            'inicio': datetime.now().isoformat(timespec='milliseconds'),
+            'filas': None,
+        }
+        registro.update(datos)
+        abierta = [registro, None]
+        self._abiertas.append(abierta)
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except BaseException as e:
+            registro['error'] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            registro['segundos'] = round(time.perf_counter() - inicio, 4)
+            pico = max(self._pico_actual() or 0, abierta[1] or 0)
+            if self.memoria == 'ninguna':
+                registro['memoria_pico_mb'] = None
+            else:
+                registro['memoria_pico_mb'] = round((pico - base) / _MB, 1)
+                registro['memoria_medida'] = ('tracemalloc' if self.memoria == 'tracemalloc' else
+                                              'rss_etapa' if self._rss_por_etapa else 'rss_proceso')
+            self._abiertas.pop()
+            if padre is not None:
+                padre[1] = max(padre[1] or 0, pico)
+            if detener_traza:
+                tracemalloc.stop()
+            if self._muestreo is not None and not self._abiertas:
+                self._muestreo.detener()
+                self._muestreo = None
+            self.etapas.append(registro)
+            for observador in self.observadores:
+                observador(registro)
+
+    def resumen(self):
+        """Totales de la corrida: segundos de las etapas raíz y memoria pico"""
+        raices = [etapa for etapa in self.etapas if etapa['nivel'] == 0]
+        picos = [etapa['memoria_pico_mb'] for etapa in self.etapas if etapa.get('memoria_pico_mb') is not None]
+        return {
+            'corrida': self.id,
+            'informe': self.nombre,
+            'inicio': self.inicio,
+            'etapas': len(self.etapas),
+            'segundos': round(sum(etapa['segundos'] for etapa in raices), 4),
+            'memoria_pico_mb': max(picos) if picos else None,
+            'errores': [etapa['etapa'] for etapa in self.etapas if 'error' in etapa],
+        }
+
+    def a_dataframe(self):
+        return pd.DataFrame(self.etapas)
+
+    def a_jsonl(self):
+        """Una línea JSON por etapa, en el orden en que terminaron"""
+        return ''.join(json.dumps(etapa, ensure_ascii=False, default=str) + '\n' for etapa in self.etapas)
+
+    def exportar_jsonl(self, ruta, agregar=True):
+        """Escribe (o agrega al final de) un archivo JSON lines; varias corridas pueden compartirlo"""
+        with open(ruta, 'a' if agregar else 'w', encoding='utf-8') as f:
+            f.write(self.a_jsonl())
+        return ruta
+
@@ -0,0 +1,162 @@
+# Join del diagnóstico - CLAVE COMPUESTA EMPAQUETADA EN UN ENTERO
+import numpy as np
+import pandas as pd
+
+COLUMNAS_BUSQUEDA = [
+    'Número de personal',
+    'Número ID',
+    'Clase absent./pres.',
+    'Inicio de validez',
+    'Fin de validez'
+]
+
+COLUMNAS_MODIFICADO = ['Modificado el', 'Modificado por']
+
+# Cómo quedarse con UNA fila cuando el diagnóstico repite la clave
+POLITICAS_DUPLICADOS = ('reciente', 'primero', 'ultimo')
+
+# Margen bajo 2**63 para que clave*cardinalidad + código nunca desborde
+_LIMITE_CLAVE = 2**62
+
+_NANOS_POR_UNIDAD = {'s': 10**9, 'ms': 10**6, 'us': 10**3, 'ns': 1}
+
+
+def _como_enteros(serie):
+    """(int64, paso) para enteros y fechas sin NaT; None si la columna no aplica"""
+    if not isinstance(serie.dtype, np.dtype) or serie.dtype.kind not in 'iuM':
+        return None
+    arreglo = serie.to_numpy()
+    if arreglo.dtype.kind in 'iu':
+        return arreglo.astype(np.int64, copy=False), 1
+    if arreglo.dtype.kind == 'M':
+        enteros = arreglo.view(np.int64)
+        if (enteros == np.iinfo(np.int64).min).any():  # NaT
+            return None
+        unidad = np.datetime_data(arreglo.dtype)[0]
+        if unidad in _NANOS_POR_UNIDAD:
+            dia = 86_400 * 10**9 // _NANOS_POR_UNIDAD[unidad]
+            if not (enteros % dia).any():
+                return enteros, dia
+        return enteros, 1
+    return None
+
+
+def _codificar_columna(izquierda, derecha):
+    """Códigos enteros comparables de una columna clave en ambos lados
+
+    Enteros y fechas sin nulos en un rango acotado se codifican restando el mínimo
+    (fechas en días si todas caen a medianoche), sin tabla hash. El resto se
+    factoriza por lado y los únicos del lado derecho se traducen a los códigos del
+    izquierdo. Devuelve (códigos_izquierda, códigos_derecha, cardinalidad).
+    """
+    enteros_izq, enteros_der = _como_enteros(izquierda), _como_enteros(derecha)
+    if enteros_izq and enteros_der and enteros_izq[1] == enteros_der[1] \
+            and izquierda.dtype == derecha.dtype and len(izquierda) and len(derecha):
+        (valores_izq, paso), (valores_der, _) = enteros_izq, enteros_der
+        minimo = min(valores_izq.min(), valores_der.min())
+        maximo = max(valores_izq.max(), valores_der.max())
+        rango = int(maximo - minimo) // paso + 1
+        if rango <= max(4 * (len(valores_izq) + len(valores_der)), 1 << 20):
+            return (valores_izq - minimo) // paso, (valores_der - minimo) // paso, rango
+
+    codigos_izq, unicos_izq = pd.factorize(izquierda, use_na_sentinel=False)
+    codigos_der, unicos_der = pd.factorize(derecha, use_na_sentinel=False)
+    traduccion = pd.Index(unicos_izq).get_indexer(unicos_der)
+    nuevos = traduccion < 0
+    traduccion[nuevos] = len(unicos_izq) + np.arange(nuevos.sum())
+    return (codigos_izq.astype(np.int64, copy=False),
+            traduccion.astype(np.int64, copy=False)[codigos_der],
+            len(unicos_izq) + int(nuevos.sum()))
+
+
+def empaquetar_claves(izquierda, derecha, columnas):
+    """Codifica las columnas clave de ambos lados en UN entero int64 por fila
+
+    Cada columna se codifica de forma que el mismo valor tenga el mismo código en
+    ambos lados y se combina con las anteriores en base mixta:
+    clave*cardinalidad + código. Solo si el producto de cardinalidades pudiera
+    desbordar int64 se compacta antes con una factorización, así la clave siempre
+    es exacta (sin hashes ni colisiones). Los nulos coinciden entre sí, igual que
+    en pd.merge. Devuelve (claves_izquierda, claves_derecha).
+    """
+    n_izq = len(izquierda)
+    claves_izq = np.zeros(n_izq, dtype=np.int64)
+    claves_der = np.zeros(len(derecha), dtype=np.int64)
+    cardinalidad = 1
+    for col in columnas:
+        codigos_izq, codigos_der, cardinalidad_col = _codificar_columna(izquierda[col], derecha[col])
+        if cardinalidad * cardinalidad_col >= _LIMITE_CLAVE:
+            compactas, unicas = pd.factorize(np.concatenate([claves_izq, claves_der]))
+            claves_izq, claves_der = compactas[:n_izq], compactas[n_izq:]
+            cardinalidad = len(unicas)
+        claves_izq = claves_izq * cardinalidad_col + codigos_izq
+        claves_der = claves_der * cardinalidad_col + codigos_der
+        cardinalidad *= cardinalidad_col
+    return claves_izq, claves_der
+
+
+def indexar_diagnostico(claves_diag, claves_buscar):
+    """Índice hash sobre las claves del diagnóstico -> posición de cada clave buscada
+
+    Devuelve (posiciones en el diagnóstico o -1 si no hay coincidencia, claves
+    distintas del diagnóstico). Con claves repetidas gana la PRIMERA aparición.
+    """
+    codigos, unicas = pd.factorize(claves_diag)
+    if not len(unicas):  # diagnóstico vacío (p. ej. almacén sin esas claves): nada que indexar
+        return np.full(len(claves_buscar), -1, dtype=np.int64), 0
+    # factorize numera por orden de aparición: el primer índice de cada código es su primera fila
+    primera = np.unique(codigos, return_index=True)[1]
+
+    encontradas = pd.Index(unicas).get_indexer(claves_buscar)
+    posiciones = np.where(encontradas >= 0, primera[encontradas], -1)
+    return posiciones, len(unicas)
+
+
+def resolver_duplicados(df_diagnostico, columnas_busqueda=COLUMNAS_BUSQUEDA,
+                        politica='reciente', columna_fecha='Modificado el'):
+    """Deja una sola fila por clave ANTES del join para que no haya fan-out
+
+    politica: 'reciente' (mayor 'Modificado el'; empates -> la última del archivo),
+    'primero' o 'ultimo' (orden del archivo). Vectorizado: orden estable + duplicated
+    sobre la clave empaquetada. Devuelve (diagnóstico sin claves repetidas, conflictos
+    resueltos = filas descartadas).
+    """
+    if politica not in POLITICAS_DUPLICADOS:
+        raise ValueError(f"Política desconocida: {politica}. Opciones: {POLITICAS_DUPLICADOS}")
+
+    claves, _ = empaquetar_claves(df_diagnostico, df_diagnostico.iloc[:0], columnas_busqueda)
+    orden = np.arange(len(claves))
+    if politica == 'reciente':
+        fechas = df_diagnostico[columna_fecha]
+        if fechas.dtype.kind != 'M':
+            fechas = pd.to_datetime(fechas, errors='coerce')
+        # Estable: a igual fecha se respeta el orden del archivo; NaT queda primero (pierde)
+        orden = np.argsort(fechas.to_numpy(), kind='stable')
+        if fechas.isna().any():
+            orden = np.concatenate([orden[fechas.isna().to_numpy()[orden]],
+                                    orden[fechas.notna().to_numpy()[orden]]])
+
+    conservar = 'first' if politica == 'primero' else 'last'
+    repetidas = pd.Series(claves[orden]).duplicated(keep=conservar).to_numpy()
+    conflictos = int(repetidas.sum())
+    if not conflictos:
+        return df_diagnostico, 0
+    filas = np.sort(orden[~repetidas])
+    return df_diagnostico.iloc[filas], conflictos
+
+
+def buscar_modificados(df_reporte, df_diagnostico, columnas_busqueda=COLUMNAS_BUSQUEDA,
+                       columnas_traer=COLUMNAS_MODIFICADO, sufijo='_diagnostico'):
+    """Trae columnas del diagnóstico a cada fila del reporte SIN materializar un merge
+
+    Devuelve (DataFrame alineado con df_reporte con las columnas '<col><sufijo>',
+    cantidad de claves repetidas en el diagnóstico que se ignoraron).
+    """
+    claves_reporte, claves_diag = empaquetar_claves(df_reporte, df_diagnostico, columnas_busqueda)
+    posiciones, claves_distintas = indexar_diagnostico(claves_diag, claves_reporte)
+    claves_repetidas = len(claves_diag) - claves_distintas
+
+    traidas = {}
+    for col in columnas_traer:
+        traidas[f"{col}{sufijo}"] = df_diagnostico[col].array.take(posiciones, allow_fill=True)
+    return pd.DataFrame(traidas, index=df_reporte.index), claves_repetidas
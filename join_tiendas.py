@@ -0,0 +1,88 @@
+# Join de tiendas - CENTRO DE COSTE COMO ENTERO (Int64) E ÍNDICE HASH DE ENTEROS
+import numpy as np
+import pandas as pd
+
+# Cualquier CECO real cabe de sobra; evita desbordes al pasar floats a int64
+_MAXIMO_CECO = 2**53
+
+
+def _a_int64(numeros):
+    """Series float -> Int64 con nulo donde no hay un entero representable"""
+    valores = numeros.to_numpy(dtype=np.float64, na_value=np.nan)
+    enteros = np.isfinite(valores) & (valores % 1 == 0) & (np.abs(valores) < _MAXIMO_CECO)
+    return pd.arrays.IntegerArray(np.where(enteros, valores, 0).astype(np.int64), ~enteros)
+
+
+def parsear_ceco(serie):
+    """Centro de coste -> Int64 (nulo si está vacío o no es un entero)
+
+    Acepta enteros, floats enteros (101.0), y texto con espacios, separador de
+    miles ',' y sufijo decimal cero ('1,101.0' -> 1101). El texto se parsea una
+    vez por valor distinto, nunca por fila.
+    """
+    if serie.dtype.kind in 'iu':
+        return serie.astype('Int64')
+    if serie.dtype.kind == 'f':
+        return pd.Series(_a_int64(serie), index=serie.index, name=serie.name)
+
+    codigos, unicos = pd.factorize(serie)
+    texto = pd.Series(unicos).astype(str).str.strip().str.replace(',', '', regex=False)
+    valores = _a_int64(pd.to_numeric(texto.where(texto != ''), errors='coerce').astype(np.float64))
+    # código -1 (nulo en la entrada) -> NA
+    return pd.Series(valores.take(codigos, allow_fill=True), index=serie.index, name=serie.name)
+
+
+class TablaTiendas:
+    """Maestro de tiendas listo para cruzar: índice hash int64 sobre sus CECO distintos
+
+    Se construye una vez y solo se lee (buscar no modifica nada), así que una
+    misma tabla puede compartirse entre sesiones. Con CECO repetidos en el
+    maestro gana la primera fila; los nulos no coinciden con nada.
+    """
+
+    def __init__(self, claves_tiendas, df_tiendas):
+        validas = claves_tiendas.notna().to_numpy()
+        filas_tiendas = np.flatnonzero(validas)
+        cecos_tiendas = claves_tiendas.to_numpy(dtype=np.int64, na_value=0)[validas]
+        orden = np.argsort(cecos_tiendas, kind='stable')
+        cecos_unicos, primera = np.unique(cecos_tiendas[orden], return_index=True)
+
+        self.columnas = df_tiendas
+        self.claves = claves_tiendas
+        self.indice = pd.Index(cecos_unicos)
+        # posición -1 (CECO que no está) cae en el último elemento: sin fila
+        self.fila_por_ceco = np.append(filas_tiendas[orden[primera]], -1)
+        self.cecos_maestro = len(cecos_unicos)
+        self.cecos_repetidos = len(cecos_tiendas) - len(cecos_unicos)
+
+    def __len__(self):
+        return len(self.columnas)
+
+    def buscar(self, claves_reporte):
+        """Columnas del maestro alineadas con claves_reporte + estadísticas del cruce"""
+        validas_reporte = claves_reporte.notna().to_numpy()
+        cecos_reporte = claves_reporte.to_numpy(dtype=np.int64, na_value=0)
+        posicion = self.indice.get_indexer(cecos_reporte)
+        coincide = validas_reporte & (posicion >= 0)
+        filas = np.where(coincide, self.fila_por_ceco[posicion], -1)
+
+        traidas = {col: self.columnas[col].array.take(filas, allow_fill=True) for col in self.columnas.columns}
+        estadisticas = {
+            'filas': len(claves_reporte),
+            'filas_con_tienda': int(coincide.sum()),
+            'filas_sin_ceco': int((~validas_reporte).sum()),
+            'cecos_reporte': len(pd.unique(cecos_reporte[validas_reporte])),
+            'cecos_con_tienda': len(pd.unique(cecos_reporte[coincide])),
+            'cecos_maestro': self.cecos_maestro,
+            'cecos_repetidos_maestro': self.cecos_repetidos,
+        }
+        return pd.DataFrame(traidas, index=claves_reporte.index), estadisticas
+
+
+def buscar_tiendas(claves_reporte, claves_tiendas, df_tiendas):
+    """Trae las columnas de df_tiendas a cada fila del reporte por CECO entero
+
+    Atajo de TablaTiendas(...).buscar(...) cuando el maestro se usa una sola vez.
+    Devuelve (DataFrame alineado con claves_reporte, estadísticas del cruce).
+    """
+    return TablaTiendas(claves_tiendas, df_tiendas).buscar(claves_reporte)
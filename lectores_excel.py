@@ -0,0 +1,579 @@
+# Lectores de Excel - MOTORES INTERCAMBIABLES PARA ARCHIVOS GRANDES
+import csv
+import io
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+try:
+    from pandas._libs.parsers import STR_NA_VALUES
+except ImportError:  # pragma: no cover - pandas muy antiguo
+    STR_NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan',
+                     '1.#IND', '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None',
+                     'n/a', 'nan', 'null'}
+
+try:
+    import openpyxl
+    OPENPYXL_DISPONIBLE = True
+except ImportError:
+    OPENPYXL_DISPONIBLE = False
+
+try:
+    from python_calamine import CalamineWorkbook
+    CALAMINE_DISPONIBLE = True
+except ImportError:
+    CALAMINE_DISPONIBLE = False
+
+# Filas que se transponen de una vez hacia los buffers de columnas
+TAMANO_LOTE = 10_000
+
+_VALORES_NULOS = sorted(STR_NA_VALUES)
+_TIPOS_NUMERICOS = {'integer', 'floating', 'mixed-integer-float', 'decimal'}
+_TIPOS_FECHA = {'date', 'datetime', 'datetime64'}
+
+# Hasta acá un entero pasa por float64 sin perder nada (más allá, la columna queda en objetos)
+_ENTERO_EXACTO_EN_FLOAT = 2 ** 53
+
+# Nombre de lo que llega en memoria sin nombre: sin extensión, el motor lo decide pandas
+ORIGEN_SIN_NOMBRE = '(en memoria)'
+EN_MEMORIA = (bytes, bytearray, memoryview, io.BytesIO)
+
+
+class ArchivoEnMemoria:
+    """Archivo subido que ya está en memoria (bytes, memoryview o BytesIO) con su nombre
+
+    Se pasa a los lectores igual que una ruta: cada lectura abre su propio
+    BytesIO sobre los mismos bytes, sin copia a disco ni posición compartida
+    entre hilos. El nombre da la extensión (elige el motor) y lo que muestran
+    los mensajes. memoryview / bytearray se pasan a bytes una vez (BytesIO
+    comparte los bytes sin copiarlos en cada lectura).
+    """
+
+    def __init__(self, datos, nombre=None):
+        if isinstance(datos, io.BytesIO):
+            nombre = nombre or getattr(datos, 'name', None)
+            datos = datos.getvalue()
+        self.datos = datos if isinstance(datos, bytes) else bytes(datos)
+        self.name = nombre or ORIGEN_SIN_NOMBRE
+
+    def abrir(self):
+        return io.BytesIO(self.datos)
+
+    def __repr__(self):
+        return f"ArchivoEnMemoria({self.name!r}, {len(self.datos):,} bytes)"
+
+
+def como_origen(origen):
+    """Ruta tal cual; bytes, memoryview o BytesIO (archivo subido) -> ArchivoEnMemoria"""
+    if isinstance(origen, EN_MEMORIA):
+        return ArchivoEnMemoria(origen)
+    return origen
+
+
+def nombre_archivo(origen):
+    """Nombre para mensajes y extensión: el de la ruta o el del archivo en memoria"""
+    if isinstance(origen, (str, os.PathLike)):
+        return Path(origen).name
+    return getattr(origen, 'name', None) or ORIGEN_SIN_NOMBRE
+
+
+def abrir_origen(origen):
+    """Lo que reciben openpyxl / zipfile / pandas: la ruta o un BytesIO nuevo"""
+    origen = como_origen(origen)
+    return origen.abrir() if isinstance(origen, ArchivoEnMemoria) else origen
+
+
+@contextmanager
+def ruta_en_disco(origen):
+    """Ruta real para un motor que solo lee de disco
+
+    Una ruta se usa tal cual; lo que está en memoria se copia a un directorio
+    temporal propio de esta lectura, que se borra siempre (aunque falle).
+    """
+    origen = como_origen(origen)
+    if not isinstance(origen, ArchivoEnMemoria):
+        yield origen
+        return
+    directorio = tempfile.mkdtemp(prefix='validador_')
+    try:
+        ruta = Path(directorio) / (Path(origen.name).name or 'archivo')
+        ruta.write_bytes(origen.datos)
+        yield ruta
+    finally:
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def _nombres_columnas(encabezado):
+    """Nombres de columnas igual que pd.read_excel: 'Unnamed: i' y duplicadas como 'col.1'"""
+    nombres = []
+    for i, valor in enumerate(encabezado):
+        if valor is None or valor == '':
+            nombres.append(f"Unnamed: {i}")
+        elif isinstance(valor, float) and valor.is_integer():
+            nombres.append(int(valor))
+        else:
+            nombres.append(valor)
+
+    vistos = {}
+    usados = set(nombres)
+    resultado = []
+    for nombre in nombres:
+        if nombre in vistos:
+            contador = vistos[nombre]
+            nuevo = f"{nombre}.{contador + 1}"
+            while nuevo in usados:
+                contador += 1
+                nuevo = f"{nombre}.{contador + 1}"
+            vistos[nombre] = contador + 1
+            usados.add(nuevo)
+            resultado.append(nuevo)
+        else:
+            vistos[nombre] = 0
+            resultado.append(nombre)
+    return resultado
+
+
+def _enteros_si_exactos(valores):
+    """float64 -> int64 cuando no hay nulos y todos los valores son enteros"""
+    if valores.dtype.kind == 'f' and len(valores) and not np.isnan(valores).any():
+        if np.array_equal(valores, np.floor(valores)) and np.abs(valores).max() < 2**63:
+            return valores.astype(np.int64)
+    return valores
+
+
+def _vacios(valores):
+    """Celdas vacías como las ve pd.read_excel: None / NaN o un texto de nulo ('', 'NA', '#N/A'...)"""
+    return pd.isna(valores) | pd.Series(valores, dtype=object).isin(_VALORES_NULOS).to_numpy()
+
+
+def _construir_columna(valores):
+    """Convierte los valores (array de objetos) de una columna al tipo que infiere pd.read_excel"""
+    vacios = _vacios(valores)
+    if vacios.any():
+        valores[vacios] = np.nan
+
+    tipo = infer_dtype(valores, skipna=True)
+
+    if tipo == 'empty':
+        return pd.Series(np.full(len(valores), np.nan))
+
+    if tipo == 'integer' and not vacios.any():
+        return pd.Series(valores.astype(np.int64))
+
+    if tipo in _TIPOS_NUMERICOS:
+        return pd.Series(_enteros_si_exactos(valores.astype(np.float64)))
+
+    if tipo in _TIPOS_FECHA:
+        try:
+            return pd.Series(pd.to_datetime(valores))
+        except (ValueError, OverflowError):
+            pass  # Fechas fuera de rango (p. ej. 9999-12-31) se quedan como objeto
+
+    if tipo == 'boolean' and not vacios.any():
+        return pd.Series(valores.astype(bool))
+
+    # Texto o mezcla: igual que pandas, si TODO parece número se convierte
+    try:
+        numeros = pd.to_numeric(valores)
+        if numeros.dtype.kind in 'iuf':
+            return pd.Series(_enteros_si_exactos(np.asarray(numeros)))
+    except (ValueError, TypeError):
+        pass
+
+    # Mantener como objeto, pero 5.0 -> 5 como hace el lector de pandas
+    flotantes_enteros = np.fromiter(
+        (isinstance(v, float) and v.is_integer() for v in valores), dtype=bool, count=len(valores)
+    )
+    if flotantes_enteros.any():
+        valores[flotantes_enteros] = [int(v) for v in valores[flotantes_enteros]]
+    return pd.Series(valores)
+
+
+class _ColumnaEnConstruccion:
+    """Buffer de una columna mientras llegan los lotes: tipado mientras se pueda
+
+    Cada lote se clasifica una vez (infer_dtype, en C). Los lotes de solo
+    enteros quedan en int64 y los de decimales en float64, con una máscara de
+    vacíos: 8 bytes por celda en vez de una lista de objetos de Python. Los
+    demás (texto, fechas, booleanos) quedan como array de objetos. Al final,
+    si todos los lotes fueron numéricos la columna sale directo del array
+    tipado; si no, los lotes tipados vuelven a objetos y decide
+    _construir_columna, con el mismo resultado que si todo hubiera sido objeto.
+    """
+
+    def __init__(self):
+        self._lotes = []  # (valores, vacios); valores int64 / float64 o de objetos
+        self.numerica = True
+
+    def agregar(self, columna):
+        valores = np.empty(len(columna), dtype=object)
+        valores[:] = columna
+        vacios = _vacios(valores)
+        self._lotes.append((self._tipar(valores, vacios), vacios))
+
+    def _tipar(self, valores, vacios):
+        """Array int64 / float64 del lote (vacíos en 0 / NaN) o los objetos si no es numérico"""
+        llenos = valores[~vacios]
+        tipo = infer_dtype(llenos, skipna=False)
+        try:
+            if tipo == 'empty' or tipo == 'integer':
+                tipados = np.zeros(len(valores), dtype=np.int64)
+                tipados[~vacios] = llenos.astype(np.int64)
+                return tipados
+            if tipo in ('floating', 'mixed-integer-float'):
+                numeros = llenos.astype(np.float64)
+                if tipo == 'floating' or not len(numeros) or np.abs(numeros).max() < _ENTERO_EXACTO_EN_FLOAT:
+                    tipados = np.full(len(valores), np.nan)
+                    tipados[~vacios] = numeros
+                    return tipados
+        except OverflowError:
+            pass  # entero fuera de int64: queda como objeto
+        self.numerica = False
+        return valores
+
+    def vacia(self, filas):
+        """¿Las primeras filas están todas vacías?"""
+        return bool(self._mascara(filas).all())
+
+    def _mascara(self, filas):
+        if not self._lotes:
+            return np.zeros(0, dtype=bool)
+        return np.concatenate([vacios for _, vacios in self._lotes])[:filas]
+
+    def construir(self, filas):
+        """Serie con las primeras filas, del tipo que infiere pd.read_excel"""
+        vacios = self._mascara(filas)
+        if not self.numerica:
+            objetos = []
+            for valores, vacios_lote in self._lotes:
+                if valores.dtype != object:
+                    valores = valores.astype(object)  # int64 -> int, float64 -> float
+                    valores[vacios_lote] = None
+                objetos.append(valores)
+            self._lotes = []
+            return _construir_columna(np.concatenate(objetos)[:filas] if objetos else np.empty(0, dtype=object))
+
+        if vacios.all():
+            return pd.Series(np.full(filas, np.nan))
+        if all(valores.dtype == np.int64 for valores, _ in self._lotes) and not vacios.any():
+            valores = np.concatenate([valores for valores, _ in self._lotes])[:filas]
+        else:
+            valores = np.concatenate([valores.astype(np.float64) for valores, _ in self._lotes])[:filas]
+            valores[vacios] = np.nan
+            valores = _enteros_si_exactos(valores)
+        self._lotes = []
+        return pd.Series(valores)
+
+
+def _dataframe_desde_filas(filas, tamano_lote=TAMANO_LOTE):
+    """Llena buffers tipados por columna en lotes a partir de un iterador de filas"""
+    filas = iter(filas)
+    encabezado = next(filas, None)
+    if encabezado is None:
+        return pd.DataFrame()
+
+    encabezado = list(encabezado)
+    ancho = len(encabezado)
+    if ancho == 0:
+        return pd.DataFrame()
+    buffers = [_ColumnaEnConstruccion() for _ in range(ancho)]
+    filas_leidas = 0
+    filas_validas = 0  # Hasta la última fila con datos (las vacías al final se descartan)
+
+    while True:
+        lote = list(islice(filas, tamano_lote))
+        if not lote:
+            break
+        lote = [tuple(fila[:ancho]) + (None,) * (ancho - len(fila)) if len(fila) != ancho else fila
+                for fila in lote]
+        for buffer, columna in zip(buffers, zip(*lote)):
+            buffer.agregar(columna)
+        filas_leidas += len(lote)
+        for i in range(len(lote) - 1, -1, -1):
+            if any(v is not None and v != '' for v in lote[i]):
+                filas_validas = filas_leidas - len(lote) + i + 1
+                break
+
+    # Columnas finales sin encabezado ni datos (rango "usado" de Excel más ancho de lo real)
+    while ancho and (encabezado[ancho - 1] is None or encabezado[ancho - 1] == '') \
+            and buffers[ancho - 1].vacia(filas_validas):
+        ancho -= 1
+    encabezado, buffers = encabezado[:ancho], buffers[:ancho]
+
+    nombres = _nombres_columnas(encabezado)
+    datos = {}
+    for nombre, buffer in zip(nombres, buffers):
+        datos[nombre] = buffer.construir(filas_validas)
+    df = pd.DataFrame(datos)
+    df.columns = nombres
+    return df
+
+
+class LectorOpenpyxlStreaming:
+    """Iterador de solo lectura de openpyxl (sin objetos Cell) hacia buffers por columna"""
+    nombre = 'openpyxl_streaming'
+    extensiones = {'.xlsx', '.xlsm'}
+
+    @staticmethod
+    def disponible():
+        return OPENPYXL_DISPONIBLE
+
+    def leer(self, ruta):
+        libro = openpyxl.load_workbook(abrir_origen(ruta), read_only=True, data_only=True, keep_links=False)
+        try:
+            hoja = libro.worksheets[0]
+            return _dataframe_desde_filas(hoja.iter_rows(values_only=True))
+        finally:
+            libro.close()
+
+
+class LectorCalamine:
+    """Motor nativo (Rust) si python-calamine está instalado"""
+    nombre = 'calamine'
+    extensiones = {'.xlsx', '.xlsm', '.xlsb', '.xls', '.ods'}
+
+    @staticmethod
+    def disponible():
+        return CALAMINE_DISPONIBLE
+
+    def leer(self, ruta):
+        ruta = como_origen(ruta)
+        if isinstance(ruta, ArchivoEnMemoria) and hasattr(CalamineWorkbook, 'from_filelike'):
+            libro = CalamineWorkbook.from_filelike(ruta.abrir())
+            return _dataframe_desde_filas(libro.get_sheet_by_index(0).iter_rows())
+        with ruta_en_disco(ruta) as ruta_real:  # python-calamine viejo: solo lee rutas
+            libro = CalamineWorkbook.from_path(str(ruta_real))
+            return _dataframe_desde_filas(libro.get_sheet_by_index(0).iter_rows())
+
+
+class LectorPandas:
+    """pd.read_excel tal cual - respaldo para formatos que los otros motores no cubren"""
+    nombre = 'pandas'
+    extensiones = {'.xls', '.xlsx', '.xlsm', '.xlsb', '.ods'}
+
+    @staticmethod
+    def disponible():
+        return True
+
+    def leer(self, ruta):
+        return pd.read_excel(abrir_origen(ruta))
+
+
+# Orden de preferencia cuando motor='auto'
+MOTORES = {
+    LectorCalamine.nombre: LectorCalamine,
+    LectorOpenpyxlStreaming.nombre: LectorOpenpyxlStreaming,
+    LectorPandas.nombre: LectorPandas,
+}
+
+
+def seleccionar_motor(ruta, motor='auto'):
+    """Elige el motor para un archivo según su extensión y lo que esté instalado"""
+    if motor != 'auto':
+        if motor not in MOTORES:
+            raise ValueError(f"Motor desconocido: {motor}. Opciones: {list(MOTORES)}")
+        if not MOTORES[motor].disponible():
+            raise ValueError(f"Motor no disponible en este entorno: {motor}")
+        return MOTORES[motor]()
+
+    extension = Path(nombre_archivo(ruta)).suffix.lower()
+    for clase in MOTORES.values():
+        if extension in clase.extensiones and clase.disponible():
+            return clase()
+    return LectorPandas()
+
+
+def leer_excel_rapido(ruta, motor='auto'):
+    """Lee la primera hoja con el motor elegido y registra filas/segundo en df.attrs['lectura']
+
+    ruta: ruta, ArchivoEnMemoria o bytes / memoryview / BytesIO del archivo subido
+    """
+    ruta = como_origen(ruta)
+    lector = seleccionar_motor(ruta, motor)
+    inicio = time.perf_counter()
+    df = lector.leer(ruta)
+    segundos = time.perf_counter() - inicio
+
+    df.attrs['lectura'] = {
+        'archivo': nombre_archivo(ruta),
+        'motor': lector.nombre,
+        'filas': len(df),
+        'columnas': df.shape[1],
+        'segundos': round(segundos, 4),
+        'filas_por_segundo': round(len(df) / segundos) if segundos > 0 else None,
+    }
+    return df
+
+
+# ENCABEZADOS SIN PARSEAR LOS DATOS
+_NS_HOJA = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def _ruta_primera_hoja(libro_zip):
+    """Parte del .xlsx con la primera hoja (según workbook.xml y sus relaciones)"""
+    libro = ElementTree.fromstring(libro_zip.read('xl/workbook.xml'))
+    hoja = libro.find(f'{_NS_HOJA}sheets/{_NS_HOJA}sheet')
+    relaciones = ElementTree.fromstring(libro_zip.read('xl/_rels/workbook.xml.rels'))
+    for relacion in relaciones:
+        if relacion.get('Id') == hoja.get(f'{_NS_REL}id'):
+            destino = relacion.get('Target')
+            return destino.lstrip('/') if destino.startswith('/') else f"xl/{destino}"
+    return 'xl/worksheets/sheet1.xml'
+
+
+def _columna_a_indice(referencia):
+    """'AC12' -> 28"""
+    indice = 0
+    for letra in referencia:
+        if not letra.isalpha():
+            break
+        indice = indice * 26 + ord(letra.upper()) - 64
+    return indice - 1
+
+
+def _textos_compartidos(libro_zip, indices):
+    """Solo los textos compartidos pedidos; se deja de leer al llegar al mayor índice"""
+    if not indices or 'xl/sharedStrings.xml' not in libro_zip.namelist():
+        return {}
+    ultimo = max(indices)
+    textos = {}
+    with libro_zip.open('xl/sharedStrings.xml') as archivo:
+        posicion = 0
+        for _, elemento in ElementTree.iterparse(archivo):
+            if elemento.tag != f'{_NS_HOJA}si':
+                continue
+            if posicion in indices:
+                # Texto plano (<t>) o enriquecido (<r><t>); la fonética (<rPh>) no cuenta
+                partes = [t.text or '' for t in elemento.iter(f'{_NS_HOJA}t')]
+                fonetica = [t.text or '' for rph in elemento.iter(f'{_NS_HOJA}rPh')
+                            for t in rph.iter(f'{_NS_HOJA}t')]
+                textos[posicion] = ''.join(partes[:len(partes) - len(fonetica)])
+            if posicion >= ultimo:
+                break
+            posicion += 1
+            elemento.clear()
+    return textos
+
+
+def inicio_hoja_xlsx(origen):
+    """(dimensión declarada p. ej. 'A1:AC250000' o None, valores de la primera fila)
+
+    origen: ruta o archivo binario abierto (BytesIO, archivo subido a Streamlit).
+    Lee el XML de la primera hoja solo hasta cerrar la primera fila; de los
+    textos compartidos solo hasta el mayor índice que use esa fila.
+    """
+    with zipfile.ZipFile(origen) as libro_zip:
+        dimension, celdas = None, []
+        with libro_zip.open(_ruta_primera_hoja(libro_zip)) as hoja:
+            for _, elemento in ElementTree.iterparse(hoja):
+                if elemento.tag == f'{_NS_HOJA}dimension':
+                    dimension = elemento.get('ref')
+                elif elemento.tag == f'{_NS_HOJA}c':
+                    valor = elemento.find(f'{_NS_HOJA}v')
+                    if elemento.get('t') == 'inlineStr':
+                        valor = ''.join(t.text or '' for t in elemento.iter(f'{_NS_HOJA}t'))
+                    else:
+                        valor = valor.text if valor is not None else None
+                    celdas.append((elemento.get('r'), elemento.get('t'), valor))
+                elif elemento.tag == f'{_NS_HOJA}row':
+                    break
+
+        compartidos = _textos_compartidos(
+            libro_zip, {int(valor) for _, tipo, valor in celdas if tipo == 's' and valor is not None}
+        )
+
+    fila = []
+    for posicion, (referencia, tipo, valor) in enumerate(celdas):
+        indice = _columna_a_indice(referencia) if referencia else posicion
+        fila.extend([None] * (indice - len(fila)))
+        if valor is None:
+            fila.append(None)
+        elif tipo == 's':
+            fila.append(compartidos.get(int(valor)))
+        elif tipo in ('str', 'inlineStr', 'e'):
+            fila.append(valor)
+        elif tipo == 'b':
+            fila.append(valor == '1')
+        else:
+            fila.append(float(valor))
+    return dimension, fila
+
+
+class _LectorContado:
+    """Envuelve un archivo y cuenta los bytes que se le pidieron"""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.leidos = 0
+
+    def read(self, tamano=-1):
+        datos = self.archivo.read(tamano)
+        self.leidos += len(datos)
+        return datos
+
+
+def estimar_filas_xlsx(origen, dimension=None, muestra=500):
+    """Filas de datos (sin encabezado) de la primera hoja sin recorrerla entera
+
+    Con la dimensión declarada el número es exacto; si el archivo no la trae
+    (p. ej. openpyxl en modo write_only) se extrapola el tamaño medio de las
+    primeras filas al tamaño descomprimido del XML. Devuelve (filas, exacto).
+    """
+    if dimension and ':' in dimension:
+        primera, ultima = (int(''.join(c for c in ref if c.isdigit()) or 1) for ref in dimension.split(':'))
+        return max(ultima - primera, 0), True
+
+    with zipfile.ZipFile(origen) as libro_zip:
+        ruta_hoja = _ruta_primera_hoja(libro_zip)
+        tamano_total = libro_zip.getinfo(ruta_hoja).file_size
+        with libro_zip.open(ruta_hoja) as hoja:
+            contado = _LectorContado(hoja)
+            filas = 0
+            for _, elemento in ElementTree.iterparse(contado):
+                if elemento.tag == f'{_NS_HOJA}row':
+                    filas += 1
+                    elemento.clear()
+                    if filas >= muestra:
+                        break
+            else:
+                return max(filas - 1, 0), True  # la hoja entera cabía en la muestra
+    return max(round(filas * tamano_total / max(contado.leidos, 1)) - 1, 0), False
+
+
+def leer_encabezados(ruta):
+    """Nombres de columnas que tendría el DataFrame (igual que leer_excel_rapido) en milisegundos
+
+    .xlsx/.xlsm: solo el inicio del XML; .csv: la primera línea; resto de
+    formatos: pd.read_excel(nrows=0). ruta puede ser un archivo en memoria.
+    """
+    ruta = como_origen(ruta)
+    extension = Path(nombre_archivo(ruta)).suffix.lower()
+    if extension == '.csv':
+        binario = abrir_origen(ruta)
+        with (open(binario, 'rb') if isinstance(binario, (str, os.PathLike)) else binario) as archivo:
+            primera = next(csv.reader(io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')), [])
+    elif extension in LectorOpenpyxlStreaming.extensiones:
+        primera = inicio_hoja_xlsx(abrir_origen(ruta))[1]
+    else:
+        return list(pd.read_excel(abrir_origen(ruta), nrows=0).columns)
+
+    return nombres_desde_fila(primera)
+
+
+def nombres_desde_fila(primera):
+    """Fila de encabezados cruda -> nombres de columnas como los deja el lector"""
+    primera = list(primera)
+    while primera and primera[-1] in (None, ''):
+        primera.pop()
+    return _nombres_columnas(primera)
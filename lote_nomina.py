@@ -0,0 +1,231 @@
+# Lote de nómina - PASO 1 + PASO 2 PARA MUCHOS PERIODOS, SIN STREAMLIT
+"""Procesa muchos periodos (o regiones) de una vez, un periodo por proceso.
+
+    python lote_nomina.py --reportes "historico/Reporte 45 *.xlsx" \\
+                          --diagnosticos historico/diagnosticos/ \\
+                          --tiendas "0002 Dash Stores.xlsx" --salida salidas/2024
+
+Los archivos se emparejan por el periodo que llevan en el nombre (2024-01,
+202401, 2024_01...). Si hay un solo diagnóstico o un solo Excel de tiendas,
+se usa para todos los periodos. Cada periodo deja su CSV validado, su
+reporte con tiendas, un .log y sus etapas en JSON lines (.jsonl: filas, segundos y
+memoria pico de cada una) en --salida; al final se imprime un resumen JSON.
+Con --silencioso el .log solo lleva errores y advertencias. --formato parquet o arrow
+deja los dos resultados con sus tipos (el Paso 2 los lee sin pasar por CSV);
+--formato xlsx los deja listos para abrir en Excel (IDs como texto). Con
+--historial cada reporte final queda además en el historial SQLite, bajo su periodo.
+"""
+import argparse
+import contextlib
+import glob
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from cache_excel import CacheParquet
+from formatos import FORMATOS_SALIDA, con_extension, formato_de
+from historial_ausentismos import HistorialAusentismos
+from instrumentacion import InformeEjecucion, consola
+from join_diagnostico import POLITICAS_DUPLICADOS
+from part1_validation_reporte_45 import validar_ausentismos_original
+from part2_dash_store_total import agregar_tiendas_modificado
+
+EXTENSIONES_EXCEL = ('.xlsx', '.xls')
+
+# 2024-01, 2024_01, 2024 01, 202401 (mes 01-12, sin pegarse a otros dígitos)
+PATRON_PERIODO = r'(?<!\d)(20\d{2})[-_ .]?(0[1-9]|1[0-2])(?!\d)'
+
+# El diagnóstico / tiendas único vale para cualquier periodo
+TODOS = '*'
+
+
+def buscar_archivos(patrones):
+    """Directorios (sus Excel) o patrones glob -> rutas sin repetir, ordenadas"""
+    rutas = set()
+    for patron in patrones or []:
+        if os.path.isdir(patron):
+            rutas.update(str(ruta) for ruta in Path(patron).iterdir()
+                         if ruta.suffix.lower() in EXTENSIONES_EXCEL and not ruta.name.startswith('~$'))
+        else:
+            rutas.update(glob.glob(patron))
+    return sorted(rutas)
+
+
+def periodo_de(ruta, patron=PATRON_PERIODO):
+    """'Reporte 45 2024-03.xlsx' -> '2024-03' (None si el nombre no trae periodo)"""
+    coincidencia = re.search(patron, Path(ruta).stem)
+    if coincidencia is None:
+        return None
+    return '-'.join(grupo for grupo in coincidencia.groups() if grupo) or coincidencia.group(0)
+
+
+def por_periodo(rutas, patron=PATRON_PERIODO):
+    """{periodo: ruta}; un archivo único sin periodo queda bajo TODOS"""
+    if len(rutas) == 1 and periodo_de(rutas[0], patron) is None:
+        return {TODOS: rutas[0]}
+    periodos, sin_periodo = {}, []
+    for ruta in rutas:
+        periodo = periodo_de(ruta, patron)
+        if periodo is None:
+            sin_periodo.append(ruta)
+        elif periodo in periodos:
+            raise ValueError(f"Dos archivos para el periodo {periodo}: {periodos[periodo]} y {ruta}")
+        else:
+            periodos[periodo] = ruta
+    if sin_periodo:
+        print(f"⚠️ Sin periodo en el nombre (se ignoran): {sin_periodo}", file=sys.stderr)
+    return periodos
+
+
+def emparejar(reportes, diagnosticos, tiendas, patron=PATRON_PERIODO):
+    """Trabajos {periodo, reporte, diagnostico, tiendas} + periodos a los que les falta algo"""
+    reportes = por_periodo(reportes, patron)
+    diagnosticos = por_periodo(diagnosticos, patron)
+    tiendas = por_periodo(tiendas, patron)
+
+    trabajos, sin_pareja = [], []
+    for periodo, reporte in sorted(reportes.items()):
+        diagnostico = diagnosticos.get(periodo, diagnosticos.get(TODOS))
+        tienda = tiendas.get(periodo, tiendas.get(TODOS))
+        if diagnostico is None or tienda is None:
+            sin_pareja.append({
+                'periodo': periodo,
+                'reporte': reporte,
+                'falta': [nombre for nombre, ruta in [('diagnostico', diagnostico), ('tiendas', tienda)]
+                          if ruta is None],
+            })
+            continue
+        trabajos.append({'periodo': periodo, 'reporte': reporte, 'diagnostico': diagnostico, 'tiendas': tienda})
+    return trabajos, sin_pareja
+
+
+def procesar_periodo(trabajo, directorio_salida, directorio_cache=None, politica_duplicados='reciente',
+                     silencioso=False, formato='csv', ruta_historial=None):
+    """Corre en un proceso del pool: Paso 1 + Paso 2 de un periodo, con su propio log y sus etapas"""
+    salida = Path(directorio_salida)
+    periodo = trabajo['periodo'] if trabajo['periodo'] != TODOS else 'unico'
+    resultado = dict(trabajo, estado='error', log=str(salida / f"{periodo}.log"),
+                     etapas=str(salida / f"{periodo}.jsonl"))
+    cache = CacheParquet(directorio_cache) if directorio_cache else None
+    historial = HistorialAusentismos(ruta_historial) if ruta_historial else None
+    informe = InformeEjecucion(periodo)
+
+    inicio = time.perf_counter()
+    with open(resultado['log'], 'w', encoding='utf-8') as log, contextlib.redirect_stdout(log), \
+            consola(not silencioso):
+        try:
+            # Un periodo por proceso: sus dos Excel se leen en serie (sin pool anidado)
+            validado = validar_ausentismos_original(trabajo['diagnostico'], trabajo['reporte'],
+                                                    con_extension(salida / f"validation_report_45_{periodo}", formato),
+                                                    cache=cache, politica_duplicados=politica_duplicados,
+                                                    ejecutor='secuencial', informe=informe)
+            resultado['segundos_validacion'] = round(time.perf_counter() - inicio, 3)
+            if validado is None:
+                resultado['error'] = 'Paso 1 sin resultado (ver log)'
+                return resultado
+            resultado['salida_validado'] = str(validado)
+
+            inicio_tiendas = time.perf_counter()
+            final = agregar_tiendas_modificado(validado, trabajo['tiendas'],
+                                               con_extension(salida / f"reporte_tiendas_{periodo}", formato), cache=cache,
+                                               informe=informe, historial=historial,
+                                               periodo=trabajo['periodo'] if trabajo['periodo'] != TODOS else None)
+            resultado['segundos_tiendas'] = round(time.perf_counter() - inicio_tiendas, 3)
+            if final is None:
+                resultado['error'] = 'Paso 2 sin resultado (ver log)'
+                return resultado
+            resultado['salida_final'] = str(final)
+            resultado['estado'] = 'ok'
+        except Exception as e:
+            print(f"💥 {type(e).__name__}: {e}")
+            resultado['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            resultado['segundos_total'] = round(time.perf_counter() - inicio, 3)
+            resultado['memoria_pico_mb'] = informe.resumen()['memoria_pico_mb']
+            informe.exportar_jsonl(resultado['etapas'], agregar=False)
+    return resultado
+
+
+def ejecutar_lote(trabajos, directorio_salida, trabajadores=None, directorio_cache=None,
+                  politica_duplicados='reciente', silencioso=False, formato='csv', ruta_historial=None):
+    """Procesa los trabajos en un pool de procesos; devuelve los resultados en orden de periodo"""
+    formato = formato_de('', formato)  # falla antes de lanzar el pool si falta pyarrow
+    Path(directorio_salida).mkdir(parents=True, exist_ok=True)
+    trabajadores = max(1, min(len(trabajos), trabajadores or os.cpu_count() or 1))
+    resultados = []
+    with ProcessPoolExecutor(max_workers=trabajadores) as pool:
+        futuros = {pool.submit(procesar_periodo, trabajo, str(directorio_salida), directorio_cache,
+                               politica_duplicados, silencioso, formato, ruta_historial): trabajo
+                   for trabajo in trabajos}
+        for futuro in as_completed(futuros):
+            try:
+                resultado = futuro.result()
+            except Exception as e:  # el proceso murió (memoria, señal...)
+                resultado = dict(futuros[futuro], estado='error', error=f"{type(e).__name__}: {e}")
+            marca = '✅' if resultado['estado'] == 'ok' else '❌'
+            print(f"{marca} {resultado['periodo']}: {resultado.get('segundos_total', '?')}s", file=sys.stderr)
+            resultados.append(resultado)
+    return sorted(resultados, key=lambda resultado: resultado['periodo']), trabajadores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reportes', nargs='+', required=True, help='Reporte 45: directorios o patrones glob')
+    parser.add_argument('--diagnosticos', nargs='+', required=True, help='Base de diagnósticos (una o por periodo)')
+    parser.add_argument('--tiendas', nargs='+', required=True, help='0002 Dash Stores (uno o por periodo)')
+    parser.add_argument('--salida', required=True, help='Directorio de salida')
+    parser.add_argument('--trabajadores', type=int, default=None, help='Procesos (por defecto, uno por núcleo)')
+    parser.add_argument('--cache', default=None, help='Directorio de CacheParquet compartido por los procesos')
+    parser.add_argument('--politica-duplicados', default='reciente', choices=POLITICAS_DUPLICADOS)
+    parser.add_argument('--patron-periodo', default=PATRON_PERIODO,
+                        help='Regex sobre el nombre del archivo; sus grupos forman el periodo')
+    parser.add_argument('--silencioso', action='store_true',
+                        help='Sin el detalle de cada paso en el .log (las etapas siguen en el .jsonl)')
+    parser.add_argument('--formato', default='csv', choices=list(FORMATOS_SALIDA),
+                        help='Formato de los dos resultados (parquet / arrow conservan los tipos)')
+    parser.add_argument('--historial', default=None, metavar='RUTA',
+                        help='Historial SQLite donde se ingiere cada reporte final (bajo su periodo)')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        trabajos, sin_pareja = emparejar(buscar_archivos(args.reportes), buscar_archivos(args.diagnosticos),
+                                         buscar_archivos(args.tiendas), args.patron_periodo)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+    if not trabajos:
+        print("❌ No hay periodos completos para procesar", file=sys.stderr)
+        print(json.dumps({'periodos': [], 'sin_pareja': sin_pareja}, ensure_ascii=False, indent=2))
+        return 1
+
+    try:
+        formato_de('', args.formato)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    print(f"🚀 {len(trabajos)} periodos → {args.salida}", file=sys.stderr)
+    resultados, trabajadores = ejecutar_lote(trabajos, args.salida, args.trabajadores, args.cache,
+                                             args.politica_duplicados, args.silencioso, args.formato,
+                                             args.historial)
+    resumen = {
+        'periodos': resultados,
+        'sin_pareja': sin_pareja,
+        'ok': sum(resultado['estado'] == 'ok' for resultado in resultados),
+        'errores': sum(resultado['estado'] != 'ok' for resultado in resultados),
+        'trabajadores': trabajadores,
+        'segundos_total': round(time.perf_counter() - inicio, 3),
+        'segundos_suma_periodos': round(sum(resultado.get('segundos_total', 0) for resultado in resultados), 3),
+    }
+    # stdout solo lleva el JSON: se puede redirigir o pasar a jq
+    print(json.dumps(resumen, ensure_ascii=False, indent=2))
+    return 0 if resumen['errores'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# Normalización numérica - SE FORMATEA CADA VALOR DISTINTO UNA SOLA VEZ
+import pandas as pd
+
+# Textos que quedan vacíos después de normalizar
+NULOS_TEXTO = ['nan', 'None', 'NaT', '<NA>', '']
+
+
+def _formatear(texto):
+    """Coma -> punto, enteros sin '.0' y decimales como float; texto no numérico intacto
+
+    Un solo to_numeric y un solo '% 1'; los resultados se escriben sobre un buffer
+    NumPy en lugar de asignar por .loc sobre la serie.
+    """
+    texto = texto.str.replace(',', '.')
+    numeros = pd.to_numeric(texto, errors='coerce')
+    resto = numeros % 1
+    enteros = (resto == 0).to_numpy()
+    decimales = (numeros.notna() & (resto != 0)).to_numpy()
+
+    valores = texto.to_numpy(dtype=object, copy=True)
+    if enteros.any():
+        valores[enteros] = numeros[enteros].astype(int).astype(str).to_numpy(dtype=object)
+    if decimales.any():
+        valores[decimales] = numeros[decimales].astype(str).to_numpy(dtype=object)
+    return pd.Series(valores, dtype=texto.dtype).replace(NULOS_TEXTO, '')
+
+
+def normalizar_numeros(serie):
+    """Mismos textos que normalizar_numeros_vectorizado sin copias intermedias de la columna
+
+    La regla es valor a valor, así que se factoriza la columna, se formatean
+    solo los valores distintos (pocos: códigos de clase, días, centros de coste)
+    y se expande con un take de los códigos. Los nulos entran como un valor más
+    para que to_numeric infiera el mismo tipo que sobre la columna completa.
+    """
+    if serie.dtype.kind == 'i' or (serie.dtype.kind == 'u' and serie.dtype.itemsize < 8):
+        return serie.astype(str)  # enteros que caben en int64: el texto ya es el normalizado
+    if serie.dtype == object:
+        # 1 == True en la tabla hash; como texto ('1' / 'True') ya no se confunden
+        serie = serie.astype(str)
+
+    codigos, unicos = pd.factorize(serie, use_na_sentinel=False)
+    formateados = _formatear(pd.Series(unicos).astype(str))
+    return pd.Series(formateados.array.take(codigos), index=serie.index, name=serie.name)
@@ -0,0 +1,70 @@
+# Historial - BÚSQUEDA DE AUSENTISMOS POR EMPLEADO, CECO Y CLASE EN TODOS LOS PERIODOS
+import os
+import re
+import sys
+
+import streamlit as st
+
+# Los módulos del validador están en la carpeta de app.py
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from descargas import formatear_tamano, preparar_descarga
+from historial_ausentismos import LIMITE_POR_DEFECTO, HistorialAusentismos
+
+st.set_page_config(page_title="Historial de Ausentismos", page_icon="📚", layout="wide")
+
+
+# Misma base que usa app.py para guardar los reportes finales
+@st.cache_resource
+def obtener_historial():
+    return HistorialAusentismos()
+
+
+historial = obtener_historial()
+
+st.header("📚 Historial de Ausentismos")
+periodos = historial.periodos()
+if periodos.empty:
+    st.info("📭 El historial está vacío: cada reporte final del Paso 2 se agrega solo "
+            "(o con `python lote_nomina.py ... --historial almacen/historial.sqlite`)")
+    st.stop()
+
+stats = historial.estadisticas()
+ultima = (stats['ultima_ingesta'] or '').replace('T', ' ')
+st.caption(f"🗄️ {stats['filas']:,} registros · {stats['periodos']} periodos "
+           f"({periodos['periodo'].iloc[0]} → {periodos['periodo'].iloc[-1]}) · {stats['mb']} MB · "
+           f"última carga {ultima}")
+
+with st.form("busqueda"):
+    col1, col2, col3 = st.columns(3)
+    numero_de_personal = col1.text_input("👤 Número de personal")
+    centro_de_coste = col2.text_input("🏪 Centro de coste")
+    clase_absentpres = col3.text_input("🏷️ Clase absent./pres.")
+    lista_periodos = periodos['periodo'].tolist()
+    if len(lista_periodos) > 1:
+        desde, hasta = st.select_slider("🗓️ Periodos", options=lista_periodos,
+                                        value=(lista_periodos[0], lista_periodos[-1]))
+    else:
+        desde = hasta = lista_periodos[0]
+    limite = st.number_input("Máximo de filas", min_value=100, max_value=1_000_000, value=LIMITE_POR_DEFECTO,
+                             step=1_000)
+    buscar = st.form_submit_button("🔎 Buscar", type="primary", use_container_width=True)
+
+if buscar:
+    df = historial.consultar(numero_de_personal, centro_de_coste, clase_absentpres, desde, hasta, int(limite))
+    consulta = df.attrs['consulta']
+    if df.empty:
+        st.warning("🔍 Sin registros para esa búsqueda")
+    else:
+        st.success(f"✅ {len(df):,} registros en {consulta['segundos'] * 1000:.0f} ms")
+        if consulta['truncada']:
+            st.warning(f"⚠️ Se muestran las primeras {len(df):,} filas: afina la búsqueda o sube el máximo")
+        st.dataframe(df, use_container_width=True, hide_index=True)
+
+        filtro = re.sub(r'\W+', '_', numero_de_personal or centro_de_coste or clase_absentpres or 'todos')
+        archivo, nombre, mime, tamano = preparar_descarga(df, f"historial_{filtro}_{desde}_{hasta}")
+        st.download_button(f"📥 DESCARGAR ({formatear_tamano(tamano)})", data=archivo, file_name=nombre,
+                           mime=mime, use_container_width=True)
+
+with st.expander("🗓️ Periodos guardados"):
+    st.dataframe(periodos, use_container_width=True, hide_index=True)
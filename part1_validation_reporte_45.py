@@ -5,19 +5,22 @@ import os
 from pathlib import Path
 import warnings
 from datetime import datetime
-import unicodedata
 import re
+from lectores_excel import leer_excel_rapido, nombre_archivo
+from cache_excel import leer_con_cache
+from carga_paralela import EJECUTOR_POR_DEFECTO, leer_excels
+from join_diagnostico import COLUMNAS_BUSQUEDA, COLUMNAS_MODIFICADO, buscar_modificados, resolver_duplicados
+from esquemas import nombre_snake, verificar_archivo
+from formatos import con_extension, formato_de, guardar_resultado
+from instrumentacion import InformeEjecucion, consola_activa, decir
+from normalizar_numeros import normalizar_numeros
+from tipos_columnas import aplicar_categoricas, limpiar_texto, rellenar_vacios
+from validacion_incremental import EstadoIncremental, validar_incremental
 warnings.filterwarnings('ignore')
 
 def normalizar_columna(nombre):
-    """Convierte a snake_case sin acentos"""
-    nombre_sin_acentos = unicodedata.normalize('NFD', str(nombre))
-    nombre_sin_acentos = ''.join(char for char in nombre_sin_acentos if unicodedata.category(char) != 'Mn')
-    nombre_lower = nombre_sin_acentos.lower()
-    nombre_snake = re.sub(r'[^\w\s]', '', nombre_lower)
-    nombre_snake = re.sub(r'\s+', '_', nombre_snake)
-    nombre_snake = re.sub(r'_+', '_', nombre_snake).strip('_')
-    return nombre_snake
+    """Convierte a snake_case sin acentos (tabla precalculada de esquemas.py; regex solo si no está)"""
+    return nombre_snake(nombre)
 
 def normalizar_numeros_vectorizado(serie):
     """Normaliza una serie completa de números de una vez"""
@@ -25,246 +28,396 @@ def normalizar_numeros_vectorizado(serie):
         serie = serie.iloc[:, 0]
     
     nombre_col = getattr(serie, 'name', 'columna_sin_nombre')
-    print(f"      🔧 Normalizando serie: {nombre_col}")
+    decir(f"      🔧 Normalizando serie: {nombre_col}")
     
-    # Convertir todo a string primero
-    serie_str = serie.astype(str)
-    
-    # Reemplazar comas por puntos
-    serie_str = serie_str.str.replace(',', '.')
-    
-    # Convertir a numérico donde sea posible
-    serie_num = pd.to_numeric(serie_str, errors='coerce')
-    
-    # Para valores que se convirtieron exitosamente a número
-    mask_numerico = serie_num.notna()
-    
-    # Crear resultado como string
-    resultado = serie_str.copy()
-    
-    # Para valores numéricos, convertir enteros sin decimales
-    valores_enteros = (serie_num % 1 == 0) & mask_numerico
-    resultado.loc[valores_enteros] = serie_num.loc[valores_enteros].astype(int).astype(str)
-    
-    # Para valores con decimales, mantener pero sin ceros innecesarios
-    valores_decimales = (serie_num % 1 != 0) & mask_numerico
-    if valores_decimales.any():
-        resultado.loc[valores_decimales] = serie_num.loc[valores_decimales].astype(str)
-    
-    # Limpiar valores nulos
-    resultado = resultado.replace(['nan', 'None', 'NaT', '<NA>', ''], '')
-    
-    return resultado
+    # Parseo + clasificación entero/decimal + formato sobre los valores distintos
+    return normalizar_numeros(serie)
 
-def leer_excel_y_renombrar_duplicadas(ruta):
-    """Lee Excel y renombra columnas duplicadas automáticamente"""
-    print(f"📖 Leyendo: {Path(ruta).name}")
+def renombrar_duplicadas(df):
+    """Renombra columnas duplicadas (col, col_1, col_2...) e imprime el resumen de la lectura"""
+    columnas_nuevas = []
+    contador = {}
+    
+    for col in df.columns:
+        if col in contador:
+            contador[col] += 1
+            nuevo_nombre = f"{col}_{contador[col]}"
+            columnas_nuevas.append(nuevo_nombre)
+            decir(f"   🔄 Columna duplicada: '{col}' → '{nuevo_nombre}'")
+        else:
+            contador[col] = 0
+            columnas_nuevas.append(col)
+    
+    df.columns = columnas_nuevas
+    lectura = df.attrs.get('lectura', {})
+    decir(f"   ✅ {df.shape[0]:,} filas, {df.shape[1]} columnas")
+    decir(f"   ⚡ Motor: {lectura.get('motor')} | {lectura.get('segundos')}s | {lectura.get('filas_por_segundo') or 0:,} filas/s")
+    return df
+
+def leer_excel_y_renombrar_duplicadas(ruta, motor='auto', cache=None):
+    """Lee Excel y renombra columnas duplicadas automáticamente
+
+    motor: 'auto' (elige por archivo), 'calamine', 'openpyxl_streaming' o 'pandas'
+    cache: CacheParquet opcional; un archivo ya visto se carga desde Parquet
+    ruta: ruta o archivo subido en memoria (ArchivoEnMemoria, bytes, memoryview, BytesIO)
+    """
+    decir(f"📖 Leyendo: {nombre_archivo(ruta)}")
     try:
-        df = pd.read_excel(ruta)
-        
-        # Renombrar columnas duplicadas
-        columnas_nuevas = []
-        contador = {}
-        
-        for col in df.columns:
-            if col in contador:
-                contador[col] += 1
-                nuevo_nombre = f"{col}_{contador[col]}"
-                columnas_nuevas.append(nuevo_nombre)
-                print(f"   🔄 Columna duplicada: '{col}' → '{nuevo_nombre}'")
-            else:
-                contador[col] = 0
-                columnas_nuevas.append(col)
-        
-        df.columns = columnas_nuevas
-        print(f"   ✅ {df.shape[0]:,} filas, {df.shape[1]} columnas")
-        return df
+        df = leer_con_cache(ruta, lambda r: leer_excel_rapido(r, motor), cache)
+        return renombrar_duplicadas(df)
     except Exception as e:
         print(f"❌ Error: {e}")
         return None
 
-def validar_ausentismos_original(ruta_diagnostico, ruta_reporte, ruta_salida=None):
+def leer_excels_y_renombrar_duplicadas(rutas, motor='auto', cache=None, ejecutor=EJECUTOR_POR_DEFECTO):
+    """Como leer_excel_y_renombrar_duplicadas pero con varios archivos A LA VEZ
+
+    rutas: {nombre: ruta}. Devuelve ({nombre: DataFrame o None}, informe de la carga)
+    ejecutor: 'procesos' (por defecto), 'hilos' o 'secuencial'
     """
-    VALIDADOR ORIGINAL - LÓGICA CORRECTA:
-    1. REPORTE = BASE PRINCIPAL (todos los registros)
-    2. DIAGNÓSTICO = Solo para actualizar 'Modificado el' y 'Modificado por'
-    3. Resultado = Exactamente las mismas filas del REPORTE
+    for ruta in rutas.values():
+        decir(f"📖 Leyendo: {nombre_archivo(ruta)}")
+    dfs, informe = leer_excels(rutas, motor, cache, ejecutor)
+    
+    for nombre, df in dfs.items():
+        if df is not None:
+            decir(f"   📄 {nombre_archivo(rutas[nombre])}:")
+            renombrar_duplicadas(df)
+    decir(f"   ⏱️ Carga total: {informe['segundos_total']}s ({informe['ejecutor']}, {informe['trabajadores']} trabajadores)")
+    return dfs, informe
+
+def validar_ausentismos_df(df_diagnostico, df_reporte, politica_duplicados='reciente', categoricas=True,
+                           informe=None):
     """
-    print("🔍 VALIDADOR DE AUSENTISMOS - LÓGICA ORIGINAL")
-    print("="*60)
-    
-    # Verificar archivos
-    if not os.path.exists(ruta_diagnostico):
-        print(f"❌ No existe: {ruta_diagnostico}")
-        return None
-    if not os.path.exists(ruta_reporte):
-        print(f"❌ No existe: {ruta_reporte}")
-        return None
-    
-    # Leer archivos
-    print("\n📂 LEYENDO ARCHIVOS:")
-    df_diagnostico = leer_excel_y_renombrar_duplicadas(ruta_diagnostico)
-    df_reporte = leer_excel_y_renombrar_duplicadas(ruta_reporte)
-    
-    if df_diagnostico is None or df_reporte is None:
-        return None
-    
-    print(f"\n📊 NÚMEROS INICIALES:")
-    print(f"   🎯 REPORTE (BASE PRINCIPAL): {len(df_reporte):,} filas")
-    print(f"   📋 DIAGNÓSTICO (solo para modificado): {len(df_diagnostico):,} filas")
+    Lógica del Paso 1 sobre DataFrames ya cargados (sin tocar disco).
+    Devuelve el DataFrame validado en snake_case (todo texto) o None si falla
+    la integridad; las estadísticas quedan en df.attrs['validacion'].
+    categoricas: guardar las columnas de poca cardinalidad como 'category'
+    (ver tipos_columnas); el CSV escrito es el mismo.
+    informe: InformeEjecucion donde se agregan las etapas (join, renombrado,
+    normalizacion, limpieza); también quedan en df.attrs['etapas'].
+    """
+    informe = informe if informe is not None else InformeEjecucion('paso1')
+    decir(f"\n📊 NÚMEROS INICIALES:")
+    decir(f"   🎯 REPORTE (BASE PRINCIPAL): {len(df_reporte):,} filas")
+    decir(f"   📋 DIAGNÓSTICO (solo para modificado): {len(df_diagnostico):,} filas")
     
     # COLUMNAS CLAVE PARA BUSCAR COINCIDENCIAS
-    columnas_busqueda = [
-        'Número de personal',
-        'Número ID', 
-        'Clase absent./pres.',
-        'Inicio de validez',
-        'Fin de validez'
-    ]
+    columnas_busqueda = COLUMNAS_BUSQUEDA
+    
+    with informe.etapa('join', filas=len(df_reporte)) as etapa:
+        decir(f"\n🔍 BUSCANDO COINCIDENCIAS...")
+        decir(f"   Columnas de búsqueda: {columnas_busqueda}")
     
-    print(f"\n🔍 BUSCANDO COINCIDENCIAS...")
-    print(f"   Columnas de búsqueda: {columnas_busqueda}")
+        # CREAR COPIA DEL REPORTE (será nuestro resultado final)
+        df_resultado = df_reporte.copy()
     
-    # CREAR COPIA DEL REPORTE (será nuestro resultado final)
-    df_resultado = df_reporte.copy()
+        # UNA FILA POR CLAVE EN EL DIAGNÓSTICO (evita que el join multiplique filas)
+        df_diagnostico, conflictos = resolver_duplicados(df_diagnostico, columnas_busqueda, politica_duplicados)
+        if conflictos:
+            decir(f"   🔁 Claves repetidas resueltas ({politica_duplicados}): {conflictos:,} filas descartadas")
     
-    # LEFT JOIN: Reporte como principal, diagnóstico para completar
-    df_con_diagnostico = pd.merge(
-        df_reporte, 
-        df_diagnostico[columnas_busqueda + ['Modificado el', 'Modificado por']], 
-        on=columnas_busqueda, 
-        how='left', 
-        suffixes=('', '_diagnostico')
-    )
+        # LEFT JOIN por clave empaquetada: solo se traen las 2 columnas de modificado
+        # (el diagnóstico ya no repite claves: las descartadas son los conflictos de arriba)
+        df_con_diagnostico, _ = buscar_modificados(
+            df_reporte, 
+            df_diagnostico, 
+            columnas_busqueda, 
+            COLUMNAS_MODIFICADO
+        )
     
-    print(f"   ✅ Merge completado: {len(df_con_diagnostico):,} filas (igual que reporte)")
+        decir(f"   ✅ Búsqueda completada: {len(df_con_diagnostico):,} filas (igual que reporte)")
     
-    # ACTUALIZAR SOLO LAS COLUMNAS DE MODIFICADO
-    print(f"\n🔄 ACTUALIZANDO COLUMNAS DE MODIFICADO...")
+        # ACTUALIZAR SOLO LAS COLUMNAS DE MODIFICADO
+        decir(f"\n🔄 ACTUALIZANDO COLUMNAS DE MODIFICADO...")
     
-    # Contar coincidencias
-    tiene_diagnostico = df_con_diagnostico['Modificado el_diagnostico'].notna()
-    coincidencias = tiene_diagnostico.sum()
+        # Contar coincidencias
+        tiene_diagnostico = df_con_diagnostico['Modificado el_diagnostico'].notna()
+        coincidencias = tiene_diagnostico.sum()
     
-    print(f"   📊 Coincidencias encontradas: {coincidencias:,} de {len(df_reporte):,}")
-    print(f"   📊 Porcentaje de actualización: {(coincidencias/len(df_reporte)*100):.1f}%")
+        decir(f"   📊 Coincidencias encontradas: {coincidencias:,} de {len(df_reporte):,}")
+        decir(f"   📊 Porcentaje de actualización: {(coincidencias/len(df_reporte)*100):.1f}%")
     
-    # Actualizar donde hay coincidencia
-    mask_actualizar = df_con_diagnostico['Modificado el_diagnostico'].notna()
+        # Actualizar donde hay coincidencia
+        mask_actualizar = df_con_diagnostico['Modificado el_diagnostico'].notna()
     
-    if mask_actualizar.any():
-        df_resultado.loc[mask_actualizar, 'Modificado el'] = df_con_diagnostico.loc[mask_actualizar, 'Modificado el_diagnostico']
-        print(f"   ✅ Actualizada 'Modificado el': {mask_actualizar.sum():,} registros")
+        if mask_actualizar.any():
+            df_resultado.loc[mask_actualizar, 'Modificado el'] = df_con_diagnostico.loc[mask_actualizar, 'Modificado el_diagnostico']
+            decir(f"   ✅ Actualizada 'Modificado el': {mask_actualizar.sum():,} registros")
     
-    mask_actualizar_por = df_con_diagnostico['Modificado por_diagnostico'].notna()
-    if mask_actualizar_por.any():
-        df_resultado.loc[mask_actualizar_por, 'Modificado por'] = df_con_diagnostico.loc[mask_actualizar_por, 'Modificado por_diagnostico']
-        print(f"   ✅ Actualizada 'Modificado por': {mask_actualizar_por.sum():,} registros")
+        mask_actualizar_por = df_con_diagnostico['Modificado por_diagnostico'].notna()
+        if mask_actualizar_por.any():
+            df_resultado.loc[mask_actualizar_por, 'Modificado por'] = df_con_diagnostico.loc[mask_actualizar_por, 'Modificado por_diagnostico']
+            decir(f"   ✅ Actualizada 'Modificado por': {mask_actualizar_por.sum():,} registros")
+        etapa['coincidencias'] = int(coincidencias)
     
     # VERIFICAR QUE EL RESULTADO TIENE EL MISMO NÚMERO DE FILAS
-    print(f"\n✅ VERIFICACIÓN DE INTEGRIDAD:")
-    print(f"   Filas originales del REPORTE: {len(df_reporte):,}")
-    print(f"   Filas en resultado final: {len(df_resultado):,}")
+    decir(f"\n✅ VERIFICACIÓN DE INTEGRIDAD:")
+    decir(f"   Filas originales del REPORTE: {len(df_reporte):,}")
+    decir(f"   Filas en resultado final: {len(df_resultado):,}")
     
     if len(df_resultado) == len(df_reporte):
-        print(f"   🎉 ¡PERFECTO! No se perdieron ni duplicaron registros")
+        decir(f"   🎉 ¡PERFECTO! No se perdieron ni duplicaron registros")
     else:
         print(f"   ❌ ERROR: El número de filas cambió")
         return None
     
     # CONVERTIR A SNAKE_CASE
-    print(f"\n🐍 CONVIRTIENDO A SNAKE_CASE...")
+    with informe.etapa('renombrado', filas=len(df_resultado)) as etapa:
+        decir(f"\n🐍 CONVIRTIENDO A SNAKE_CASE...")
     
-    mapeo_columnas = {}
-    for col in df_resultado.columns:
-        col_snake = normalizar_columna(col)
-        mapeo_columnas[col] = col_snake
+        mapeo_columnas = {}
+        for col in df_resultado.columns:
+            col_snake = normalizar_columna(col)
+            mapeo_columnas[col] = col_snake
     
-    df_resultado = df_resultado.rename(columns=mapeo_columnas)
-    print(f"   ✅ {len(mapeo_columnas)} columnas convertidas")
+        df_resultado = df_resultado.rename(columns=mapeo_columnas)
+        decir(f"   ✅ {len(mapeo_columnas)} columnas convertidas")
+        etapa['columnas'] = len(mapeo_columnas)
     
     # NORMALIZAR FORMATOS NUMÉRICOS
-    print(f"\n🧹 NORMALIZANDO FORMATOS NUMÉRICOS...")
+    with informe.etapa('normalizacion', filas=len(df_resultado)) as etapa:
+        decir(f"\n🧹 NORMALIZANDO FORMATOS NUMÉRICOS...")
+    
+        columnas_numericas = [
+            'numero_de_personal', 'numero_id', 'clase_absentpres', 
+            'dias_presencabs', 'dias_naturales', 'centro_de_coste'
+        ]
+    
+        # Solo la columna base o su duplicada con sufijo numérico (clase_absentpres1), no
+        # cualquier columna cuyo nombre la contenga
+        patron_numericas = re.compile(rf"^(?:{'|'.join(columnas_numericas)})\d*$")
+        todas_columnas_numericas = [col for col in df_resultado.columns if patron_numericas.match(col)]
+    
+        for col in todas_columnas_numericas:
+            if col in df_resultado.columns:
+                decir(f"   🔧 Normalizando: {col}")
+                df_resultado[col] = normalizar_numeros_vectorizado(df_resultado[col])
+    
+        # NORMALIZACIÓN ESPECÍFICA PARA QUITAR CEROS INICIALES DE clase_absentpres1
+        if 'clase_absentpres1' in df_resultado.columns:
+            decir(f"   🎯 Normalizando específicamente: clase_absentpres1 (quitando ceros iniciales)")
+            df_resultado['clase_absentpres1'] = df_resultado['clase_absentpres1'].astype(str).str.lstrip('0')
+            # Si queda vacío después de quitar ceros, poner '0'
+            df_resultado['clase_absentpres1'] = df_resultado['clase_absentpres1'].replace('', '0')
+    
+            # Mostrar muestra del resultado
+            if consola_activa():
+                muestra = df_resultado['clase_absentpres1'].head(3).tolist()
+                print(f"      ✅ Muestra resultado: {muestra}")
+    
+        # COLUMNAS DE POCA CARDINALIDAD -> CATEGÓRICAS (se expanden solo al escribir)
+        if categoricas:
+            convertidas = aplicar_categoricas(df_resultado)
+            decir(f"\n🗂️ Columnas categóricas: {len(convertidas)} → {convertidas}")
+        etapa['columnas'] = len(todas_columnas_numericas)
     
-    columnas_numericas = [
-        'numero_de_personal', 'numero_id', 'clase_absentpres', 
-        'dias_presencabs', 'dias_naturales', 'centro_de_coste'
-    ]
-    
-    # Agregar columnas que pueden tener números con sufijos
-    columnas_numericas_adicionales = [col for col in df_resultado.columns if any(base in col for base in ['clase_absentpres', 'numero_de_personal', 'numero_id', 'centro_de_coste', 'dias_presencabs', 'dias_naturales'])]
-    
-    todas_columnas_numericas = list(set(columnas_numericas + columnas_numericas_adicionales))
-    
-    for col in todas_columnas_numericas:
-        if col in df_resultado.columns:
-            print(f"   🔧 Normalizando: {col}")
-            df_resultado[col] = normalizar_numeros_vectorizado(df_resultado[col])
+    # LIMPIAR VALORES FINALES
+    with informe.etapa('limpieza', filas=len(df_resultado)):
+        decir(f"\n🧹 LIMPIANDO VALORES FINALES...")
+        df_resultado = rellenar_vacios(df_resultado)
+    
+        # Limpiar valores no deseados (en categóricas solo se recorren las categorías)
+        for col in df_resultado.columns:
+            df_resultado[col] = limpiar_texto(df_resultado[col], ['nan', 'None', 'NaT', '<NA>', '0.0'])
+    
+    df_resultado.attrs['validacion'] = {
+        'registros': len(df_reporte),
+        'coincidencias': int(coincidencias),
+        'conflictos_diagnostico': conflictos,
+    }
+    df_resultado.attrs['etapas'] = list(informe.etapas)
+    return df_resultado
+
+
+def diagnostico_del_almacen(almacen, df_diagnostico, df_reporte, informe, huella=None, archivo=''):
+    """Ingiere la base recién leída (si hay) y devuelve del almacén solo las claves del reporte"""
+    with informe.etapa('almacen', filas=len(df_reporte)) as etapa:
+        decir("\n🗄️ ALMACÉN DE DIAGNÓSTICOS:")
+        if df_diagnostico is not None:
+            ingesta = almacen.ingerir(df_diagnostico, huella, archivo)
+            etapa['nuevas'], etapa['actualizadas'] = ingesta['nuevas'], ingesta['actualizadas']
+        df_diagnostico = almacen.diagnostico_para(df_reporte)
+        etapa['coincidencias'] = len(df_diagnostico)
+    return df_diagnostico
+
+
+def validar_ausentismos_original(ruta_diagnostico, ruta_reporte, ruta_salida=None, cache=None,
+                                 politica_duplicados='reciente', categoricas=True,
+                                 ejecutor=EJECUTOR_POR_DEFECTO, incremental=None, verificar_incremental=False,
+                                 informe=None, formato=None, almacen=None):
+    """
+    VALIDADOR ORIGINAL - LÓGICA CORRECTA:
+    1. REPORTE = BASE PRINCIPAL (todos los registros)
+    2. DIAGNÓSTICO = Solo para actualizar 'Modificado el' y 'Modificado por'
+    3. Resultado = Exactamente las mismas filas del REPORTE
     
-    # NORMALIZACIÓN ESPECÍFICA PARA QUITAR CEROS INICIALES DE clase_absentpres1
-    if 'clase_absentpres1' in df_resultado.columns:
-        print(f"   🎯 Normalizando específicamente: clase_absentpres1 (quitando ceros iniciales)")
-        df_resultado['clase_absentpres1'] = df_resultado['clase_absentpres1'].astype(str).str.lstrip('0')
-        # Si queda vacío después de quitar ceros, poner '0'
-        df_resultado['clase_absentpres1'] = df_resultado['clase_absentpres1'].replace('', '0')
-        
-        # Mostrar muestra del resultado
-        muestra = df_resultado['clase_absentpres1'].head(3).tolist()
-        print(f"      ✅ Muestra resultado: {muestra}")
+    politica_duplicados: qué fila del DIAGNÓSTICO usar si repite clave
+    ('reciente' = mayor 'Modificado el', 'primero' o 'ultimo')
+    ejecutor: cómo se leen los dos Excel a la vez ('procesos', 'hilos' o 'secuencial')
+    incremental: directorio con las huellas de la corrida anterior; solo se
+    reprocesan las filas nuevas o cambiadas (verificar_incremental compara
+    contra una corrida completa)
+    informe: InformeEjecucion que recibe las etapas (verificación, lectura,
+    join... escritura) con filas, segundos y memoria pico
+    formato: 'csv' (utf-8-sig), 'parquet' o 'arrow' (Arrow IPC, con los tipos
+    adentro) o 'xlsx' (IDs como texto y fechas como fechas, para abrir en
+    Excel); por defecto el de la extensión de ruta_salida o CSV
+    ruta_diagnostico / ruta_reporte también pueden ser los archivos subidos en
+    memoria (ArchivoEnMemoria, bytes, memoryview): se leen sin copia a disco
+    almacen: AlmacenDiagnostico; la base subida (si es nueva) se ingiere y el
+    join usa solo las claves del reporte guardadas en el almacén. Con almacén,
+    ruta_diagnostico puede ser None (solo se consulta)
+    """
+    informe = informe if informe is not None else InformeEjecucion('paso1')
+    formato = formato_de(ruta_salida or '', formato)
+    decir("🔍 VALIDADOR DE AUSENTISMOS - LÓGICA ORIGINAL")
+    decir("="*60)
+    
+    # Verificar archivos (los que están en memoria no tienen ruta que revisar)
+    if ruta_diagnostico is None and almacen is None:
+        print("❌ Falta la base de diagnósticos (o un almacén de diagnósticos)")
+        return None
+    for ruta in (ruta_diagnostico, ruta_reporte):
+        if isinstance(ruta, (str, Path)) and not os.path.exists(ruta):
+            print(f"❌ No existe: {ruta}")
+            return None
+    
+    # Una base ya ingerida en el almacén (mismo contenido) ni se verifica ni se lee
+    origenes = {'diagnostico': ruta_diagnostico, 'reporte_45': ruta_reporte}
+    huella_diagnostico = None
+    if almacen is not None and ruta_diagnostico is not None:
+        origenes['diagnostico'], huella_diagnostico = almacen.pendiente(ruta_diagnostico)
+    origenes = {nombre: origen for nombre, origen in origenes.items() if origen is not None}
+    
+    # Verificar layout con SOLO los encabezados (antes del parseo completo)
+    with informe.etapa('verificacion'):
+        decir("\n🧾 VERIFICANDO LAYOUT:")
+        layouts_validos = all(verificar_archivo(origen, nombre)['valido'] for nombre, origen in origenes.items())
+    if not layouts_validos:
+        return None
     
-    # LIMPIAR VALORES FINALES
-    print(f"\n🧹 LIMPIANDO VALORES FINALES...")
-    df_resultado = df_resultado.fillna('')
+    # Leer archivos (los dos parseos son independientes: van en paralelo)
+    with informe.etapa('lectura') as etapa:
+        decir("\n📂 LEYENDO ARCHIVOS:")
+        dfs, informe_carga = leer_excels_y_renombrar_duplicadas(origenes, cache=cache, ejecutor=ejecutor)
+        etapa['filas'] = sum(len(df) for df in dfs.values() if df is not None)
+        etapa['ejecutor'] = informe_carga['ejecutor']
+    df_diagnostico, df_reporte = dfs.get('diagnostico'), dfs['reporte_45']
     
-    # Limpiar valores no deseados
-    for col in df_resultado.columns:
-        df_resultado[col] = df_resultado[col].astype(str).replace(['nan', 'None', 'NaT', '<NA>', '0.0'], '')
+    if df_reporte is None or (df_diagnostico is None and 'diagnostico' in origenes):
+        return None
+    if almacen is not None:
+        archivo = nombre_archivo(ruta_diagnostico) if ruta_diagnostico is not None else ''
+        df_diagnostico = diagnostico_del_almacen(almacen, df_diagnostico, df_reporte, informe, huella_diagnostico,
+                                                 archivo)
+    
+    estado_incremental = EstadoIncremental(incremental) if incremental else None
+    if estado_incremental is not None:
+        # Las etapas internas corren solo sobre las filas cambiadas: se mide el conjunto
+        with informe.etapa('validacion_incremental', filas=len(df_reporte)):
+            df_resultado = validar_incremental(df_diagnostico, df_reporte, estado_incremental,
+                                               validar_ausentismos_df, politica_duplicados, categoricas,
+                                               verificar_incremental)
+    else:
+        df_resultado = validar_ausentismos_df(df_diagnostico, df_reporte, politica_duplicados, categoricas,
+                                              informe)
+    if df_resultado is None:
+        return None
+    df_resultado.attrs['carga'] = informe_carga
     
     # DETERMINAR RUTA DE SALIDA
     if ruta_salida is None:
-        carpeta_salida = Path(ruta_reporte).parent.parent / "salidas"
+        en_disco = isinstance(ruta_reporte, (str, Path))
+        carpeta_salida = Path(ruta_reporte).parent.parent / "salidas" if en_disco else Path("salidas")
         carpeta_salida.mkdir(exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        ruta_salida = carpeta_salida / f"validation_report_45_{timestamp}.csv"
+        ruta_salida = con_extension(carpeta_salida / f"validation_report_45_{timestamp}", formato)
     
     # GUARDAR ARCHIVO
-    print(f"\n💾 GUARDANDO: {Path(ruta_salida).name}")
-    df_resultado.to_csv(ruta_salida, index=False, encoding='utf-8-sig')
+    with informe.etapa('escritura', filas=len(df_resultado)):
+        if estado_incremental is not None and formato == 'csv':
+            decir(f"\n💾 GUARDANDO: {Path(ruta_salida).name}")
+            estado_incremental.escribir_csv(ruta_salida)  # líneas ya formateadas: no se reescribe fila a fila
+        else:
+            guardar_resultado(df_resultado, ruta_salida, formato)
+    df_resultado.attrs['etapas'] = list(informe.etapas)
     
     # RESUMEN FINAL
-    print(f"\n🎉 ¡VALIDACIÓN COMPLETADA!")
-    print(f"📁 Archivo: {ruta_salida}")
-    print(f"📊 Registros: {len(df_resultado):,} (igual que REPORTE original)")
-    print(f"📋 Columnas: {len(df_resultado.columns)}")
+    imprimir_resumen_validacion(df_resultado)
+    decir(f"📁 Archivo: {ruta_salida}")
+    
+    return ruta_salida
+
+
+def imprimir_resumen_validacion(df_resultado):
+    """Resumen en consola del Paso 1 a partir de df.attrs['validacion'] (nada con la consola apagada)"""
+    if not consola_activa():
+        return
+    stats = df_resultado.attrs.get('validacion', {})
+    registros = stats.get('registros', len(df_resultado))
+    coincidencias = stats.get('coincidencias', 0)
+    
+    decir(f"\n🎉 ¡VALIDACIÓN COMPLETADA!")
+    decir(f"📊 Registros: {len(df_resultado):,} (igual que REPORTE original)")
+    decir(f"📋 Columnas: {len(df_resultado.columns)}")
     
     # Mostrar estadísticas de actualización
-    print(f"\n📈 ESTADÍSTICAS DE ACTUALIZACIÓN:")
-    print(f"   🎯 Registros del REPORTE: {len(df_reporte):,} (100%)")
-    print(f"   ✅ Actualizados con DIAGNÓSTICO: {coincidencias:,} ({(coincidencias/len(df_reporte)*100):.1f}%)")
-    print(f"   📋 Sin actualizar: {len(df_reporte)-coincidencias:,} ({((len(df_reporte)-coincidencias)/len(df_reporte)*100):.1f}%)")
+    if registros:
+        decir(f"\n📈 ESTADÍSTICAS DE ACTUALIZACIÓN:")
+        decir(f"   🎯 Registros del REPORTE: {registros:,} (100%)")
+        decir(f"   ✅ Actualizados con DIAGNÓSTICO: {coincidencias:,} ({(coincidencias/registros*100):.1f}%)")
+        decir(f"   📋 Sin actualizar: {registros-coincidencias:,} ({((registros-coincidencias)/registros*100):.1f}%)")
+    
+    incremental = df_resultado.attrs.get('incremental')
+    if incremental:
+        decir(f"\n🧬 INCREMENTAL: {incremental['filas_reprocesadas']:,} filas reprocesadas, "
+              f"{incremental.get('filas_reutilizadas', 0):,} reutilizadas ({incremental.get('segundos')}s)")
+        if 'identico' in incremental:
+            decir(f"   🔬 Igual a la corrida completa: {incremental['identico']}")
+    
+    # Tiempo de cada carga (en paralelo, el total debería parecerse al del archivo más lento)
+    carga = df_resultado.attrs.get('carga')
+    if carga:
+        decir(f"\n⏱️ CARGA DE ARCHIVOS ({carga['ejecutor']}, {carga['trabajadores']} trabajadores):")
+        for nombre, lectura in carga['lecturas'].items():
+            if lectura:
+                decir(f"   {nombre}: {lectura['segundos']}s ({lectura['motor']}, {lectura['filas']:,} filas)")
+        decir(f"   Total de pared: {carga['segundos_total']}s")
+    
+    imprimir_etapas(df_resultado.attrs.get('etapas'))
     
     # Mostrar ejemplo de datos procesados
     if len(df_resultado) > 0:
-        print(f"\n🔍 EJEMPLO DE DATOS PROCESADOS:")
-        print("   (Primeras 3 filas con columnas clave)")
+        decir(f"\n🔍 EJEMPLO DE DATOS PROCESADOS:")
+        decir("   (Primeras 3 filas con columnas clave)")
         cols_ejemplo = ['numero_de_personal', 'clase_absentpres', 'modificado_el', 'modificado_por']
         cols_disponibles = [col for col in cols_ejemplo if col in df_resultado.columns]
         
         if cols_disponibles:
             muestra = df_resultado[cols_disponibles].head(3)
             for i, (_, row) in enumerate(muestra.iterrows()):
-                print(f"   Fila {i+1}: ", end="")
+                decir(f"   Fila {i+1}: ", end="")
                 for col in cols_disponibles:
                     valor = str(row[col])[:20]  # Limitar longitud
-                    print(f"{col}={valor} ", end="")
-                print()
-    
-    print(f"\n🏆 LÓGICA APLICADA:")
-    print(f"   ✅ REPORTE = Base principal (todas las filas)")
-    print(f"   ✅ DIAGNÓSTICO = Solo para actualizar 'Modificado el' y 'Modificado por'")
-    print(f"   ✅ Resultado = Exactamente {len(df_resultado):,} filas (igual que REPORTE)")
+                    decir(f"{col}={valor} ", end="")
+                decir()
     
-    return ruta_salida
+    decir(f"\n🏆 LÓGICA APLICADA:")
+    decir(f"   ✅ REPORTE = Base principal (todas las filas)")
+    decir(f"   ✅ DIAGNÓSTICO = Solo para actualizar 'Modificado el' y 'Modificado por'")
+    decir(f"   ✅ Resultado = Exactamente {len(df_resultado):,} filas (igual que REPORTE)")
+
+
+def imprimir_etapas(etapas):
+    """Tabla de etapas (InformeEjecucion.etapas o df.attrs['etapas']) en consola"""
+    if not etapas or not consola_activa():
+        return
+    decir(f"\n⏱️ ETAPAS:")
+    for etapa in etapas:
+        filas = f"{etapa['filas']:,} filas" if etapa.get('filas') is not None else ""
+        memoria = f"{etapa['memoria_pico_mb']} MB" if etapa.get('memoria_pico_mb') is not None else ""
+        decir(f"   {'  ' * etapa['nivel']}{etapa['etapa']:<22} {etapa['segundos']:>8.3f}s {filas:>16} {memoria:>10}")
 
 
 # Ejemplo de uso
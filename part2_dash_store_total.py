@@ -1,34 +1,93 @@
 #tiendas_modificado
 import pandas as pd
+from esquemas import verificar_archivo
+from excel_salida import leer_xlsx_resultado
+from formatos import FORMATOS_COLUMNARES, formato_de, guardar_resultado, leer_columnar
+from lectores_excel import abrir_origen, nombre_archivo
+from instrumentacion import InformeEjecucion, consola_activa, decir
+from join_tiendas import TablaTiendas, parsear_ceco
+from part1_validation_reporte_45 import imprimir_etapas, leer_excel_y_renombrar_duplicadas
+from tipos_columnas import COLUMNAS_CATEGORICAS, aplicar_categoricas, asignar_valores, rellenar_vacios
 
-def agregar_tiendas_modificado(ruta_csv, ruta_excel, ruta_salida):
-    """Agrega tiendas SIN JODER los datos originales - VERSIÓN MODIFICADA"""
-    print("🔥 MERGE DIRECTO - SIN JODER (MODIFICADO)")
-    
-    # Leer CSV SIN CAMBIAR TIPOS - FORZAR STRING EN COLUMNAS NUMÉRICAS
-    df_csv = pd.read_csv(ruta_csv, encoding='utf-8-sig', 
-                        dtype={'numero_de_personal': str, 
-                               'numero_id': str,
-                               'centro_de_coste': str,
-                               'clase_absentpres': str,
-                               'dias_presencabs': str,
-                               'dias_naturales': str})
-    print(f"📖 CSV: {len(df_csv)} registros")
+def leer_csv_validado(ruta_csv, categoricas=True):
+    """Lee el CSV del Paso 1 SIN CAMBIAR TIPOS - FORZAR STRING EN COLUMNAS NUMÉRICAS
+    
+    categoricas: las columnas de poca cardinalidad se leen directo como 'category'
+    """
+    tipos = {'numero_de_personal': str, 
+             'numero_id': str,
+             'centro_de_coste': str,
+             'clase_absentpres': str,
+             'dias_presencabs': str,
+             'dias_naturales': str}
+    if categoricas:
+        tipos.update({col: 'category' for col in COLUMNAS_CATEGORICAS})
+    df_csv = pd.read_csv(ruta_csv, encoding='utf-8-sig', dtype=tipos)
+    decir(f"📖 CSV: {len(df_csv)} registros")
     
     # MOSTRAR TIPOS DE DATOS DEL CSV
-    print(f"📊 TIPOS CSV:")
-    cols_importantes = ['numero_de_personal', 'numero_id', 'centro_de_coste', 'clase_absentpres']
-    for col in cols_importantes:
-        if col in df_csv.columns:
-            print(f"   {col}: {df_csv[col].dtype} | Muestra: {df_csv[col].head(3).tolist()}")
+    if consola_activa():
+        print(f"📊 TIPOS CSV:")
+        cols_importantes = ['numero_de_personal', 'numero_id', 'centro_de_coste', 'clase_absentpres']
+        for col in cols_importantes:
+            if col in df_csv.columns:
+                print(f"   {col}: {df_csv[col].dtype} | Muestra: {df_csv[col].head(3).tolist()}")
+    return df_csv
+
+def leer_validado(origen, categoricas=True, formato=None):
+    """Resultado del Paso 1 en CSV, Parquet, Arrow IPC o xlsx (formato por extensión si no se indica)
+    
+    Parquet / Arrow traen el esquema: IDs como texto y categóricas tal como
+    salieron del Paso 1, sin mapa de dtypes ni parseo de CSV. El xlsx vuelve
+    con todo como texto (fechas 'AAAA-MM-DD'), como si fuera el CSV.
+    origen: ruta o archivo subido en memoria (ArchivoEnMemoria con su nombre, bytes, BytesIO)
+    """
+    formato = formato_de(origen, formato)
+    origen = abrir_origen(origen)
+    if formato == 'csv':
+        return leer_csv_validado(origen, categoricas)
+    df = leer_columnar(origen, formato) if formato in FORMATOS_COLUMNARES else leer_xlsx_resultado(origen)
+    if categoricas:
+        aplicar_categoricas(df)
+    else:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(df[col].cat.categories.dtype)
+    decir(f"📖 {formato.upper()}: {len(df)} registros")
+    return df
+
+def limpiar_value_tienda(serie):
+    """Limpieza ÚNICA de value_tienda con operaciones de texto vectorizadas (sin apply)
+    
+    Mismo resultado que quitar el último 0, luego '.0', el punto final y otra vez
+    el último 0 (lo que antes se repartía entre este módulo y app.py).
+    """
+    # Mismo texto que str(valor) del apply: los nulos ('nan', 'None', ...) se formatean aparte
+    if serie.dtype.kind in 'iuf' or isinstance(serie.dtype, pd.StringDtype):
+        texto = serie.astype(str)
+        nulos = texto.isna()
+        if nulos.any():
+            texto[nulos] = [str(valor) for valor in serie[nulos]]
+    else:
+        texto = pd.Series(serie.to_numpy(dtype=object).astype(str), index=serie.index, name=serie.name)
     
-    # Leer Excel
-    df_excel = pd.read_excel(ruta_excel)
-    print(f"📖 Excel: {len(df_excel)} tiendas")
+    def sin_ultimo_cero(valores):
+        termina_en_cero = valores.str.endswith('0') & (valores.str.len() > 1)
+        return valores.where(~termina_en_cero, valores.str[:-1])
+    
+    texto = sin_ultimo_cero(texto)
+    texto = texto.str.replace('.0', '', regex=False).str.rstrip('.')
+    return sin_ultimo_cero(texto)
+
+def preparar_tiendas(df_excel, categoricas=True):
+    """Excel de tiendas ya cargado -> TablaTiendas (CECO -> value_tienda, nombre_tienda).
+    Es lo único del Paso 2 que depende solo del maestro: se puede cachear entre corridas."""
+    decir(f"📖 Excel: {len(df_excel)} tiendas")
     
     # MOSTRAR TIPOS DE DATOS DEL EXCEL
-    print(f"📊 TIPOS EXCEL:")
-    print(f"   myCECO: {df_excel['myCECO'].dtype} | Muestra: {df_excel['myCECO'].head(3).tolist()}")
+    if consola_activa():
+        print(f"📊 TIPOS EXCEL:")
+        print(f"   myCECO: {df_excel['myCECO'].dtype} | Muestra: {df_excel['myCECO'].head(3).tolist()}")
     
     # COLUMNAS MODIFICADAS - SOLO LAS QUE NECESITAMOS
     columnas_utiles = ['myCECO']
@@ -45,7 +104,7 @@ def agregar_tiendas_modificado(ruta_csv, ruta_excel, ruta_salida):
         if col_excel in df_excel.columns:
             columnas_utiles.append(col_excel)
             mapeo[col_excel] = col_salida
-            print(f"✅ {col_excel} → {col_salida}")
+            decir(f"✅ {col_excel} → {col_salida}")
     
     # Preparar datos de tiendas
     df_tiendas = df_excel[columnas_utiles].copy()
@@ -53,189 +112,245 @@ def agregar_tiendas_modificado(ruta_csv, ruta_excel, ruta_salida):
     
     # LIMPIAR LA COLUMNA value_tienda QUE TIENE 0 ADICIONAL
     if 'value_tienda' in df_tiendas.columns:
-        print(f"🔧 LIMPIANDO value_tienda (quitar SOLO EL ÚLTIMO 0):")
-        print(f"   ANTES: {df_tiendas['value_tienda'].head(5).tolist()}")
+        decir(f"🔧 LIMPIANDO value_tienda (quitar SOLO EL ÚLTIMO 0):")
+        if consola_activa():
+            print(f"   ANTES: {df_tiendas['value_tienda'].head(5).tolist()}")
         
-        # Quitar SOLO EL ÚLTIMO 0 si termina en 0
-        def quitar_ultimo_cero(valor):
-            valor_str = str(valor)
-            if valor_str.endswith('0') and len(valor_str) > 1:
-                return valor_str[:-1]  # Quitar solo el último carácter
-            return valor_str
+        # Sobre el maestro de tiendas (miles de filas), no sobre las filas del reporte
+        df_tiendas['value_tienda'] = limpiar_value_tienda(df_tiendas['value_tienda'])
         
-        df_tiendas['value_tienda'] = df_tiendas['value_tienda'].apply(quitar_ultimo_cero)
-        
-        print(f"   DESPUÉS: {df_tiendas['value_tienda'].head(5).tolist()}")
+        if consola_activa():
+            print(f"   DESPUÉS: {df_tiendas['value_tienda'].head(5).tolist()}")
     
     # MOSTRAR TIPOS DE DATOS DE TIENDAS DESPUÉS DE LIMPIAR
-    print(f"📊 TIPOS TIENDAS (después de limpiar):")
-    for col in ['value_tienda', 'nombre_tienda']:
-        if col in df_tiendas.columns:
-            print(f"   {col}: Muestra: {df_tiendas[col].head(3).tolist()}")
-    
-    # NORMALIZAR TODO PARA QUE COINCIDA PERFECTO - SIN CAMBIAR DATOS ORIGINALES
-    def limpiar_numero(serie):
-        """Limpia números para que coincidan SIN JODER DATOS ORIGINALES"""
-        return (serie.astype(str)
-                   .str.replace('.0', '')      # Quitar .0
-                   .str.replace(',', '')       # Quitar comas
-                   .str.strip()                # Quitar espacios
-                   .str.replace('nan', '')     # Quitar nan
-                   .replace('', '0'))          # Vacíos = 0
-    
-    # Normalizar SOLO para el merge
-    df_tiendas['ceco_limpio'] = limpiar_numero(df_tiendas[ceco_col])
-    df_csv['centro_limpio'] = limpiar_numero(df_csv['centro_de_coste'])
-    
-    print(f"🔍 Muestras NORMALIZADAS:")
-    print(f"   CSV centro: {df_csv['centro_limpio'].head(5).tolist()}")
-    print(f"   Excel CECO: {df_tiendas['ceco_limpio'].head(5).tolist()}")
-    
-    # Verificar coincidencias
-    csv_valores = set(df_csv['centro_limpio'].unique())
-    excel_valores = set(df_tiendas['ceco_limpio'].unique())
-    coincidencias = csv_valores.intersection(excel_valores)
-    print(f"🎯 Coincidencias: {len(coincidencias)} de {len(csv_valores)} valores CSV")
-    
-    # Merge SIMPLE
-    df_resultado = pd.merge(
-        df_csv,
-        df_tiendas.drop(ceco_col, axis=1),
-        left_on='centro_limpio',
-        right_on='ceco_limpio',
-        how='left'
-    )
-    
-    # Quitar columnas temporales
-    df_resultado = df_resultado.drop(['centro_limpio', 'ceco_limpio'], axis=1)
-    
-    # 🎯 NUEVA LÓGICA: Mover descripcion1 a nombre_tienda y eliminar descripcion1
-    print(f"\n🔧 MOVIENDO descripcion1 → nombre_tienda Y ELIMINANDO descripcion1:")
-    
-    if 'nombre_tienda' in df_resultado.columns and 'descripcion1' in df_resultado.columns:
-        # Contar datos en descripcion1
-        datos_desc = (df_resultado['descripcion1'] != '').sum()
-        print(f"   📊 Registros con descripcion1: {datos_desc:,}")
-        
-        # Contar nombre_tienda vacíos
-        nombre_vacios_antes = (df_resultado['nombre_tienda'] == '').sum()
-        print(f"   📊 nombre_tienda vacíos ANTES: {nombre_vacios_antes:,}")
-        
-        # MOVER: Solo llenar nombre_tienda vacío con descripcion1
-        mask_nombre_vacio = (df_resultado['nombre_tienda'] == '') | (df_resultado['nombre_tienda'].isna())
-        mask_desc_lleno = (df_resultado['descripcion1'] != '') & (df_resultado['descripcion1'].notna())
-        
-        # Aplicar solo donde nombre_tienda está vacío Y descripcion1 tiene datos
-        mask_mover = mask_nombre_vacio & mask_desc_lleno
-        
-        if mask_mover.any():
-            df_resultado.loc[mask_mover, 'nombre_tienda'] = df_resultado.loc[mask_mover, 'descripcion1']
-            movidos = mask_mover.sum()
-            print(f"   ✅ Registros movidos: {movidos:,}")
-            
-            # Mostrar ejemplos de lo que se movió
-            ejemplos = df_resultado[mask_mover][['centro_de_coste', 'nombre_tienda']].head(3)
-            print(f"   🔍 Ejemplos de datos movidos:")
-            for i, (_, row) in enumerate(ejemplos.iterrows()):
-                print(f"      {i+1}. Centro: {row['centro_de_coste']} → nombre_tienda: '{row['nombre_tienda']}'")
-        
-        # ELIMINAR la columna descripcion1
-        df_resultado = df_resultado.drop('descripcion1', axis=1)
-        print(f"   🗑️ Columna 'descripcion1' ELIMINADA")
-        
-        # Verificar resultado final
-        nombre_vacios_despues = (df_resultado['nombre_tienda'] == '').sum()
-        print(f"   📊 nombre_tienda vacíos DESPUÉS: {nombre_vacios_despues:,}")
-        
+    if consola_activa():
+        print(f"📊 TIPOS TIENDAS (después de limpiar):")
+        for col in ['value_tienda', 'nombre_tienda']:
+            if col in df_tiendas.columns:
+                print(f"   {col}: Muestra: {df_tiendas[col].head(3).tolist()}")
+    
+    # Pocas tiendas repetidas en millones de filas: el merge copia solo códigos
+    if categoricas:
+        aplicar_categoricas(df_tiendas, umbral=None)
+    
+    # CECO COMO ENTERO (una vez por valor distinto, nunca por fila)
+    claves_tiendas = parsear_ceco(df_tiendas[ceco_col])
+    return TablaTiendas(claves_tiendas, df_tiendas.drop(ceco_col, axis=1))
+
+def agregar_tiendas_df(df_csv, df_excel, categoricas=True, informe=None):
+    """Lógica del Paso 2 sobre DataFrames ya cargados (sin tocar disco).
+    df_csv puede venir del CSV validado o directo de validar_ausentismos_df.
+    df_excel: Excel de tiendas o una TablaTiendas ya preparada (p. ej. desde el cache).
+    categoricas: value_tienda / nombre_tienda entran al merge como 'category'.
+    informe: InformeEjecucion que recibe las etapas (maestro_tiendas, cruce_tiendas,
+    limpieza, reorden); también quedan en df.attrs['etapas']."""
+    informe = informe if informe is not None else InformeEjecucion('paso2')
+    if isinstance(df_excel, TablaTiendas):
+        tabla_tiendas = df_excel
+        decir(f"📖 Tiendas ya preparadas: {len(tabla_tiendas)} tiendas, {tabla_tiendas.cecos_maestro} CECO")
     else:
-        print(f"   ⚠️ No se encontraron las columnas necesarias")
-        if 'nombre_tienda' not in df_resultado.columns:
-            print(f"      ❌ Falta: nombre_tienda")
-        if 'descripcion1' not in df_resultado.columns:
-            print(f"      ❌ Falta: descripcion1")
+        with informe.etapa('maestro_tiendas', filas=len(df_excel)):
+            tabla_tiendas = preparar_tiendas(df_excel, categoricas)
+    
+    with informe.etapa('cruce_tiendas', filas=len(df_csv)) as etapa:
+        claves_csv = parsear_ceco(df_csv['centro_de_coste'])
+    
+        if consola_activa():
+            print(f"🔍 Muestras NORMALIZADAS:")
+            print(f"   CSV centro: {claves_csv.head(5).tolist()}")
+            print(f"   Excel CECO: {tabla_tiendas.claves.head(5).tolist()}")
+    
+        # Búsqueda por CECO entero: las estadísticas salen del mismo cruce
+        df_tiendas_traidas, stats_cruce = tabla_tiendas.buscar(claves_csv)
+        decir(f"🎯 Coincidencias: {stats_cruce['cecos_con_tienda']} de {stats_cruce['cecos_reporte']} valores CSV "
+              f"({stats_cruce['filas_con_tienda']:,} de {stats_cruce['filas']:,} filas)")
+        if stats_cruce['cecos_repetidos_maestro']:
+            print(f"   ⚠️ CECO repetidos en el Excel de tiendas: {stats_cruce['cecos_repetidos_maestro']} (se usa la primera fila)")
+        etapa['filas_con_tienda'] = stats_cruce['filas_con_tienda']
+    
+        df_resultado = pd.concat([df_csv, df_tiendas_traidas], axis=1).reset_index(drop=True)
+    
+        # 🎯 NUEVA LÓGICA: Mover descripcion1 a nombre_tienda y eliminar descripcion1
+        decir(f"\n🔧 MOVIENDO descripcion1 → nombre_tienda Y ELIMINANDO descripcion1:")
+    
+        if 'nombre_tienda' in df_resultado.columns and 'descripcion1' in df_resultado.columns:
+            if consola_activa():
+                # Contar datos en descripcion1
+                datos_desc = (df_resultado['descripcion1'] != '').sum()
+                print(f"   📊 Registros con descripcion1: {datos_desc:,}")
+    
+                # Contar nombre_tienda vacíos
+                nombre_vacios_antes = (df_resultado['nombre_tienda'] == '').sum()
+                print(f"   📊 nombre_tienda vacíos ANTES: {nombre_vacios_antes:,}")
+    
+            # MOVER: Solo llenar nombre_tienda vacío con descripcion1
+            mask_nombre_vacio = (df_resultado['nombre_tienda'] == '') | (df_resultado['nombre_tienda'].isna())
+            mask_desc_lleno = (df_resultado['descripcion1'] != '') & (df_resultado['descripcion1'].notna())
+    
+            # Aplicar solo donde nombre_tienda está vacío Y descripcion1 tiene datos
+            mask_mover = mask_nombre_vacio & mask_desc_lleno
+    
+            if mask_mover.any():
+                asignar_valores(df_resultado, mask_mover, 'nombre_tienda', df_resultado.loc[mask_mover, 'descripcion1'])
+                movidos = mask_mover.sum()
+                decir(f"   ✅ Registros movidos: {movidos:,}")
+                etapa['movidos_descripcion1'] = int(movidos)
+    
+                # Mostrar ejemplos de lo que se movió
+                if consola_activa():
+                    ejemplos = df_resultado[mask_mover][['centro_de_coste', 'nombre_tienda']].head(3)
+                    print(f"   🔍 Ejemplos de datos movidos:")
+                    for i, (_, row) in enumerate(ejemplos.iterrows()):
+                        print(f"      {i+1}. Centro: {row['centro_de_coste']} → nombre_tienda: '{row['nombre_tienda']}'")
+    
+            # ELIMINAR la columna descripcion1
+            df_resultado = df_resultado.drop('descripcion1', axis=1)
+            decir(f"   🗑️ Columna 'descripcion1' ELIMINADA")
+    
+            # Verificar resultado final
+            if consola_activa():
+                nombre_vacios_despues = (df_resultado['nombre_tienda'] == '').sum()
+                print(f"   📊 nombre_tienda vacíos DESPUÉS: {nombre_vacios_despues:,}")
     
-    # Llenar otros vacíos
-    df_resultado = df_resultado.fillna('')
-    
-    # 🎯 REORDENAR COLUMNAS SEGÚN EL ORDEN ESPECIFICADO
-    print(f"\n📋 REORDENANDO COLUMNAS...")
-    
-    orden_deseado = [
-        'numero_de_personal', 'nombre_emplcand', 'descripcion', 'numero_id', 
-        'clase_absentpres', 'txtclpresab', 'clase_absentpres1', 'txtclpresab1', 
-        'descripcenfermedad', 'descripcenfermedad1', 'inicio_de_validez', 'fin_de_validez', 
-        'modificado_el', 'modificado_por', 'division_de_personal', 'texto_division_pers', 
-        'dias_presencabs', 'dias_naturales', 'final_salario_enfer', 'area_de_personal', 
-        'texto_subdivpers', 'centro_de_coste', 'nombre_tienda', 'sexo', 
-        'denominacion_funcion', 'id_entidad_de_seguridad_social', 'subtipo', 
-        'area_de_nomina', 'estado_empleado', 'value_tienda'
-    ]
-    
-    # Verificar qué columnas existen
-    columnas_existentes = []
-    columnas_faltantes = []
-    
-    for col in orden_deseado:
-        if col in df_resultado.columns:
-            columnas_existentes.append(col)
         else:
-            columnas_faltantes.append(col)
-    
-    # Agregar columnas adicionales que no están en el orden (por si acaso)
-    columnas_adicionales = [col for col in df_resultado.columns if col not in orden_deseado]
-    
-    # Reordenar
-    columnas_finales = columnas_existentes + columnas_adicionales
-    df_resultado = df_resultado[columnas_finales]
+            print(f"   ⚠️ No se encontraron las columnas necesarias")
+            if 'nombre_tienda' not in df_resultado.columns:
+                print(f"      ❌ Falta: nombre_tienda")
+            if 'descripcion1' not in df_resultado.columns:
+                print(f"      ❌ Falta: descripcion1")
     
-    print(f"   ✅ Columnas ordenadas: {len(columnas_existentes)}")
-    if columnas_faltantes:
-        print(f"   ⚠️ Columnas faltantes: {len(columnas_faltantes)} → {columnas_faltantes[:5]}...")
-    if columnas_adicionales:
-        print(f"   📋 Columnas adicionales al final: {columnas_adicionales}")
+    # Llenar otros vacíos
+    with informe.etapa('limpieza', filas=len(df_resultado)):
+        df_resultado = rellenar_vacios(df_resultado)
     
-    print(f"   🎯 Orden final verificado: nombre_tienda en posición {columnas_finales.index('nombre_tienda') + 1}")
-    print(f"   🎯 Orden final verificado: value_tienda en posición {columnas_finales.index('value_tienda') + 1}")
+    # 🎯 REORDENAR COLUMNAS SEGÚN EL ORDEN ESPECIFICADO
+    with informe.etapa('reorden', filas=len(df_resultado)) as etapa:
+        decir(f"\n📋 REORDENANDO COLUMNAS...")
+    
+        orden_deseado = [
+            'numero_de_personal', 'nombre_emplcand', 'descripcion', 'numero_id', 
+            'clase_absentpres', 'txtclpresab', 'clase_absentpres1', 'txtclpresab1', 
+            'descripcenfermedad', 'descripcenfermedad1', 'inicio_de_validez', 'fin_de_validez', 
+            'modificado_el', 'modificado_por', 'division_de_personal', 'texto_division_pers', 
+            'dias_presencabs', 'dias_naturales', 'final_salario_enfer', 'area_de_personal', 
+            'texto_subdivpers', 'centro_de_coste', 'nombre_tienda', 'sexo', 
+            'denominacion_funcion', 'id_entidad_de_seguridad_social', 'subtipo', 
+            'area_de_nomina', 'estado_empleado', 'value_tienda'
+        ]
+    
+        # Verificar qué columnas existen
+        columnas_existentes = []
+        columnas_faltantes = []
+    
+        for col in orden_deseado:
+            if col in df_resultado.columns:
+                columnas_existentes.append(col)
+            else:
+                columnas_faltantes.append(col)
+    
+        # Agregar columnas adicionales que no están en el orden (por si acaso)
+        columnas_adicionales = [col for col in df_resultado.columns if col not in orden_deseado]
+    
+        # Reordenar
+        columnas_finales = columnas_existentes + columnas_adicionales
+        df_resultado = df_resultado[columnas_finales]
+        etapa['columnas'] = len(columnas_finales)
+    
+        decir(f"   ✅ Columnas ordenadas: {len(columnas_existentes)}")
+        if columnas_faltantes:
+            print(f"   ⚠️ Columnas faltantes: {len(columnas_faltantes)} → {columnas_faltantes[:5]}...")
+        if columnas_adicionales:
+            decir(f"   📋 Columnas adicionales al final: {columnas_adicionales}")
+    
+        decir(f"   🎯 Orden final verificado: nombre_tienda en posición {columnas_finales.index('nombre_tienda') + 1}")
+        decir(f"   🎯 Orden final verificado: value_tienda en posición {columnas_finales.index('value_tienda') + 1}")
     
     # VERIFICAR QUE NO SE JODAN LOS DATOS ORIGINALES
-    print(f"\n🔍 VERIFICACIÓN POST-MERGE:")
-    cols_verificar = ['numero_de_personal', 'numero_id', 'centro_de_coste']
-    for col in cols_verificar:
-        if col in df_resultado.columns:
-            print(f"   {col} original: {df_csv[col].head(3).tolist()}")
-            print(f"   {col} resultado: {df_resultado[col].head(3).tolist()}")
-            iguales = df_csv[col].head(3).tolist() == df_resultado[col].head(3).tolist()
-            print(f"   ¿Iguales? {iguales}")
-    
-    # Guardar
-    print(f"\n💾 GUARDANDO: {ruta_salida}")
-    df_resultado.to_csv(ruta_salida, index=False, encoding='utf-8-sig')
-    
-    # Stats finales
-    nuevas_cols = [col for col in df_resultado.columns if col not in df_csv.columns]
-    print(f"\n📊 ESTADÍSTICAS FINALES:")
-    print(f"   📁 Registros totales: {len(df_resultado):,}")
+    if consola_activa():
+        print(f"\n🔍 VERIFICACIÓN POST-MERGE:")
+        cols_verificar = ['numero_de_personal', 'numero_id', 'centro_de_coste']
+        for col in cols_verificar:
+            if col in df_resultado.columns:
+                print(f"   {col} original: {df_csv[col].head(3).tolist()}")
+                print(f"   {col} resultado: {df_resultado[col].head(3).tolist()}")
+                iguales = df_csv[col].head(3).tolist() == df_resultado[col].head(3).tolist()
+                print(f"   ¿Iguales? {iguales}")
+    
+    df_resultado.attrs['tiendas'] = stats_cruce
+    df_resultado.attrs['etapas'] = list(informe.etapas)
+    return df_resultado
+
+def imprimir_resumen_tiendas(df_resultado, columnas_originales):
+    """Estadísticas finales del Paso 2 (columnas agregadas y completitud); nada con la consola apagada"""
+    if not consola_activa():
+        return
+    nuevas_cols = [col for col in df_resultado.columns if col not in columnas_originales]
+    decir(f"\n📊 ESTADÍSTICAS FINALES:")
+    decir(f"   📁 Registros totales: {len(df_resultado):,}")
     
     if nuevas_cols:
-        print(f"   📋 Columnas agregadas: {nuevas_cols}")
+        decir(f"   📋 Columnas agregadas: {nuevas_cols}")
         
         # Estadísticas de value_tienda
         if 'value_tienda' in nuevas_cols:
             con_value = (df_resultado['value_tienda'] != '').sum()
-            print(f"   🏪 Con value_tienda: {con_value:,}/{len(df_resultado):,} ({con_value/len(df_resultado)*100:.1f}%)")
+            decir(f"   🏪 Con value_tienda: {con_value:,}/{len(df_resultado):,} ({con_value/len(df_resultado)*100:.1f}%)")
         
         # Estadísticas de nombre_tienda
         if 'nombre_tienda' in nuevas_cols:
             con_nombre = (df_resultado['nombre_tienda'] != '').sum()
-            print(f"   🏷️ Con nombre_tienda: {con_nombre:,}/{len(df_resultado):,} ({con_nombre/len(df_resultado)*100:.1f}%)")
+            decir(f"   🏷️ Con nombre_tienda: {con_nombre:,}/{len(df_resultado):,} ({con_nombre/len(df_resultado)*100:.1f}%)")
     
     # Verificar que descripcion1 fue eliminada
     if 'descripcion1' in df_resultado.columns:
         print(f"   ⚠️ ADVERTENCIA: descripcion1 AÚN existe (no se eliminó)")
     else:
-        print(f"   ✅ descripcion1 eliminada correctamente")
+        decir(f"   ✅ descripcion1 eliminada correctamente")
     
-    print(f"✅ COMPLETADO: {ruta_salida}")
+    imprimir_etapas(df_resultado.attrs.get('etapas'))
+
+def agregar_tiendas_modificado(ruta_csv, ruta_excel, ruta_salida, cache=None, informe=None, formato=None,
+                               historial=None, periodo=None):
+    """Agrega tiendas SIN JODER los datos originales - VERSIÓN MODIFICADA
+    
+    ruta_csv: resultado del Paso 1 en CSV, Parquet, Arrow IPC o xlsx (según la extensión)
+    formato: 'csv', 'parquet', 'arrow' o 'xlsx' para la salida (por defecto, el de ruta_salida)
+    informe: InformeEjecucion que recibe las etapas (verificación, lectura,
+    maestro_tiendas, cruce_tiendas... escritura) con filas, segundos y memoria pico
+    historial: HistorialAusentismos donde queda el resultado (consultable por
+    empleado, CECO y clase); periodo 'AAAA-MM' para todas sus filas o, si no se
+    indica, el mes de inicio_de_validez de cada una
+    """
+    informe = informe if informe is not None else InformeEjecucion('paso2')
+    decir("🔥 MERGE DIRECTO - SIN JODER (MODIFICADO)")
+    
+    # Layout de tiendas con SOLO los encabezados (antes de leer nada más)
+    with informe.etapa('verificacion'):
+        layout_valido = verificar_archivo(ruta_excel, 'tiendas')['valido']
+    if not layout_valido:
+        return None
+    
+    with informe.etapa('lectura') as etapa:
+        df_csv = leer_validado(ruta_csv)
+        
+        # Leer Excel (desde cache si ya se subió antes)
+        df_excel = leer_excel_y_renombrar_duplicadas(ruta_excel, cache=cache)
+        etapa['filas'] = len(df_csv) + (len(df_excel) if df_excel is not None else 0)
+    if df_excel is None:
+        return None
+    
+    df_resultado = agregar_tiendas_df(df_csv, df_excel, informe=informe)
+    
+    # Guardar
+    with informe.etapa('escritura', filas=len(df_resultado)):
+        guardar_resultado(df_resultado, ruta_salida, formato)
+    if historial is not None:
+        with informe.etapa('historial', filas=len(df_resultado)):
+            historial.ingerir(df_resultado, periodo, nombre_archivo(ruta_salida))
+    df_resultado.attrs['etapas'] = list(informe.etapas)
+    
+    imprimir_resumen_tiendas(df_resultado, df_csv.columns)
+    decir(f"✅ COMPLETADO: {ruta_salida}")
     return ruta_salida
 
 # Ejecutar
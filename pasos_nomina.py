@@ -0,0 +1,106 @@
+# Pasos de la app - PASO 1 Y PASO 2 COMO TRABAJOS QUE CORREN EN LOS PROCESOS DEL GESTOR
+import os
+import time
+
+from descargas import preparar_descarga
+from instrumentacion import consola, decir
+from part2_dash_store_total import leer_validado
+from perfil_calidad import perfilar
+from pipeline_nomina import PipelineNomina
+
+# El trabajo ya corre en un proceso del gestor: sus Excel se leen en serie, sin abrir otro pool adentro
+EJECUTOR_TRABAJO = 'secuencial'
+
+
+def _consultas_cache(cache, antes):
+    """Aciertos / fallos que sumó este trabajo en su copia del cache (la página los agrega al suyo)"""
+    if cache is None:
+        return {'aciertos': 0, 'fallos': 0}
+    return {'aciertos': cache.aciertos - antes[0], 'fallos': cache.fallos - antes[1]}
+
+
+def _escribir_salida(trabajo, df, nombre_base, descarga, ruta_base):
+    """El resultado va a salidas/ directo en el formato de la descarga: se serializa una vez y ese archivo se sirve"""
+    formato, compresion = descarga
+    with trabajo.informe.etapa('escritura', filas=len(df)):
+        archivo = preparar_descarga(df, nombre_base, compresion, formato=formato, ruta_base=ruta_base)
+    decir(f"💾 GUARDADO ({formato}{f' {compresion}' if compresion else ''}): {archivo[0]}")
+    return archivo
+
+
+def trabajo_validacion(trabajo, base, reporte, timestamp, descarga, detalle, cache=None, almacen=None):
+    """Paso 1 en un proceso del gestor: sin st.* (ese proceso no tiene página)
+
+    base / reporte: ArchivoEnMemoria con los bytes subidos; se leen sin pasar por disco.
+    cache: CacheParquet de la página (llega como su carpeta, compartida en disco).
+    almacen: AlmacenDiagnostico; base se ingiere (si es nueva) y puede ser None.
+    El DataFrame no vuelve a la página: se escribe una sola vez en salidas/, en el
+    formato de la descarga, y se devuelve lo que se muestra (filas, carga, perfil,
+    layout) más ese archivo, que es el que se descarga.
+    """
+    antes = (cache.aciertos, cache.fallos) if cache is not None else None
+    pipeline = PipelineNomina(cache=cache, ejecutor=EJECUTOR_TRABAJO, informe=trabajo.informe,
+                              almacen_diagnostico=almacen)
+    resultado = {'timestamp': timestamp, 'filas': None, 'esquemas': pipeline.esquemas}
+    with consola(detalle):
+        df_validado = pipeline.validar(base, reporte)
+        resultado['cache_excel'] = _consultas_cache(cache, antes)
+        if df_validado is None:
+            return resultado
+        # Única escritura a disco del Paso 1 (con el id: dos corridas del mismo segundo no se pisan)
+        archivo = _escribir_salida(trabajo, df_validado, f"datos_validados_{timestamp}", descarga,
+                                   f"salidas/validation_report_45_{timestamp}_{trabajo.id}")
+        # El perfil queda con el resultado: los reruns lo muestran sin recalcular
+        calidad = perfilar(df_validado, informe=trabajo.informe)
+    trabajo.verificar_cancelacion()
+    resultado.update({'filas': len(df_validado), 'carga': df_validado.attrs.get('carga'), 'descarga': archivo,
+                      'calidad': calidad})
+    return resultado
+
+
+def trabajo_tiendas(trabajo, validado, tiendas, timestamp, descarga, detalle, cache=None, tabla_tiendas=None,
+                    historial=None):
+    """Paso 2 en un proceso del gestor: resultado del Paso 1 (CSV, Parquet, Arrow o xlsx) + maestro de tiendas
+
+    validado / tiendas: ArchivoEnMemoria; el formato del validado sale de su nombre.
+    tabla_tiendas: TablaTiendas que la página ya tenía en su CacheTiendas; sin ella
+    se prepara acá y vuelve en resultado['maestro'] = (tabla, segundos) para cachearla.
+    historial: HistorialAusentismos donde queda el reporte final (por el mes de inicio_de_validez).
+    """
+    antes = (cache.aciertos, cache.fallos) if cache is not None else None
+    pipeline = PipelineNomina(cache=cache, ejecutor=EJECUTOR_TRABAJO, informe=trabajo.informe)
+    resultado = {'timestamp': timestamp, 'filas': None, 'esquemas': pipeline.esquemas}
+    with consola(detalle):
+        with trabajo.informe.etapa('lectura') as etapa:
+            df_csv = leer_validado(validado)
+            etapa['filas'] = len(df_csv)
+        # El Excel de tiendas solo se parsea si la página no lo tenía preparado
+        if tabla_tiendas is None:
+            inicio = time.perf_counter()
+            tabla_tiendas = pipeline.preparar_tiendas(tiendas)
+            if tabla_tiendas is not None:
+                resultado['maestro'] = (tabla_tiendas, time.perf_counter() - inicio)
+        else:
+            decir("   ⚡ Maestro de tiendas desde cache")
+        resultado['cache_excel'] = _consultas_cache(cache, antes)
+        df_final = pipeline.agregar_tiendas(tabla_tiendas, df_validado=df_csv) if tabla_tiendas is not None else None
+        if df_final is None:
+            return resultado
+        # Única escritura a disco del Paso 2
+        archivo = _escribir_salida(trabajo, df_final, f"reporte_tiendas_corregido_{timestamp}", descarga,
+                                   f"salidas/reporte_tiendas_corregido_{timestamp}_{trabajo.id}")
+        ruta_corregida = str(archivo[0])
+        if historial is not None:
+            with trabajo.informe.etapa('historial', filas=len(df_final)):
+                historial.ingerir(df_final, archivo=os.path.basename(ruta_corregida))
+        calidad = perfilar(df_final, informe=trabajo.informe)
+    trabajo.verificar_cancelacion()
+    resultado.update({
+        'filas': len(df_final),
+        'columnas': len(df_final.columns),
+        'muestra_tienda': df_final['value_tienda'].head(10).tolist() if 'value_tienda' in df_final.columns else None,
+        'descarga': archivo,
+        'ruta': ruta_corregida,
+        'calidad': calidad,
+    })
+    return resultado
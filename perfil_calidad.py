@@ -0,0 +1,122 @@
+# Perfil de calidad - UNA PASADA POR COLUMNA: COMPLETITUD, DISTINTOS, TOP, NÚMEROS Y FECHAS
+import numpy as np
+import pandas as pd
+
+from instrumentacion import InformeEjecucion
+from normalizar_numeros import NULOS_TEXTO
+
+# Valores más frecuentes que se guardan por columna
+TOP_POR_DEFECTO = 5
+
+# Candidatas a fecha: 2024-06-01, 01.06.2024, 1/6/24 (con hora o sin ella)
+_PATRON_FECHA = r'^\s*\d{1,4}[-/.]\d{1,2}[-/.]\d{1,4}([ T]\d{1,2}:\d{2}(:\d{2})?)?\s*$'
+
+
+def _codigos_y_unicos(serie):
+    """(códigos con -1 en los nulos, valores distintos): la única pasada sobre la columna"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy(), serie.cat.categories
+    return pd.factorize(serie)
+
+
+def perfil_columna(serie, top=TOP_POR_DEFECTO):
+    """Métricas de una columna calculadas sobre sus valores distintos, no sobre las filas
+
+    Se factoriza una vez; las cuentas salen de un bincount de los códigos y el
+    resto (vacíos, top, ¿es número?, ¿es fecha?) se decide por valor distinto y
+    se pondera con su cuenta. Las tasas numérica y de fecha son sobre las celdas
+    no vacías.
+    """
+    codigos, unicos = _codigos_y_unicos(serie)
+    conteos = np.bincount(codigos + 1, minlength=len(unicos) + 1)[1:]  # la posición 0 son los nulos
+    textos = pd.Series(np.asarray(unicos, dtype=object)).astype(str).str.strip()
+    llenos = ~textos.isin(NULOS_TEXTO).to_numpy()
+    conteos_llenos = conteos[llenos]
+    textos_llenos = textos[llenos].reset_index(drop=True)
+    no_vacios = int(conteos_llenos.sum())
+
+    if serie.dtype.kind in 'iufb':
+        numericos = np.ones(len(textos_llenos), dtype=bool)
+    else:
+        numericos = pd.to_numeric(textos_llenos.str.replace(',', '.', regex=False), errors='coerce').notna().to_numpy()
+    if serie.dtype.kind == 'M':
+        fechas = np.ones(len(textos_llenos), dtype=bool)
+    else:
+        fechas = np.zeros(len(textos_llenos), dtype=bool)
+        candidatas = textos_llenos.str.match(_PATRON_FECHA).to_numpy(dtype=bool)
+        if candidatas.any():
+            fechas[candidatas] = pd.to_datetime(textos_llenos[candidatas], errors='coerce', format='mixed',
+                                                dayfirst=True).notna().to_numpy()
+
+    orden = np.argsort(-conteos_llenos, kind='stable')[:top]
+    return {
+        'columna': serie.name,
+        'tipo': str(serie.dtype),
+        'filas': len(serie),
+        'no_vacios': no_vacios,
+        'tasa_no_vacios': round(no_vacios / len(serie), 4) if len(serie) else 0.0,
+        'distintos': int(llenos.sum()),
+        'top': [(textos_llenos.iloc[i], int(conteos_llenos[i])) for i in orden],
+        'tasa_numerica': round(conteos_llenos[numericos].sum() / no_vacios, 4) if no_vacios else 0.0,
+        'tasa_fecha': round(conteos_llenos[fechas].sum() / no_vacios, 4) if no_vacios else 0.0,
+    }
+
+
+def cobertura_cruces(df):
+    """Qué parte de las filas encontró su diagnóstico (Paso 1) y su tienda (Paso 2)
+
+    Sale de lo que ya dejaron los cruces en df.attrs ('validacion' y 'tiendas'):
+    no se vuelve a buscar nada. Un CSV releído no trae attrs: sin cobertura.
+    """
+    cobertura = {}
+    validacion = df.attrs.get('validacion')
+    if validacion and validacion.get('registros'):
+        cobertura['diagnostico'] = {
+            'filas': validacion['registros'],
+            'con_coincidencia': validacion['coincidencias'],
+            'tasa': round(validacion['coincidencias'] / validacion['registros'], 4),
+        }
+    tiendas = df.attrs.get('tiendas')
+    if tiendas and tiendas.get('filas'):
+        cobertura['tiendas'] = {
+            'filas': tiendas['filas'],
+            'con_coincidencia': tiendas['filas_con_tienda'],
+            'tasa': round(tiendas['filas_con_tienda'] / tiendas['filas'], 4),
+            'filas_sin_ceco': tiendas['filas_sin_ceco'],
+            'cecos_reporte': tiendas['cecos_reporte'],
+            'cecos_con_tienda': tiendas['cecos_con_tienda'],
+        }
+    return cobertura
+
+
+def perfilar(df, top=TOP_POR_DEFECTO, informe=None):
+    """Perfil de calidad del DataFrame: una factorización por columna + cobertura de los cruces
+
+        perfil = perfilar(df_final)
+        perfil['columnas'][0]['tasa_no_vacios'], perfil['cobertura']['tiendas']['tasa']
+
+    informe: InformeEjecucion que recibe la etapa 'calidad'.
+    """
+    informe = informe if informe is not None else InformeEjecucion('calidad')
+    with informe.etapa('calidad', filas=len(df)) as etapa:
+        columnas = [perfil_columna(df[col], top) for col in df.columns]
+        etapa['columnas'] = len(columnas)
+    return {
+        'filas': len(df),
+        'columnas': columnas,
+        'cobertura': cobertura_cruces(df),
+        'segundos': etapa['segundos'],
+    }
+
+
+def perfil_a_dataframe(perfil):
+    """Una fila por columna, lista para st.dataframe (tasas en %)"""
+    return pd.DataFrame([{
+        'columna': columna['columna'],
+        'tipo': columna['tipo'],
+        '% no vacíos': round(columna['tasa_no_vacios'] * 100, 1),
+        'distintos': columna['distintos'],
+        '% numérico': round(columna['tasa_numerica'] * 100, 1),
+        '% fecha': round(columna['tasa_fecha'] * 100, 1),
+        'más frecuentes': ' · '.join(f"{valor} ({cuenta:,})" for valor, cuenta in columna['top']),
+    } for columna in perfil['columnas']])
@@ -0,0 +1,226 @@
+# Pipeline en memoria - PASO 1 + PASO 2 SIN IDA Y VUELTA POR CSV
+import time
+
+import pandas as pd
+
+from carga_paralela import EJECUTOR_POR_DEFECTO
+from esquemas import validar_encabezados, verificar_archivo
+from formatos import FORMATOS_SALIDA, guardar_resultado  # noqa: F401 - FORMATOS_SALIDA se reexporta
+from instrumentacion import InformeEjecucion, decir
+from join_tiendas import TablaTiendas
+from lectores_excel import nombre_archivo
+from part1_validation_reporte_45 import (
+    diagnostico_del_almacen,
+    imprimir_resumen_validacion,
+    leer_excel_y_renombrar_duplicadas,
+    leer_excels_y_renombrar_duplicadas,
+    validar_ausentismos_df,
+)
+from part2_dash_store_total import agregar_tiendas_df, imprimir_resumen_tiendas, preparar_tiendas
+from validacion_incremental import validar_incremental
+
+
+class PipelineNomina:
+    """Validación (Paso 1) y tiendas (Paso 2) encadenadas en memoria
+
+    Cada entrada puede ser una ruta de Excel o un DataFrame ya cargado. El
+    DataFrame validado pasa directo al Paso 2; solo guardar() toca disco. Las
+    columnas de poca cardinalidad viajan como 'category' (categoricas=False lo desactiva).
+    cache_tiendas (CacheTiendas) reutiliza el maestro de tiendas ya preparado.
+    Los Excel de un mismo paso se leen a la vez (ejecutor: 'procesos', 'hilos'
+    o 'secuencial'); el tiempo de cada lectura queda en informe_carga.
+    incremental: directorio de huellas; el Paso 1 solo reprocesa filas nuevas o
+    cambiadas desde la corrida anterior (verificar_incremental lo compara con una completa).
+    informe: InformeEjecucion que junta las etapas de todo lo que corre el pipeline
+    (lectura, join, ..., escritura); se crea uno si no se pasa.
+    almacen_diagnostico: AlmacenDiagnostico; cada base subida se ingiere una vez
+    y el Paso 1 consulta solo las claves del reporte (validar(None, reporte)
+    corre sin base subida).
+
+        pipeline = PipelineNomina(cache=CacheParquet())
+        pipeline.ejecutar('base_diagnosticos.XLSX', 'Reporte 45.XLSX', '0002 Dash Stores.xlsx')
+        pipeline.guardar('salidas/reporte_final.csv')
+    """
+
+    def __init__(self, cache=None, politica_duplicados='reciente', motor='auto', categoricas=True,
+                 cache_tiendas=None, ejecutor=EJECUTOR_POR_DEFECTO, incremental=None,
+                 verificar_incremental=False, informe=None, almacen_diagnostico=None):
+        self.cache = cache
+        self.cache_tiendas = cache_tiendas
+        self.ejecutor = ejecutor
+        self.incremental = incremental
+        self.verificar_incremental = verificar_incremental
+        self.informe_carga = None
+        self.informe = informe if informe is not None else InformeEjecucion('pipeline')
+        self.almacen_diagnostico = almacen_diagnostico
+        self.categoricas = categoricas
+        self.politica_duplicados = politica_duplicados
+        self.motor = motor
+        self.df_validado = None
+        self.df_final = None
+        self.esquemas = {}  # resultado de la validación de layout por entrada
+
+    def _verificar(self, origen, esquema):
+        """Layout correcto según SOLO los encabezados (archivo) o las columnas (DataFrame)"""
+        if isinstance(origen, pd.DataFrame):
+            resultado = validar_encabezados(esquema, origen.columns)
+            if not resultado['valido']:
+                print(f"❌ El DataFrame no tiene el layout de {esquema}: faltan {resultado['faltantes']}")
+        else:
+            with self.informe.etapa('verificacion', archivo=esquema):
+                resultado = verificar_archivo(origen, esquema)
+        self.esquemas[esquema] = resultado
+        return resultado['valido']
+
+    def _cargar(self, origen):
+        if isinstance(origen, pd.DataFrame):
+            return origen
+        with self.informe.etapa('lectura') as etapa:
+            df = leer_excel_y_renombrar_duplicadas(origen, motor=self.motor, cache=self.cache)
+            etapa['filas'] = len(df) if df is not None else 0
+        return df
+
+    def _cargar_varios(self, origenes):
+        """{nombre: ruta o DataFrame} -> {nombre: DataFrame o None}; las rutas se parsean a la vez"""
+        rutas = {nombre: origen for nombre, origen in origenes.items() if not isinstance(origen, pd.DataFrame)}
+        if not rutas:
+            return dict(origenes)
+        with self.informe.etapa('lectura') as etapa:
+            cargados, self.informe_carga = leer_excels_y_renombrar_duplicadas(rutas, self.motor, self.cache,
+                                                                              self.ejecutor)
+            etapa['filas'] = sum(len(df) for df in cargados.values() if df is not None)
+            etapa['ejecutor'] = self.informe_carga['ejecutor']
+        return {nombre: cargados.get(nombre, origen) for nombre, origen in origenes.items()}
+
+    def _pendiente_de_ingerir(self, diagnostico):
+        """(origen por leer o None, huella): la base ya ingerida en el almacén no se vuelve a leer"""
+        if self.almacen_diagnostico is None or diagnostico is None or isinstance(diagnostico, pd.DataFrame):
+            return diagnostico, None
+        return self.almacen_diagnostico.pendiente(diagnostico)
+
+    def validar(self, diagnostico, reporte, huella_diagnostico=None, archivo_diagnostico=''):
+        """Paso 1 -> DataFrame validado (o None si falla)
+
+        huella_diagnostico / archivo_diagnostico: SHA-256 y nombre del Excel del
+        que sale un diagnóstico ya leído, para registrar su ingesta en el almacén.
+        """
+        decir("🔍 PIPELINE - PASO 1: VALIDACIÓN")
+        decir("=" * 60)
+        if diagnostico is None and self.almacen_diagnostico is None:
+            print("❌ Falta la base de diagnósticos (o un almacén de diagnósticos)")
+            return None
+        if diagnostico is not None and not isinstance(diagnostico, pd.DataFrame):
+            archivo_diagnostico = nombre_archivo(diagnostico)
+        diagnostico, huella = self._pendiente_de_ingerir(diagnostico)
+        huella = huella or huella_diagnostico
+        origenes = {nombre: origen for nombre, origen in [('diagnostico', diagnostico), ('reporte_45', reporte)]
+                    if origen is not None}
+        # Ambos layouts se revisan antes de parsear cualquiera de los dos
+        if not all([self._verificar(origen, nombre) for nombre, origen in origenes.items()]):
+            return None
+        cargados = self._cargar_varios(origenes)
+        df_diagnostico, df_reporte = cargados.get('diagnostico'), cargados['reporte_45']
+        if df_reporte is None or (df_diagnostico is None and 'diagnostico' in origenes):
+            return None
+        if self.almacen_diagnostico is not None:
+            df_diagnostico = diagnostico_del_almacen(self.almacen_diagnostico, df_diagnostico, df_reporte,
+                                                     self.informe, huella, archivo_diagnostico)
+
+        if self.incremental:
+            with self.informe.etapa('validacion_incremental', filas=len(df_reporte)):
+                self.df_validado = validar_incremental(df_diagnostico, df_reporte, self.incremental,
+                                                       validar_ausentismos_df, self.politica_duplicados,
+                                                       self.categoricas, self.verificar_incremental)
+        else:
+            self.df_validado = validar_ausentismos_df(df_diagnostico, df_reporte, self.politica_duplicados,
+                                                     self.categoricas, self.informe)
+        self.df_final = None
+        if self.df_validado is not None:
+            if self.informe_carga is not None:
+                self.df_validado.attrs['carga'] = self.informe_carga
+            imprimir_resumen_validacion(self.df_validado)
+        return self.df_validado
+
+    def agregar_tiendas(self, tiendas, df_validado=None):
+        """Paso 2 sobre el resultado del Paso 1 (o sobre df_validado si se pasa)"""
+        decir("\n🏪 PIPELINE - PASO 2: TIENDAS")
+        decir("=" * 60)
+        df_validado = self.df_validado if df_validado is None else df_validado
+        if df_validado is None:
+            print("❌ No hay datos validados: ejecuta validar() primero")
+            return None
+        tabla_tiendas = self.tabla_tiendas(tiendas)
+        if tabla_tiendas is None:
+            return None
+
+        self.df_final = agregar_tiendas_df(df_validado, tabla_tiendas, self.categoricas, self.informe)
+        imprimir_resumen_tiendas(self.df_final, df_validado.columns)
+        return self.df_final
+
+    def preparar_tiendas(self, tiendas):
+        """Excel (ruta o DataFrame) de tiendas -> TablaTiendas, sin pasar por cache_tiendas"""
+        if not self._verificar(tiendas, 'tiendas'):
+            return None
+        df_tiendas = self._cargar(tiendas)
+        if df_tiendas is None:
+            return None
+        with self.informe.etapa('maestro_tiendas', filas=len(df_tiendas)):
+            return preparar_tiendas(df_tiendas, self.categoricas)
+
+    def tabla_tiendas(self, tiendas):
+        """TablaTiendas de una ruta, DataFrame o tabla ya preparada (con cache si hay)"""
+        if isinstance(tiendas, TablaTiendas):
+            return tiendas
+        if self.cache_tiendas is None or isinstance(tiendas, pd.DataFrame):
+            return self.preparar_tiendas(tiendas)
+        return self.cache_tiendas.cargar(tiendas, lambda: self.preparar_tiendas(tiendas), self.categoricas)
+
+    def ejecutar(self, diagnostico, reporte, tiendas):
+        """Paso 1 + Paso 2 de una vez, con los tres Excel parseándose a la vez
+
+        Si el maestro de tiendas ya está preparado en cache_tiendas no se lee.
+        """
+        archivo_diagnostico = ''
+        if diagnostico is not None and not isinstance(diagnostico, pd.DataFrame):
+            archivo_diagnostico = nombre_archivo(diagnostico)
+        diagnostico, huella_diagnostico = self._pendiente_de_ingerir(diagnostico)
+        origenes = {'diagnostico': diagnostico, 'reporte_45': reporte, 'tiendas': tiendas}
+        clave_tiendas = None
+        if self.cache_tiendas is not None and not isinstance(tiendas, (pd.DataFrame, TablaTiendas)):
+            clave_tiendas = self.cache_tiendas.clave(tiendas, self.categoricas)
+            tabla_tiendas = self.cache_tiendas.obtener(clave_tiendas)
+            if tabla_tiendas is not None:
+                origenes['tiendas'], clave_tiendas = tabla_tiendas, None
+
+        # Todos los layouts se revisan antes de parsear cualquier archivo
+        por_leer = {nombre: origen for nombre, origen in origenes.items()
+                     if origen is not None and not isinstance(origen, TablaTiendas)}
+        if not all([self._verificar(origen, nombre) for nombre, origen in por_leer.items()]):
+            return None
+        origenes.update(self._cargar_varios(por_leer))
+        if any(origenes[nombre] is None for nombre in por_leer):
+            return None
+
+        if self.validar(origenes['diagnostico'], origenes['reporte_45'], huella_diagnostico,
+                        archivo_diagnostico) is None:
+            return None
+        tiendas = origenes['tiendas']
+        if clave_tiendas is not None:
+            inicio = time.perf_counter()
+            segundos_lectura = tiendas.attrs.get('lectura', {}).get('segundos', 0)
+            tiendas = self.preparar_tiendas(tiendas)
+            if tiendas is None:
+                return None
+            self.cache_tiendas.guardar(clave_tiendas, tiendas, segundos_lectura + time.perf_counter() - inicio)
+        return self.agregar_tiendas(tiendas)
+
+    @property
+    def resultado(self):
+        """Lo último que produjo el pipeline (final si hubo Paso 2, si no el validado)"""
+        return self.df_final if self.df_final is not None else self.df_validado
+
+    def guardar(self, ruta, formato=None):
+        if self.resultado is None:
+            raise ValueError("No hay resultado para guardar: ejecuta el pipeline primero")
+        with self.informe.etapa('escritura', filas=len(self.resultado)):
+            return guardar_resultado(self.resultado, ruta, formato)
@@ -0,0 +1,111 @@
+# Sonda de archivos subidos - COLUMNAS, FILAS Y TIEMPO ESTIMADO SIN PARSEAR LOS DATOS
+import csv
+import io
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from cache_excel import PARQUET_DISPONIBLE
+from formatos import EXTENSIONES
+from lectores_excel import estimar_filas_xlsx, inicio_hoja_xlsx, nombres_desde_fila
+
+if PARQUET_DISPONIBLE:
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+# Rendimiento de referencia (1 CPU): lectura de .xlsx en celdas/s, lectura de CSV en
+# celdas/s y Paso 1/Paso 2 en filas/s una vez cargados los DataFrames
+CELDAS_POR_SEGUNDO = {'xlsx': 450_000, 'csv': 5_000_000, 'parquet': 60_000_000, 'arrow': 200_000_000}
+FILAS_POR_SEGUNDO_PROCESO = 140_000
+
+# Bytes del inicio del CSV usados para la primera línea y el largo medio de fila
+MUESTRA_CSV = 64 * 1024
+
+
+def _abrir(origen):
+    """Archivo binario con seek para una ruta, bytes o un archivo ya abierto"""
+    if isinstance(origen, (bytes, bytearray, memoryview)):
+        return io.BytesIO(origen)
+    if isinstance(origen, (str, Path)):
+        return open(origen, 'rb')
+    origen.seek(0)
+    return origen
+
+
+def estimar_segundos(filas, columnas, formato):
+    """Lectura + proceso según el rendimiento de referencia (None si no hay filas estimadas)"""
+    if filas is None:
+        return None
+    lectura = filas * max(columnas, 1) / CELDAS_POR_SEGUNDO.get(formato, CELDAS_POR_SEGUNDO['xlsx'])
+    return round(lectura + filas / FILAS_POR_SEGUNDO_PROCESO, 1)
+
+
+def _sondear_csv(archivo, tamano):
+    muestra = archivo.read(MUESTRA_CSV)
+    lineas = muestra.decode('utf-8-sig', errors='replace').splitlines()
+    columnas = nombres_desde_fila(next(csv.reader(lineas[:1]), []))
+    if tamano <= len(muestra):
+        return columnas, max(len(lineas) - 1, 0), True
+    completas = lineas[:-1]  # la última puede estar cortada por la muestra
+    largo_medio = sum(len(linea.encode('utf-8')) + 1 for linea in completas) / max(len(completas), 1)
+    return columnas, max(round(tamano / largo_medio) - 1, 0), False
+
+
+def _sondear_columnar(archivo, formato):
+    """Parquet / Arrow IPC: esquema y filas exactas desde los metadatos del archivo"""
+    if formato == 'parquet':
+        metadatos = pq.ParquetFile(archivo).metadata
+        return list(metadatos.schema.to_arrow_schema().names), metadatos.num_rows, True
+    lector = ipc.open_file(archivo)
+    filas = sum(lector.get_batch(i).num_rows for i in range(lector.num_record_batches))
+    return list(lector.schema.names), filas, True
+
+
+def sondear(origen, nombre=None):
+    """Resumen barato de un archivo de entrada, sin cargar sus datos
+
+    origen: ruta, bytes o archivo binario (p. ej. el UploadedFile de Streamlit).
+    .xlsx: dimensión y primera fila de la hoja (filas exactas si el archivo declara
+    la dimensión, si no extrapoladas); .csv: primera línea y largo medio de fila;
+    .parquet / .arrow: esquema y filas del pie del archivo; otros formatos: solo
+    encabezados vía pandas.
+    """
+    nombre = nombre or getattr(origen, 'name', None) or str(origen)
+    extension = Path(nombre).suffix.lower()
+    inicio = time.perf_counter()
+    archivo = _abrir(origen)
+    try:
+        archivo.seek(0, io.SEEK_END)
+        tamano = archivo.tell()
+        archivo.seek(0)
+        if extension in ('.xlsx', '.xlsm'):
+            formato = 'xlsx'
+            dimension, primera = inicio_hoja_xlsx(archivo)
+            columnas = nombres_desde_fila(primera)
+            filas, exacto = estimar_filas_xlsx(archivo, dimension)
+        elif extension == '.csv':
+            formato = 'csv'
+            columnas, filas, exacto = _sondear_csv(archivo, tamano)
+        elif EXTENSIONES.get(extension) in ('parquet', 'arrow') and PARQUET_DISPONIBLE:
+            formato = EXTENSIONES[extension]
+            columnas, filas, exacto = _sondear_columnar(archivo, formato)
+        else:
+            formato = extension.lstrip('.') or 'xlsx'
+            columnas, filas, exacto = list(pd.read_excel(archivo, nrows=0).columns), None, False
+    finally:
+        if isinstance(origen, (str, Path)):
+            archivo.close()
+        else:
+            archivo.seek(0)
+
+    return {
+        'archivo': Path(nombre).name,
+        'formato': formato,
+        'tamano': tamano,
+        'columnas': columnas,
+        'filas': filas,
+        'filas_exactas': exacto,
+        'segundos_estimados': estimar_segundos(filas, len(columnas), formato),
+        'segundos_sonda': round(time.perf_counter() - inicio, 4),
+    }
@@ -0,0 +1,5 @@
+# Configuración de pytest - MÓDULOS DEL VALIDADOR IMPORTABLES DESDE tests/
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,50 @@
+# Pruebas del cache Parquet - COLUMNAS CON TIPOS MEZCLADOS Y NOMBRES QUE NO SON TEXTO
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache_excel import PARQUET_DISPONIBLE, CacheParquet
+
+pytestmark = pytest.mark.skipif(not PARQUET_DISPONIBLE, reason="requiere pyarrow")
+
+
+def _tipos_y_valores(serie):
+    return [(type(valor), 'nan' if isinstance(valor, float) and np.isnan(valor) else valor) for valor in serie]
+
+
+def test_columna_mezclada_se_cachea_con_sus_tipos(tmp_path):
+    # Como sale de SAP: 'Clase absent./pres..1' con números y códigos con ceros a la izquierda
+    df = pd.DataFrame({
+        'Clase absent./pres..1': pd.Series([100, '0100', np.nan, 3.5, True, pd.Timestamp('2024-03-01')],
+                                           dtype=object),
+        'Centro de coste': pd.Series([999, ' 1,101 ', np.nan, 1101, 'N/A', 7], dtype=object),
+        'Número de personal': [1, 2, 3, 4, 5, 6],
+    })
+    cache = CacheParquet(tmp_path)
+
+    assert cache.guardar('clave', df)
+    cacheado = cache.obtener('clave')
+
+    assert cache.aciertos == 1
+    assert list(cacheado.columns) == list(df.columns)
+    for col in df.columns:
+        assert _tipos_y_valores(cacheado[col]) == _tipos_y_valores(df[col]), col
+
+
+def test_columna_de_texto_no_se_codifica(tmp_path):
+    df = pd.DataFrame({'Sexo': pd.Series(['F', None, 'M'], dtype=object)})
+    cache = CacheParquet(tmp_path)
+    assert cache.guardar('clave', df)
+    assert list(pd.read_parquet(tmp_path / 'clave.parquet').columns) == ['Sexo']
+    assert cache.obtener('clave')['Sexo'].tolist()[::2] == ['F', 'M']
+
+
+def test_nombres_que_no_son_texto_vuelven_iguales(tmp_path):
+    # Encabezados numéricos del Excel (0, 2024, 1.5) y una columna mezclada con nombre numérico
+    df = pd.DataFrame({0: [1, 2], 'texto': ['a', 'b'], 2024: [1.5, np.nan], 1.5: ['x', 'y'],
+                       7: pd.Series([1, 'uno'], dtype=object)})
+    cache = CacheParquet(tmp_path)
+    assert cache.guardar('clave', df)
+    cacheado = cache.obtener('clave')
+    assert [(type(col), col) for col in cacheado.columns] == [(type(col), col) for col in df.columns]
+    pd.testing.assert_frame_equal(cacheado, df)
@@ -0,0 +1,80 @@
+# Pruebas de la carga paralela - PROCESOS SIN FORK Y LECTURAS DESDE EL CACHE
+import datetime as dt
+
+import numpy as np
+import openpyxl
+import pandas as pd
+import pytest
+
+from cache_excel import CacheParquet
+from carga_paralela import ARROW_DISPONIBLE, EJECUTORES, a_ipc, desde_ipc, leer_excels
+
+
+@pytest.fixture
+def excels(tmp_path):
+    rutas = {}
+    for nombre, filas in (('base', 30), ('reporte', 20)):
+        ruta = tmp_path / f"{nombre}.xlsx"
+        pd.DataFrame({'numero_de_personal': range(filas), 'clase': ['100'] * filas}).to_excel(ruta, index=False)
+        rutas[nombre] = str(ruta)
+    return rutas
+
+
+def test_procesos_y_acierto_de_cache_con_las_mismas_claves(excels, tmp_path):
+    cache = CacheParquet(tmp_path / 'cache')
+    leidos, informe = leer_excels(excels, cache=cache, ejecutor='procesos', max_trabajadores=2)
+    assert informe['ejecutor'] == 'procesos'
+    assert {nombre: len(df) for nombre, df in leidos.items()} == {'base': 30, 'reporte': 20}
+
+    desde_cache, informe = leer_excels(excels, cache=cache, ejecutor='procesos', max_trabajadores=2)
+    for nombre, df in desde_cache.items():
+        lectura = informe['lecturas'][nombre]
+        assert lectura['motor'] == 'cache'
+        assert lectura['filas_por_segundo'] is not None and lectura['filas_por_segundo'] > 0
+        assert set(leidos[nombre].attrs['lectura']) - {'traspaso', 'segundos_traspaso'} <= set(lectura)
+        pd.testing.assert_frame_equal(df, leidos[nombre])
+    assert cache.aciertos == 2
+
+
+@pytest.fixture
+def excels_dificiles(tmp_path):
+    """Encabezado numérico (0), enteros con vacíos y fechas; el reporte además con una columna mezclada"""
+    rutas = {}
+    for nombre, filas in (('base', 12), ('reporte', 8)):
+        libro = openpyxl.Workbook()
+        hoja = libro.active
+        hoja.append([0, 'texto', 'entero_nulo', 'fecha'] + (['mezcla'] if nombre == 'reporte' else []))
+        for i in range(filas):
+            hoja.append([i, f"t{i}" if i % 3 else None, i if i % 2 else None,
+                         dt.datetime(2024, 1, 1 + i), ['x', 1, 2.5][i % 3]][:5 if nombre == 'reporte' else 4])
+        ruta = tmp_path / f"{nombre}.xlsx"
+        libro.save(ruta)
+        rutas[nombre] = str(ruta)
+    return rutas
+
+
+def test_todos_los_ejecutores_devuelven_lo_mismo(excels_dificiles):
+    referencia, _ = leer_excels(excels_dificiles, ejecutor='secuencial')
+    assert 0 in referencia['base'].columns
+    for ejecutor in EJECUTORES:
+        leidos, informe = leer_excels(excels_dificiles, ejecutor=ejecutor, max_trabajadores=2)
+        assert informe['ejecutor'] == ejecutor
+        for nombre, df in leidos.items():
+            pd.testing.assert_frame_equal(df, referencia[nombre], obj=f"{ejecutor}/{nombre}")
+
+
+def test_acierto_de_cache_devuelve_lo_mismo_que_la_lectura(excels_dificiles, tmp_path):
+    cache = CacheParquet(tmp_path / 'cache')
+    leidos, _ = leer_excels(excels_dificiles, cache=cache, ejecutor='procesos', max_trabajadores=2)
+    desde_cache, informe = leer_excels(excels_dificiles, cache=cache, ejecutor='procesos', max_trabajadores=2)
+    assert {lectura['motor'] for lectura in informe['lecturas'].values()} == {'cache'}
+    for nombre, df in desde_cache.items():
+        pd.testing.assert_frame_equal(df, leidos[nombre], obj=nombre)
+
+
+@pytest.mark.skipif(not ARROW_DISPONIBLE, reason="sin pyarrow no hay traspaso Arrow")
+def test_arrow_solo_si_vuelve_igual():
+    assert a_ipc(pd.DataFrame({0: [1, 2]})) is None
+    assert a_ipc(pd.DataFrame({'objeto': pd.Series([1, np.nan], dtype=object)})) is None
+    df = pd.DataFrame({'entero': [1, 2], 'texto': ['a', None], 'fecha': pd.to_datetime(['2024-01-01', None])})
+    pd.testing.assert_frame_equal(desde_ipc(a_ipc(df)), df)
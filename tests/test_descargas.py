@@ -0,0 +1,20 @@
+# Pruebas de las descargas - EN MEMORIA O ESCRITAS UNA VEZ EN DISCO
+import pandas as pd
+import pytest
+
+from descargas import preparar_descarga
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({'numero_de_personal': ['00123', '00456'], 'dias': [1.5, 2.0]})
+
+
+@pytest.mark.parametrize('formato', ['csv', 'parquet', 'arrow'])
+def test_en_disco_son_los_mismos_bytes_que_en_memoria(df, tmp_path, formato):
+    archivo, nombre, mime, tamano = preparar_descarga(df, 'reporte', formato=formato)
+    ruta, nombre_disco, mime_disco, tamano_disco = preparar_descarga(df, 'reporte', formato=formato,
+                                                                     ruta_base=tmp_path / 'salidas' / 'reporte_1')
+    assert (nombre_disco, mime_disco, tamano_disco) == (nombre, mime, tamano)
+    assert ruta.name == f"reporte_1{nombre[len('reporte'):]}"
+    assert ruta.read_bytes() == archivo.getvalue()
@@ -0,0 +1,45 @@
+# Pruebas de la salida en Excel - EL XLSX SE LEE CON EL MISMO TEXTO QUE EL CSV
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from excel_salida import XLSXWRITER_DISPONIBLE, escribir_xlsx, leer_xlsx_resultado
+
+
+def _como_csv(df):
+    return pd.read_csv(io.StringIO(df.to_csv(index=False)), dtype=str)
+
+
+def _comparar(df, **opciones):
+    destino = io.BytesIO()
+    escribir_xlsx(df, destino, **opciones)
+    leido = leer_xlsx_resultado(io.BytesIO(destino.getvalue()))
+    pd.testing.assert_frame_equal(leido.astype(object), _como_csv(df).astype(object))
+
+
+@pytest.fixture
+def df_medidas():
+    return pd.DataFrame({
+        'numero_de_personal': ['00123', '00456', '00789', '01011'],
+        'final_salario_enfer': [26.0, np.nan, 12.5, 25.0],  # float con NaN: el CSV escribe '26.0'
+        'dias_naturales': [1, 6, 8, 7],
+        'dias_presencabs': ['27', '7.5', '27.0', None],  # texto: cada valor conserva su forma
+        'inicio_de_validez': ['2024-01-05', '2024-02-10', None, '2024-03-01'],
+    })
+
+
+def test_numeros_vuelven_con_el_texto_del_csv(df_medidas):
+    _comparar(df_medidas)
+
+
+def test_hojas_partidas_vuelven_como_una(df_medidas):
+    _comparar(df_medidas, max_filas_hoja=3)
+
+
+@pytest.mark.parametrize('motor', ['nativo', pytest.param('xlsxwriter', marks=pytest.mark.skipif(
+    not XLSXWRITER_DISPONIBLE, reason="xlsxwriter no está instalado"))])
+def test_infinitos_van_como_texto(motor):
+    df = pd.DataFrame({'dias_naturales': ['1', 'inf', '2.5'], 'final_salario_enfer': [1.0, np.inf, 1e400]})
+    _comparar(df, motor=motor)
@@ -0,0 +1,72 @@
+# Pruebas del historial - INGESTA CONCURRENTE Y CONSULTAS
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+from historial_ausentismos import HistorialAusentismos
+
+PROCESOS = 6
+
+
+def reporte_final(filas=50, mes='2024-03'):
+    return pd.DataFrame({
+        'numero_de_personal': [str(1000 + i % 7) for i in range(filas)],
+        'clase_absentpres': ['100', '200'] * (filas // 2),
+        'inicio_de_validez': [f"{mes}-{1 + i % 28:02d}" for i in range(filas)],
+        'centro_de_coste': ['999'] * filas,
+        'nombre_tienda': ['Tienda X'] * filas,
+    })
+
+
+def _ingerir_a_la_vez(ruta, periodo, barrera, errores):
+    """Un proceso del lote: todos arrancan la ingesta a la vez contra la base vacía"""
+    try:
+        historial = HistorialAusentismos(ruta)
+        barrera.wait()
+        historial.ingerir(reporte_final(), periodo=periodo)
+    except Exception as e:
+        errores.put(f"{periodo}: {type(e).__name__}: {e}")
+
+
+def test_ingesta_desde_varios_procesos_a_la_vez(tmp_path):
+    ruta = str(tmp_path / 'historial.sqlite')
+    contexto = multiprocessing.get_context('spawn')
+    barrera, errores = contexto.Barrier(PROCESOS), contexto.Queue()
+    periodos = [f"2024-{mes:02d}" for mes in range(1, PROCESOS + 1)]
+    procesos = [contexto.Process(target=_ingerir_a_la_vez, args=(ruta, periodo, barrera, errores))
+                for periodo in periodos]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(timeout=120)
+
+    fallos = []
+    while not errores.empty():
+        fallos.append(errores.get())
+    assert fallos == []
+    assert all(proceso.exitcode == 0 for proceso in procesos)
+    historial = HistorialAusentismos(ruta)
+    assert historial.periodos()['periodo'].tolist() == periodos
+    assert historial.estadisticas()['filas'] == 50 * PROCESOS
+
+
+def test_reingerir_un_periodo_lo_reemplaza(tmp_path):
+    historial = HistorialAusentismos(tmp_path / 'historial.sqlite')
+    historial.ingerir(reporte_final(50))
+    resultado = historial.ingerir(reporte_final(20))
+    assert resultado['reemplazadas'] == 50
+    assert historial.estadisticas()['filas'] == 20
+
+
+@pytest.mark.parametrize('filtros, filas', [
+    ({'numero_de_personal': '1000'}, 8),
+    ({'numero_de_personal': '1000', 'clase_absentpres': '100'}, 4),
+    ({'centro_de_coste': '999', 'desde': '2024-04'}, 0),
+])
+def test_consultar_filtra_por_columnas_indexadas_y_periodo(tmp_path, filtros, filas):
+    historial = HistorialAusentismos(tmp_path / 'historial.sqlite')
+    historial.ingerir(reporte_final(50))
+    df = historial.consultar(**filtros)
+    assert len(df) == filas
+    assert df.columns[0] == 'periodo'
@@ -0,0 +1,61 @@
+# Pruebas de la instrumentación - MEMORIA POR ETAPA SIN ESTADO COMPARTIDO Y CONSOLA EN LOS HILOS
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import carga_paralela
+from instrumentacion import InformeEjecucion, _rss_actual, consola, consola_activa
+
+MB = 1024 * 1024
+
+
+@pytest.mark.skipif(_rss_actual() is None, reason="RSS por etapa solo en Linux")
+def test_otra_corrida_no_borra_el_pico_de_la_etapa():
+    informe, otro = InformeEjecucion('grande'), InformeEjecucion('ruido')
+    parar = threading.Event()
+
+    def ruido():
+        while not parar.is_set():
+            with otro.etapa('ruido'):
+                time.sleep(0.005)
+
+    hilo = threading.Thread(target=ruido)
+    hilo.start()
+    try:
+        with informe.etapa('chica'):
+            time.sleep(0.05)
+        with informe.etapa('grande'):
+            datos = np.ones(300 * MB // 8)  # np.ones toca todas las páginas
+            time.sleep(0.1)
+            del datos
+    finally:
+        parar.set()
+        hilo.join()
+
+    chica, grande = informe.etapas
+    assert grande['memoria_medida'] == 'rss_etapa'
+    assert grande['memoria_pico_mb'] - chica['memoria_pico_mb'] > 250
+    assert not [hilo for hilo in threading.enumerate() if hilo.name == 'muestreo_rss']
+
+
+def test_lectura_en_hilos_hereda_la_consola(tmp_path, monkeypatch):
+    vistas = []
+
+    def lector(ruta, motor):
+        """Excel de mentira: anota si la consola estaba encendida en el hilo que lo leyó"""
+        vistas.append(consola_activa())
+        df = pd.DataFrame({'a': [1]})
+        df.attrs['lectura'] = {'motor': 'prueba', 'segundos': 0.0}
+        return df
+
+    monkeypatch.setattr(carga_paralela, 'leer_excel_rapido', lector)
+    rutas = {'uno': str(tmp_path / 'uno.xlsx'), 'dos': str(tmp_path / 'dos.xlsx')}
+    for activa in (False, True):
+        vistas.clear()
+        with consola(activa):
+            carga_paralela.leer_excels(rutas, ejecutor='hilos', max_trabajadores=2)
+        assert vistas == [activa, activa]
+
@@ -0,0 +1,148 @@
+# Pruebas del join del diagnóstico - MISMO RESULTADO QUE pd.merge, POLÍTICAS DE DUPLICADOS Y CLAVES NULAS
+import numpy as np
+import pandas as pd
+import pytest
+
+from join_diagnostico import (COLUMNAS_BUSQUEDA, COLUMNAS_MODIFICADO, POLITICAS_DUPLICADOS, buscar_modificados,
+                              indexar_diagnostico, resolver_duplicados)
+from part1_validation_reporte_45 import validar_ausentismos_df
+
+TRAIDAS = [f"{col}_diagnostico" for col in COLUMNAS_MODIFICADO]
+
+
+def reporte_sap(filas=40, semilla=0):
+    """Reporte 45 chico con los tipos que entrega el Excel de SAP"""
+    rng = np.random.default_rng(semilla)
+    inicio = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60, filas), unit='D')
+    reporte = pd.DataFrame({
+        'Número de personal': rng.integers(10_000, 10_010, filas),
+        'Número ID': rng.integers(1, 4, filas),
+        'Clase absent./pres.': rng.choice(np.array(['0100', '0200', '0300'], dtype=object), filas),
+        'Inicio de validez': inicio,
+        'Fin de validez': inicio + pd.to_timedelta(rng.integers(0, 10, filas), unit='D'),
+        'Modificado el': pd.Timestamp('2024-01-01'),
+        'Modificado por': 'SAPUSER',
+        'Centro de coste': rng.choice(np.array(['5083', '5146', None], dtype=object), filas),
+    })
+    return reporte.drop_duplicates(COLUMNAS_BUSQUEDA, ignore_index=True)
+
+
+def diagnostico_de(reporte, semilla=0):
+    """Mitad de las claves del reporte (con otro 'Modificado') y claves que el reporte no tiene"""
+    rng = np.random.default_rng(semilla)
+    diagnostico = reporte[COLUMNAS_BUSQUEDA].sample(frac=0.5, random_state=semilla)
+    ajenas = diagnostico.head(3).assign(**{'Número de personal': 99_999})
+    diagnostico = pd.concat([diagnostico, ajenas], ignore_index=True)
+    diagnostico['Modificado el'] = pd.Timestamp('2024-06-01') + pd.to_timedelta(
+        rng.integers(0, 30, len(diagnostico)), unit='D')
+    diagnostico['Modificado por'] = rng.choice(np.array(['DIAG1', 'DIAG2'], dtype=object), len(diagnostico))
+    return diagnostico
+
+
+def con_merge(reporte, diagnostico):
+    """El LEFT JOIN que hacía el Paso 1 antes de la clave empaquetada"""
+    unido = pd.merge(reporte, diagnostico[COLUMNAS_BUSQUEDA + COLUMNAS_MODIFICADO], on=COLUMNAS_BUSQUEDA,
+                     how='left', suffixes=('', '_diagnostico'))
+    assert len(unido) == len(reporte)
+    return unido[TRAIDAS]
+
+
+def _comparar_con_merge(reporte, diagnostico):
+    traidas, repetidas = buscar_modificados(reporte, diagnostico)
+    assert repetidas == 0
+    pd.testing.assert_frame_equal(traidas, con_merge(reporte, diagnostico))
+    return traidas
+
+
+def test_igual_que_merge():
+    reporte = reporte_sap()
+    traidas = _comparar_con_merge(reporte, diagnostico_de(reporte))
+    assert 0 < traidas['Modificado el_diagnostico'].notna().sum() < len(reporte)
+
+
+def test_igual_que_merge_con_enteros_leidos_como_float():
+    # Una celda vacía en el diagnóstico hace que Excel entregue la columna como float
+    reporte = reporte_sap()
+    diagnostico = diagnostico_de(reporte)
+    diagnostico['Número de personal'] = diagnostico['Número de personal'].astype(float)
+    diagnostico.loc[len(diagnostico)] = [np.nan, 1, '0100', pd.Timestamp('2024-01-01'),
+                                         pd.Timestamp('2024-01-02'), pd.Timestamp('2024-07-01'), 'DIAG3']
+    _comparar_con_merge(reporte, diagnostico)
+
+
+def test_claves_con_nat_y_none_coinciden_como_en_merge():
+    reporte = reporte_sap()
+    reporte.loc[[0, 1], 'Fin de validez'] = pd.NaT
+    reporte.loc[[1, 2], 'Clase absent./pres.'] = None
+    diagnostico = pd.concat([diagnostico_de(reporte.iloc[3:]), reporte.loc[[0, 1, 2], COLUMNAS_BUSQUEDA]],
+                            ignore_index=True)
+    diagnostico['Modificado el'] = diagnostico['Modificado el'].fillna(pd.Timestamp('2024-08-01'))
+    diagnostico['Modificado por'] = diagnostico['Modificado por'].fillna('NULOS')
+
+    traidas = _comparar_con_merge(reporte, diagnostico)
+    assert traidas.loc[[0, 1, 2], 'Modificado por_diagnostico'].tolist() == ['NULOS'] * 3
+
+
+@pytest.fixture
+def diagnostico_repetido():
+    """Una clave tres veces, desordenada por fecha, más una clave sin repetir"""
+    clave = {'Número de personal': 10_001, 'Número ID': 1, 'Clase absent./pres.': '0100',
+             'Inicio de validez': pd.Timestamp('2024-01-05'), 'Fin de validez': pd.Timestamp('2024-01-06')}
+    otra = dict(clave, **{'Número ID': 2})
+    return pd.DataFrame([
+        dict(clave, **{'Modificado el': pd.Timestamp('2024-03-01'), 'Modificado por': 'B'}),
+        dict(clave, **{'Modificado el': pd.Timestamp('2024-05-01'), 'Modificado por': 'C'}),
+        dict(otra, **{'Modificado el': pd.Timestamp('2024-02-01'), 'Modificado por': 'UNICA'}),
+        dict(clave, **{'Modificado el': pd.Timestamp('2024-01-01'), 'Modificado por': 'A'}),
+    ])
+
+
+@pytest.mark.parametrize('politica, esperado', [('reciente', 'C'), ('primero', 'B'), ('ultimo', 'A')])
+def test_politicas_de_duplicados(diagnostico_repetido, politica, esperado):
+    reporte = diagnostico_repetido.iloc[[0, 2]][COLUMNAS_BUSQUEDA].assign(
+        **{'Modificado el': pd.Timestamp('2024-01-01'), 'Modificado por': 'SAPUSER'}).reset_index(drop=True)
+
+    diagnostico, conflictos = resolver_duplicados(diagnostico_repetido, politica=politica)
+    assert conflictos == 2
+    assert len(diagnostico) == 2
+    traidas, repetidas = buscar_modificados(reporte, diagnostico)
+    assert repetidas == 0
+    assert traidas['Modificado por_diagnostico'].tolist() == [esperado, 'UNICA']
+
+    resultado = validar_ausentismos_df(diagnostico_repetido, reporte, politica_duplicados=politica)
+    assert len(resultado) == len(reporte)
+    assert resultado['modificado_por'].astype(str).tolist() == [esperado, 'UNICA']
+    assert resultado.attrs['validacion']['conflictos_diagnostico'] == 2
+
+
+def test_reciente_empate_gana_la_ultima_y_nat_pierde(diagnostico_repetido):
+    diagnostico = diagnostico_repetido.copy()
+    diagnostico.loc[0, 'Modificado el'] = pd.NaT
+    diagnostico.loc[3, 'Modificado el'] = diagnostico.loc[1, 'Modificado el']
+    resuelto, _ = resolver_duplicados(diagnostico, politica='reciente')
+    assert sorted(resuelto['Modificado por']) == ['A', 'UNICA']
+
+
+def test_sin_duplicados_devuelve_el_mismo_diagnostico():
+    reporte = reporte_sap()
+    diagnostico = diagnostico_de(reporte)
+    for politica in POLITICAS_DUPLICADOS:
+        resuelto, conflictos = resolver_duplicados(diagnostico, politica=politica)
+        assert resuelto is diagnostico and conflictos == 0
+
+
+def test_politica_desconocida():
+    with pytest.raises(ValueError, match='Opciones'):
+        resolver_duplicados(diagnostico_de(reporte_sap()), politica='mayoria')
+
+
+def test_indice_con_claves_repetidas_gana_la_primera():
+    claves_diag = np.array([7, 3, 7, 9, 3, 7], dtype=np.int64)
+    posiciones, distintas = indexar_diagnostico(claves_diag, np.array([3, 7, 9, 4], dtype=np.int64))
+    assert posiciones.tolist() == [1, 0, 3, -1]
+    assert distintas == 3
+
+
+def test_indice_de_diagnostico_vacio():
+    posiciones, distintas = indexar_diagnostico(np.array([], dtype=np.int64), np.array([1, 2], dtype=np.int64))
+    assert posiciones.tolist() == [-1, -1] and distintas == 0
@@ -0,0 +1,37 @@
+# Pruebas del join de tiendas - CECO ENTERO, MISMO CRUCE QUE EL MERGE DE TEXTO
+import numpy as np
+import pandas as pd
+
+from join_tiendas import TablaTiendas, buscar_tiendas, parsear_ceco
+
+
+def test_parsear_ceco():
+    serie = pd.Series(['5083', ' 5146 ', '1,101.0', '0101', '', None, 'abc', '12.5'], dtype=object)
+    assert parsear_ceco(serie).tolist() == [5083, 5146, 1101, 101, pd.NA, pd.NA, pd.NA, pd.NA]
+    assert parsear_ceco(pd.Series([101.0, np.nan, 2.5])).tolist() == [101, pd.NA, pd.NA]
+    assert parsear_ceco(pd.Series([7, 8])).dtype == 'Int64'
+
+
+def test_igual_que_merge_de_texto():
+    # CECO del CSV del Paso 1 (texto) contra el maestro leído del Excel (enteros), sin repetidos ni vacíos
+    reporte = pd.DataFrame({'centro_de_coste': ['5083', '5146', '9999', '5083', '7001']})
+    tiendas = pd.DataFrame({'myCECO': [5146, 5083, 7001, 1234],
+                            'value_tienda': ['Centro', 'Norte', 'Sur', 'Este']})
+
+    unido = pd.merge(reporte, tiendas.assign(ceco=tiendas['myCECO'].astype(str)).drop(columns='myCECO'),
+                     left_on='centro_de_coste', right_on='ceco', how='left')
+    traidas, estadisticas = buscar_tiendas(parsear_ceco(reporte['centro_de_coste']),
+                                           parsear_ceco(tiendas['myCECO']), tiendas[['value_tienda']])
+    assert traidas['value_tienda'].tolist() == unido['value_tienda'].tolist()
+    assert estadisticas['filas_con_tienda'] == 4
+    assert estadisticas['cecos_reporte'] == 4
+
+
+def test_vacios_no_coinciden_y_repetido_gana_el_primero():
+    tiendas = pd.DataFrame({'myCECO': ['0', '5083', '5083.0'], 'value_tienda': ['Cero', 'Primera', 'Segunda']})
+    tabla = TablaTiendas(parsear_ceco(tiendas['myCECO']), tiendas[['value_tienda']])
+    traidas, estadisticas = tabla.buscar(parsear_ceco(pd.Series(['', None, '5083', '0'], dtype=object)))
+
+    assert traidas['value_tienda'].tolist() == [np.nan, np.nan, 'Primera', 'Cero']
+    assert estadisticas['filas_sin_ceco'] == 2
+    assert estadisticas['cecos_repetidos_maestro'] == 1
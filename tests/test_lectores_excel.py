@@ -0,0 +1,50 @@
+# Pruebas de los lectores de Excel - BUFFERS TIPADOS POR COLUMNA MIENTRAS LLEGAN LOS LOTES
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from lectores_excel import _dataframe_desde_filas
+
+GRANDE = 2 ** 60  # GRANDE + 1 no entra exacto en float64
+
+ENCABEZADO = ('enteros', 'con_vacios', 'decimales', 'enteros_y_texto', 'ceros_a_la_izquierda', 'fechas',
+              'booleanos', 'grandes_y_texto', 'nulos_de_texto', None)
+FILAS = [
+    (1, 10, 1.0, 7, '0100', datetime(2024, 3, 1), True, GRANDE + 1, 'NA', None),
+    (2, None, 2.5, 8, '0200', datetime(2024, 3, 2), False, 1.5, 5, None),
+    (3, 30, 3.0, 9, 300, None, True, 'y', '', None),
+    (4, '', 4.0, 'x', '0400', datetime(2024, 3, 4), False, 3, 7, None),
+    (5, 50, 5.0, 11, '0500', datetime(2024, 3, 5), True, 4.0, '#N/A', None),
+    (None, None, None, None, None, None, None, None, None, None),  # vacía al final: se descarta
+]
+
+
+def leer(tamano_lote):
+    return _dataframe_desde_filas([ENCABEZADO] + FILAS, tamano_lote=tamano_lote)
+
+
+@pytest.mark.parametrize('tamano_lote', [1, 2, 4])
+def test_el_tamano_de_lote_no_cambia_el_resultado(tamano_lote):
+    esperado = leer(10_000)
+    df = leer(tamano_lote)
+    pd.testing.assert_frame_equal(df, esperado, check_exact=True)
+    for col in df.columns[df.dtypes == object]:
+        assert [type(v) for v in df[col]] == [type(v) for v in esperado[col]], col
+
+
+def test_tipos_por_columna():
+    df = leer(2)
+    assert len(df) == 5
+    assert list(df.columns) == list(ENCABEZADO[:-1])  # la última, sin nombre ni datos, no queda
+    assert df['enteros'].dtype == np.int64
+    assert df['con_vacios'].dtype == np.float64 and df['con_vacios'].isna().sum() == 2
+    assert df['decimales'].dtype == np.float64
+    assert df['enteros_y_texto'].tolist() == [7, 8, 9, 'x', 11]
+    assert df['ceros_a_la_izquierda'].dtype == np.int64  # como pandas: todo parece número
+    assert df['fechas'].dtype.kind == 'M'
+    assert df['booleanos'].dtype == bool
+    # El entero grande no pasa por float64 aunque su lote también traiga decimales
+    assert df['grandes_y_texto'].tolist() == [GRANDE + 1, 1.5, 'y', 3, 4]
+    assert df['nulos_de_texto'].isna().tolist() == [True, False, True, False, True]
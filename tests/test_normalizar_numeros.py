@@ -0,0 +1,40 @@
+# Pruebas de la normalización numérica - MISMOS TEXTOS QUE LA VERSIÓN ANTERIOR, VALOR A VALOR
+import numpy as np
+import pandas as pd
+import pytest
+
+from normalizar_numeros import normalizar_numeros
+
+
+def normalizar_anterior(serie):
+    """Cuerpo de normalizar_numeros_vectorizado antes del kernel (referencia)"""
+    serie_str = serie.astype(str)
+    serie_str = serie_str.str.replace(',', '.')
+    serie_num = pd.to_numeric(serie_str, errors='coerce')
+    mask_numerico = serie_num.notna()
+    resultado = serie_str.copy()
+    valores_enteros = (serie_num % 1 == 0) & mask_numerico
+    resultado.loc[valores_enteros] = serie_num.loc[valores_enteros].astype(int).astype(str)
+    valores_decimales = (serie_num % 1 != 0) & mask_numerico
+    if valores_decimales.any():
+        resultado.loc[valores_decimales] = serie_num.loc[valores_decimales].astype(str)
+    return resultado.replace(['nan', 'None', 'NaT', '<NA>', ''], '')
+
+
+COLUMNAS = {
+    'enteros': pd.Series([3, 100, -7, 0]),
+    'floats_con_nan': pd.Series([26.0, np.nan, 12.5, 0.0]),
+    'texto_con_coma': pd.Series(['2,5', '3', '0100', None, '', 'abc', '1,0']),
+    'codigos_con_ceros': pd.Series(['0100', '0200', '0940', '0100']),
+    'mezcla_objeto': pd.Series([1, '1', True, 2.5, None, 'x'], dtype=object),
+    'texto_pandas': pd.Series(['7.50', '8', None, 'N/D'], dtype='str'),
+}
+
+
+@pytest.mark.parametrize('nombre', list(COLUMNAS))
+def test_igual_que_la_version_anterior(nombre):
+    serie = COLUMNAS[nombre].rename(nombre)
+    esperado = normalizar_anterior(serie)
+    obtenido = normalizar_numeros(serie)
+    assert obtenido.astype(object).tolist() == esperado.astype(object).tolist()
+    assert obtenido.name == nombre
@@ -0,0 +1,45 @@
+# Pruebas de los pasos de la app - EL PASO 1 COMO TRABAJO, SIN POOL ANIDADO EN EL PROCESO DEL GESTOR
+import io
+
+import pandas as pd
+import pytest
+
+from lectores_excel import ArchivoEnMemoria
+from pasos_nomina import EJECUTOR_TRABAJO, trabajo_validacion
+from trabajos import GestorTrabajos
+
+CLAVE = {'Número de personal': [10_001, 10_002, 10_003], 'Número ID': [1, 1, 2],
+         'Clase absent./pres.': ['0100', '0200', '0100'],
+         'Inicio de validez': pd.to_datetime(['2024-01-05', '2024-02-01', '2024-03-10']),
+         'Fin de validez': pd.to_datetime(['2024-01-06', '2024-02-03', '2024-03-10'])}
+
+
+def _excel(df, nombre):
+    destino = io.BytesIO()
+    df.to_excel(destino, index=False)
+    return ArchivoEnMemoria(destino.getvalue(), nombre)
+
+
+@pytest.fixture
+def entradas():
+    reporte = pd.DataFrame(dict(CLAVE, **{'Modificado el': pd.Timestamp('2024-01-01'), 'Modificado por': 'SAPUSER',
+                                          'Centro de coste': ['5083', '5146', '5083']}))
+    diagnostico = pd.DataFrame(dict(CLAVE, **{'Modificado el': pd.Timestamp('2024-06-01'),
+                                              'Modificado por': ['DIAG1', 'DIAG2', 'DIAG1']})).iloc[:2]
+    return _excel(diagnostico, 'base_diagnosticos.xlsx'), _excel(reporte, 'Reporte 45.xlsx')
+
+
+def test_paso1_lee_sus_excel_en_serie_dentro_del_trabajo(entradas, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # el trabajo escribe en salidas/
+    gestor = GestorTrabajos(max_trabajadores=1)
+    try:
+        trabajo = gestor.enviar('paso1', trabajo_validacion, *entradas, 'prueba', ('csv', None), False)
+        gestor.esperar(trabajo.id, timeout=120)
+    finally:
+        gestor.cerrar()
+
+    assert trabajo.estado == 'terminado', trabajo.detalle_error
+    assert trabajo.resultado['filas'] == 3
+    assert trabajo.resultado['carga']['ejecutor'] == EJECUTOR_TRABAJO == 'secuencial'
+    salida = pd.read_csv(trabajo.resultado['descarga'][0], dtype=str)
+    assert salida['modificado_por'].tolist() == ['DIAG1', 'DIAG2', 'SAPUSER']
@@ -0,0 +1,23 @@
+# Pruebas de la política de tipos - LIMPIEZA DE TEXTO IGUAL EN CATEGÓRICAS Y EN TEXTO
+import pandas as pd
+
+from tipos_columnas import limpiar_texto
+
+NULOS = ['nan', 'None', 'NaT', '<NA>', '0.0']
+
+
+def test_nulo_en_categorica_sigue_nulo():
+    texto = pd.Series(['a', None, 'b', 'None', '0.0'], dtype='str', name='col')
+    categorica = texto.astype('category')
+
+    limpia = limpiar_texto(categorica, NULOS)
+    assert limpia.isna().tolist() == [False, True, False, False, False]
+    assert limpia.astype(object).fillna('<nulo>').tolist() == \
+        limpiar_texto(texto, NULOS).astype(object).fillna('<nulo>').tolist() == ['a', '<nulo>', 'b', '', '']
+    assert limpia.name == 'col'
+
+
+def test_categorias_que_quedan_iguales_se_fusionan():
+    limpia = limpiar_texto(pd.Series(['nan', '', 'x', None, 'nan']).astype('category'), NULOS)
+    assert sorted(limpia.cat.categories) == ['', 'x']
+    assert limpia.astype(object).fillna('<nulo>').tolist() == ['', '', 'x', '<nulo>', '']
@@ -0,0 +1,72 @@
+# Pruebas del gestor de trabajos - PROCESOS, AVANCE, CANCELACIÓN Y ERRORES
+import os
+import time
+
+import pytest
+
+from trabajos import GestorTrabajos
+
+ETAPAS = ('uno', 'dos', 'tres')
+
+
+def _por_etapas(trabajo, pausa=0.0):
+    """Trabajo de prueba: tres etapas y el pid del proceso donde corrió"""
+    for nombre in ETAPAS:
+        with trabajo.informe.etapa(nombre, filas=1):
+            time.sleep(pausa)
+    return {'pid': os.getpid(), 'id': trabajo.id}
+
+
+def _falla(trabajo):
+    with trabajo.informe.etapa('uno'):
+        pass
+    raise KeyError('columna_que_no_esta')
+
+
+@pytest.fixture
+def gestor():
+    gestor = GestorTrabajos(max_trabajadores=2)
+    yield gestor
+    gestor.cerrar()
+
+
+def test_corre_en_otro_proceso_con_sus_etapas(gestor):
+    trabajo = gestor.enviar('prueba', _por_etapas, etapas=ETAPAS, al_terminar=lambda r: {**r, 'visto': True})
+    gestor.esperar(trabajo.id, timeout=60)
+
+    assert trabajo.estado == 'terminado'
+    assert trabajo.resultado['pid'] != os.getpid()
+    assert trabajo.resultado['id'] == trabajo.id
+    assert trabajo.resultado['visto']  # al_terminar corre en la página
+    assert trabajo.progreso == 1.0
+    assert [etapa['etapa'] for etapa in trabajo.informe.etapas] == list(ETAPAS)
+    assert {etapa['corrida'] for etapa in trabajo.informe.etapas} == {trabajo.informe.id}
+
+
+def test_dos_trabajos_a_la_vez_usan_dos_procesos(gestor):
+    trabajos = [gestor.enviar('prueba', _por_etapas, 0.3, etapas=ETAPAS) for _ in range(2)]
+    for trabajo in trabajos:
+        gestor.esperar(trabajo.id, timeout=60)
+    assert len({trabajo.resultado['pid'] for trabajo in trabajos}) == 2
+
+
+def test_cancelar_corta_al_cerrar_la_etapa(gestor):
+    trabajo = gestor.enviar('prueba', _por_etapas, 0.5, etapas=ETAPAS)
+    while not trabajo.informe.etapas:
+        time.sleep(0.01)
+    assert gestor.cancelar(trabajo.id)
+    gestor.esperar(trabajo.id, timeout=60)
+
+    assert trabajo.estado == 'cancelado'
+    assert trabajo.progreso < 1.0
+    assert trabajo.resultado is None
+
+
+def test_error_vuelve_con_su_traceback(gestor):
+    trabajo = gestor.enviar('prueba', _falla, etapas=ETAPAS)
+    gestor.esperar(trabajo.id, timeout=60)
+
+    assert trabajo.estado == 'error'
+    assert trabajo.error.startswith('KeyError')
+    assert '_falla' in trabajo.detalle_error
+    assert [etapa['etapa'] for etapa in trabajo.informe.etapas] == ['uno']
@@ -0,0 +1,60 @@
+# Pruebas de la validación incremental - MISMO CSV QUE LA CORRIDA COMPLETA
+import numpy as np
+import pandas as pd
+import pytest
+
+from cache_excel import PARQUET_DISPONIBLE
+from join_diagnostico import COLUMNAS_BUSQUEDA
+from part1_validation_reporte_45 import validar_ausentismos_df
+from validacion_incremental import validar_incremental
+
+pytestmark = pytest.mark.skipif(not PARQUET_DISPONIBLE, reason="el estado incremental se guarda en Parquet")
+
+
+def reporte_y_diagnostico(filas=60, semilla=0):
+    rng = np.random.default_rng(semilla)
+    inicio = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(filas) % 50, unit='D')
+    reporte = pd.DataFrame({
+        'Número de personal': 10_000 + np.arange(filas),
+        'Número ID': rng.integers(1, 4, filas),
+        'Clase absent./pres.': rng.choice(np.array(['0100', '0200', '0300'], dtype=object), filas),
+        'Inicio de validez': inicio,
+        'Fin de validez': inicio + pd.to_timedelta(rng.integers(0, 10, filas), unit='D'),
+        'Modificado el': pd.Timestamp('2024-01-01'),
+        'Modificado por': 'SAPUSER',
+        'Días presenc./abs.': rng.choice(np.array(['1', '2,5', '3.0', None], dtype=object), filas),
+        'Centro de coste': rng.choice(np.array(['05083', '5146.0', None], dtype=object), filas),
+    })
+    diagnostico = reporte[COLUMNAS_BUSQUEDA].iloc[::3].copy()
+    diagnostico['Modificado el'] = pd.Timestamp('2024-06-01')
+    diagnostico['Modificado por'] = 'DIAG1'
+    return reporte, diagnostico.reset_index(drop=True)
+
+
+def _csv_completo(diagnostico, reporte, politica='reciente'):
+    return validar_ausentismos_df(diagnostico, reporte, politica).to_csv(index=False)
+
+
+@pytest.mark.parametrize('politica', ['reciente', 'primero', 'ultimo'])
+def test_incremental_igual_que_completo(tmp_path, politica):
+    reporte, diagnostico = reporte_y_diagnostico()
+    primera = validar_incremental(diagnostico, reporte, tmp_path, validar_ausentismos_df, politica)
+    assert primera.attrs['incremental']['filas_reutilizadas'] == 0
+
+    # Segunda corrida: filas cambiadas, una nueva, otra que desaparece y el diagnóstico que se mueve
+    reporte = reporte.drop(index=5).reset_index(drop=True)
+    reporte.loc[[0, 10], 'Modificado por'] = 'OTRO'
+    reporte.loc[20, 'Días presenc./abs.'] = '7,5'
+    nueva = reporte.iloc[[3]].assign(**{'Número de personal': 20_000})
+    reporte = pd.concat([reporte, nueva], ignore_index=True)
+    diagnostico.loc[1, 'Modificado por'] = 'DIAG2'
+    diagnostico = pd.concat([diagnostico, diagnostico.iloc[[2]].assign(**{'Modificado por': 'DIAG3'})],
+                            ignore_index=True)
+
+    segunda = validar_incremental(diagnostico, reporte, tmp_path, validar_ausentismos_df, politica, verificar=True)
+    resumen = segunda.attrs['incremental']
+    assert resumen['identico']
+    assert 0 < resumen['filas_reprocesadas'] < len(reporte)
+    assert resumen['filas_reutilizadas'] > len(reporte) // 2
+    assert segunda.to_csv(index=False) == _csv_completo(diagnostico, reporte, politica)
+    assert segunda.attrs['validacion']['conflictos_diagnostico'] == 1
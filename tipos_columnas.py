@@ -0,0 +1,83 @@
+# Política de tipos - COLUMNAS DE POCA CARDINALIDAD COMO CATEGÓRICAS
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_object_dtype, is_string_dtype
+
+# Columnas que SIEMPRE se guardan como categóricas (decenas a miles de valores distintos)
+COLUMNAS_CATEGORICAS = [
+    'clase_absentpres', 'txtclpresab', 'division_de_personal', 'texto_division_pers',
+    'area_de_personal', 'sexo', 'modificado_por', 'estado_empleado',
+    'nombre_tienda', 'value_tienda',
+]
+
+# Detección automática: distintos / filas por debajo de este valor
+UMBRAL_CARDINALIDAD = 0.05
+
+# Por debajo de estas filas no compensa (categorías + códigos ocupan más que el texto)
+MIN_FILAS_AUTO = 1_000
+
+
+def es_categorica(serie):
+    return isinstance(serie.dtype, pd.CategoricalDtype)
+
+
+def columnas_categoricas(df, columnas=COLUMNAS_CATEGORICAS, umbral=UMBRAL_CARDINALIDAD):
+    """Columnas a convertir: las configuradas + texto con ratio de cardinalidad <= umbral"""
+    elegidas = [col for col in columnas if col in df.columns]
+    if umbral and len(df) >= MIN_FILAS_AUTO:
+        for col in df.columns:
+            if col in elegidas or es_categorica(df[col]):
+                continue
+            if is_object_dtype(df[col].dtype) or is_string_dtype(df[col].dtype):
+                if df[col].nunique(dropna=False) <= umbral * len(df):
+                    elegidas.append(col)
+    return elegidas
+
+
+def aplicar_categoricas(df, columnas=COLUMNAS_CATEGORICAS, umbral=UMBRAL_CARDINALIDAD):
+    """Convierte in-place las columnas de la política a 'category'; devuelve las convertidas"""
+    convertidas = []
+    for col in columnas_categoricas(df, columnas, umbral):
+        if not es_categorica(df[col]):
+            df[col] = df[col].astype('category')
+            convertidas.append(col)
+    return convertidas
+
+
+def rellenar_vacios(df, valor=''):
+    """df.fillna(valor) que también funciona con categóricas (agrega la categoría si falta)"""
+    for col in df.columns:
+        serie = df[col]
+        if es_categorica(serie) and serie.isna().any() and valor not in serie.cat.categories:
+            df[col] = serie.cat.add_categories([valor])
+    return df.fillna(valor)
+
+
+def limpiar_texto(serie, nulos, reemplazo=''):
+    """serie.astype(str).replace(nulos, reemplazo); en categóricas solo se tocan las categorías"""
+    if not es_categorica(serie):
+        return serie.astype(str).replace(nulos, reemplazo)
+    categorias = pd.Series(serie.cat.categories).astype(str).replace(nulos, reemplazo)
+    # Categorías que quedaron iguales (p. ej. 'nan' y '') se fusionan con los códigos
+    codigos_nuevos, categorias_nuevas = pd.factorize(categorias)
+    codigos = serie.cat.codes.to_numpy()
+    # Código -1 (nulo) sigue nulo: codigos_nuevos[-1] lo mandaría a la última categoría
+    return pd.Series(
+        pd.Categorical.from_codes(
+            np.where(codigos < 0, -1, codigos_nuevos[codigos]) if len(codigos_nuevos) else codigos,
+            categories=categorias_nuevas,
+        ),
+        index=serie.index,
+        name=serie.name,
+    )
+
+
+def asignar_valores(df, mascara, col, valores):
+    """df.loc[mascara, col] = valores, ampliando las categorías si la columna es categórica"""
+    if isinstance(valores, pd.Series) and es_categorica(valores):
+        valores = valores.astype(object)  # categorías distintas no se pueden asignar tal cual
+    if es_categorica(df[col]):
+        nuevas = pd.Index(pd.Series(valores).dropna().unique()).difference(df[col].cat.categories)
+        if len(nuevas):
+            df[col] = df[col].cat.add_categories(nuevas)
+    df.loc[mascara, col] = valores
@@ -0,0 +1,305 @@
+# Trabajos en segundo plano - COLA ACOTADA, UN PROCESO POR TRABAJO, AVANCE POR ETAPAS Y CANCELACIÓN
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from carga_paralela import METODO_INICIO
+from instrumentacion import InformeEjecucion
+
+ESTADOS = ('en_cola', 'ejecutando', 'terminado', 'error', 'cancelado')
+FINALES = ('terminado', 'error', 'cancelado')
+
+# Trabajos a la vez: cada uno en su proceso (el pipeline es CPU en Python y con hilos el GIL los turna)
+MAX_TRABAJADORES_POR_DEFECTO = int(os.environ.get('VALIDADOR_TRABAJADORES', os.cpu_count() or 1))
+
+# Trabajos terminados que se conservan (con su resultado) para reruns y otras pestañas
+MAX_TERMINADOS_POR_DEFECTO = 32
+
+# Cada cuánto el hilo que vigila un trabajo mira si su proceso terminó (las etapas llegan al instante)
+_ESPERA_COLA = 0.2
+
+
+class TrabajoCancelado(Exception):
+    """Se lanza en el límite de una etapa cuando alguien pidió cancelar"""
+
+
+class TrabajoEnProceso:
+    """Lo que recibe funcion(trabajo, ...) en el proceso trabajador
+
+    Se usa igual que antes el Trabajo (trabajo.id, trabajo.informe,
+    trabajo.verificar_cancelacion()): cada etapa que cierra el informe viaja
+    por la cola al Trabajo del gestor y, en ese mismo límite, se corta si
+    alguien pidió cancelar.
+    """
+
+    def __init__(self, id_trabajo, tipo, id_corrida, etapas, cancelar):
+        self.id = id_trabajo
+        self.tipo = tipo
+        self.informe = InformeEjecucion(tipo, observadores=[self._al_cerrar_etapa])
+        self.informe.id = id_corrida  # el mismo del espejo en la página
+        self._etapas = etapas
+        self._cancelar = cancelar
+
+    def _al_cerrar_etapa(self, etapa):
+        self._etapas.put(etapa)
+        if self._cancelar.is_set() and 'error' not in etapa:
+            raise TrabajoCancelado(f"Cancelado después de '{etapa['etapa']}'")
+
+    def verificar_cancelacion(self):
+        """Para puntos de corte fuera de las etapas (entre un paso y otro)"""
+        if self._cancelar.is_set():
+            raise TrabajoCancelado("Cancelado")
+
+
+def _correr_en_proceso(funcion, args, kwargs, id_trabajo, tipo, id_corrida, etapas, cancelar):
+    """Corre en el proceso trabajador: (estado, resultado, error, traceback)
+
+    Los errores vuelven como texto, con el traceback de este lado (una
+    excepción cualquiera podría no sobrevivir al pickle).
+    """
+    trabajo = TrabajoEnProceso(id_trabajo, tipo, id_corrida, etapas, cancelar)
+    try:
+        return 'terminado', funcion(trabajo, *args, **kwargs), None, None
+    except TrabajoCancelado as e:
+        return 'cancelado', None, str(e), None
+    except Exception as e:
+        return 'error', None, f"{type(e).__name__}: {e}", traceback.format_exc()
+
+
+class Trabajo:
+    """Un Paso 1 o Paso 2 en cola / corriendo / terminado, visto desde la página
+
+    funcion(trabajo, *args, **kwargs) corre en un proceso del gestor y recibe un
+    TrabajoEnProceso para pasar trabajo.informe a la pipeline; lo que devuelve
+    (por pickle: conviene que sea chico) queda en trabajo.resultado. Las etapas
+    llegan mientras corre a trabajo.informe (el avance sale de ahí). La
+    cancelación es cooperativa: se corta al cerrar la etapa en curso (o antes
+    de empezar, si sigue en cola).
+    """
+
+    def __init__(self, tipo, etapas, dueno=None, descripcion='', cancelar=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.tipo = tipo
+        self.dueno = dueno
+        self.descripcion = descripcion
+        self.etapas_esperadas = tuple(etapas)
+        self.estado = 'en_cola'
+        self.creado = datetime.now().isoformat(timespec='seconds')
+        self.iniciado = None
+        self.terminado = None
+        self.etapa_actual = None
+        self.resultado = None
+        self.error = None
+        self.detalle_error = None
+        self.segundos = None
+        # Espejo de las etapas que mide el proceso: acá no se mide nada
+        self.informe = InformeEjecucion(tipo, memoria='ninguna')
+        self._hechas = set()
+        self._cancelar = cancelar if cancelar is not None else threading.Event()
+        self._futuro = None
+
+    @property
+    def progreso(self):
+        """Fracción de las etapas esperadas que ya terminaron (1.0 al terminar bien)"""
+        if self.estado == 'terminado':
+            return 1.0
+        if not self.etapas_esperadas:
+            return 0.0
+        return min(len(self._hechas) / len(self.etapas_esperadas), 1.0)
+
+    @property
+    def cancelacion_pedida(self):
+        return self._cancelar.is_set()
+
+    def _registrar_etapa(self, etapa):
+        self.informe.etapas.append(etapa)
+        if etapa['etapa'] in self.etapas_esperadas:
+            self._hechas.add(etapa['etapa'])
+        self.etapa_actual = etapa['etapa']
+
+    def _terminar(self, estado):
+        self.estado = estado
+        self.terminado = datetime.now().isoformat(timespec='seconds')
+
+    def resumen(self):
+        return {
+            'id': self.id,
+            'tipo': self.tipo,
+            'dueno': self.dueno,
+            'descripcion': self.descripcion,
+            'estado': self.estado,
+            'progreso': round(self.progreso, 3),
+            'etapa_actual': self.etapa_actual,
+            'creado': self.creado,
+            'iniciado': self.iniciado,
+            'terminado': self.terminado,
+            'error': self.error,
+        }
+
+
+class GestorTrabajos:
+    """Pool acotado de trabajos, uno por proceso (st.cache_resource) y compartido entre sesiones
+
+        gestor = GestorTrabajos()
+        trabajo = gestor.enviar('paso1', trabajo_validacion, base, reporte,
+                                etapas=ETAPAS_PASO1, dueno=sesion)
+        gestor.obtener(trabajo.id).progreso   # en cualquier rerun
+        gestor.cancelar(trabajo.id)
+
+    Cada trabajo corre en un proceso del pool (forkserver/spawn): dos trabajos
+    usan dos núcleos de verdad. Por eso funcion tiene que poder importarse
+    (estar en un módulo, no en app.py ni ser una lambda) y los argumentos
+    viajan por pickle. En la página, un hilo por trabajo espera al proceso y
+    pasa sus etapas al Trabajo; el resultado vive en el gestor, no en el
+    script, así que sobrevive a los reruns. al_terminar(resultado), si se da,
+    corre en este proceso al terminar bien y lo que devuelve queda como
+    resultado (p. ej. para guardar en caches de la página lo que el proceso
+    preparó). Con más trabajos que trabajadores, el resto espera 'en_cola'.
+    Los terminados más viejos salen cuando hay más de max_terminados.
+    """
+
+    def __init__(self, max_trabajadores=MAX_TRABAJADORES_POR_DEFECTO, max_terminados=MAX_TERMINADOS_POR_DEFECTO,
+                 metodo_inicio=METODO_INICIO):
+        self.max_trabajadores = max(1, max_trabajadores)
+        self.max_terminados = max_terminados
+        self._contexto = multiprocessing.get_context(metodo_inicio)
+        # Los hilos solo esperan (sin GIL de por medio): tantos como procesos, así la cola es una sola
+        self._hilos = ThreadPoolExecutor(max_workers=self.max_trabajadores, thread_name_prefix='trabajo')
+        self._procesos = None
+        self._manager = None  # colas de etapas y eventos de cancelación entre procesos
+        self._trabajos = OrderedDict()  # id -> Trabajo, en orden de envío
+        self._lock = threading.Lock()
+
+    def _iniciar_manager(self):
+        with self._lock:
+            if self._manager is None:
+                self._manager = self._contexto.Manager()
+            return self._manager
+
+    def _pool_procesos(self, roto=None):
+        """El pool de procesos (se arranca con el primer trabajo); si roto es el actual, se reemplaza"""
+        with self._lock:
+            if self._procesos is not None and self._procesos is roto:
+                self._procesos.shutdown(wait=False, cancel_futures=True)
+                self._procesos = None
+            if self._procesos is None:
+                self._procesos = ProcessPoolExecutor(max_workers=self.max_trabajadores, mp_context=self._contexto)
+            return self._procesos
+
+    def enviar(self, tipo, funcion, *args, etapas=(), dueno=None, descripcion='', al_terminar=None, **kwargs):
+        """Encola funcion(trabajo, *args, **kwargs) y devuelve el Trabajo (sin esperar)"""
+        manager = self._iniciar_manager()
+        trabajo = Trabajo(tipo, etapas, dueno=dueno, descripcion=descripcion, cancelar=manager.Event())
+        cola = manager.Queue()
+        with self._lock:
+            self._trabajos[trabajo.id] = trabajo
+            self._podar()
+        trabajo._futuro = self._hilos.submit(self._vigilar, trabajo, cola, funcion, args, kwargs, al_terminar)
+        return trabajo
+
+    def _vigilar(self, trabajo, cola, funcion, args, kwargs, al_terminar):
+        """Hilo de la página: manda el trabajo a un proceso y le pasa las etapas hasta que termine"""
+        if trabajo.cancelacion_pedida:
+            trabajo._terminar('cancelado')
+            return None
+        trabajo.estado = 'ejecutando'
+        trabajo.iniciado = datetime.now().isoformat(timespec='seconds')
+        inicio = time.perf_counter()
+        try:
+            pool = self._pool_procesos()
+            futuro = pool.submit(_correr_en_proceso, funcion, args, kwargs, trabajo.id, trabajo.tipo,
+                                 trabajo.informe.id, cola, trabajo._cancelar)
+            while not futuro.done():
+                try:
+                    trabajo._registrar_etapa(cola.get(timeout=_ESPERA_COLA))
+                except queue.Empty:
+                    pass
+            try:
+                estado, resultado, trabajo.error, trabajo.detalle_error = futuro.result()
+            except BrokenProcessPool:
+                self._pool_procesos(roto=pool)  # murió un proceso (memoria, señal): los próximos usan otro pool
+                raise
+            # El proceso ya devolvió: todas sus etapas están en la cola
+            while True:
+                try:
+                    trabajo._registrar_etapa(cola.get_nowait())
+                except queue.Empty:
+                    break
+            if estado == 'terminado' and al_terminar is not None:
+                resultado = al_terminar(resultado)
+            trabajo.resultado = resultado
+            trabajo._terminar(estado)
+        except Exception as e:
+            trabajo.error = f"{type(e).__name__}: {e}"
+            trabajo.detalle_error = traceback.format_exc()
+            trabajo._terminar('error')
+        finally:
+            trabajo.segundos = round(time.perf_counter() - inicio, 3)
+        return trabajo.resultado
+
+    def obtener(self, id_trabajo):
+        with self._lock:
+            return self._trabajos.get(id_trabajo)
+
+    def listar(self, dueno=None):
+        """Trabajos (de un dueño o todos), del más nuevo al más viejo"""
+        with self._lock:
+            trabajos = list(self._trabajos.values())
+        return [trabajo for trabajo in reversed(trabajos) if dueno is None or trabajo.dueno == dueno]
+
+    def cancelar(self, id_trabajo):
+        """Pide cancelar: si sigue en cola no llega a correr; si corre, para al cerrar su etapa"""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo is None or trabajo.estado in FINALES:
+            return False
+        trabajo._cancelar.set()
+        if trabajo._futuro is not None and trabajo._futuro.cancel():
+            trabajo._terminar('cancelado')
+        return True
+
+    def descartar(self, id_trabajo):
+        """Libera un trabajo terminado (y su resultado)"""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is None or trabajo.estado not in FINALES:
+                return False
+            del self._trabajos[id_trabajo]
+            return True
+
+    def esperar(self, id_trabajo, timeout=None):
+        """Bloquea hasta que el trabajo termine (CLI / pruebas); devuelve el Trabajo"""
+        trabajo = self.obtener(id_trabajo)
+        if trabajo is not None and trabajo._futuro is not None and not trabajo._futuro.cancelled():
+            trabajo._futuro.result(timeout=timeout)
+        return trabajo
+
+    def cerrar(self):
+        """Espera lo que esté corriendo y apaga hilos, procesos y manager (CLI / pruebas)"""
+        self._hilos.shutdown(wait=True)
+        with self._lock:
+            if self._procesos is not None:
+                self._procesos.shutdown(wait=True)
+            if self._manager is not None:
+                self._manager.shutdown()
+            self._procesos = self._manager = None
+
+    def _podar(self):
+        terminados = [id_trabajo for id_trabajo, trabajo in self._trabajos.items() if trabajo.estado in FINALES]
+        for id_trabajo in terminados[:max(0, len(terminados) - self.max_terminados)]:
+            del self._trabajos[id_trabajo]
+
+    def estadisticas(self):
+        with self._lock:
+            estados = [trabajo.estado for trabajo in self._trabajos.values()]
+        return {
+            'trabajadores': self.max_trabajadores,
+            **{estado: estados.count(estado) for estado in ESTADOS},
+        }
@@ -0,0 +1,256 @@
+# Validación incremental - HUELLA POR FILA: SOLO SE REPROCESA LO QUE CAMBIÓ
+import csv
+import io
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.util import hash_pandas_object
+
+from cache_excel import PARQUET_DISPONIBLE
+from instrumentacion import decir
+from join_diagnostico import COLUMNAS_BUSQUEDA, COLUMNAS_MODIFICADO, buscar_modificados, resolver_duplicados
+from tipos_columnas import es_categorica
+
+# Subir cuando cambie la lógica del Paso 1: invalida las huellas guardadas
+VERSION_ESTADO = 1
+
+SUFIJO = '_diagnostico'
+
+
+def huellas_filas(df_reporte, df_traidas):
+    """Un uint64 por fila: valores del reporte + lo que el diagnóstico le aporta"""
+    return hash_pandas_object(pd.concat([df_reporte, df_traidas], axis=1), index=False).to_numpy()
+
+
+def firma_entrada(df_reporte, df_diagnostico, politica_duplicados, categoricas):
+    """Lo que tiene que coincidir con la corrida anterior para reutilizar sus filas
+
+    Los dtypes cuentan: una columna que hoy se lee como float y ayer como int
+    se formatea distinto aunque los valores sean iguales.
+    """
+    return {
+        'version': VERSION_ESTADO,
+        'reporte': [[str(col), str(dtype)] for col, dtype in df_reporte.dtypes.items()],
+        'diagnostico': [[str(col), str(dtype)] for col, dtype in df_diagnostico[COLUMNAS_MODIFICADO].dtypes.items()],
+        'politica_duplicados': politica_duplicados,
+        'categoricas': bool(categoricas),
+    }
+
+
+def contexto_columnas(df_reporte, df_traidas):
+    """(filas testigo, firma del contexto) de las decisiones que se toman por columna
+
+    Algunas decisiones del Paso 1 son por columna y no por fila: una fecha se
+    escribe sin hora solo si TODA la columna cae a medianoche, y que haya nulos
+    o coincidencias con el diagnóstico puede cambiar el dtype. La firma (hay
+    nulos / hay valores / hay fechas con hora, por columna) tiene que coincidir
+    con la de la corrida anterior para reutilizar sus filas; las testigo (un
+    nulo, un no nulo y una fecha con hora de cada columna) se reprocesan junto
+    con las nuevas para que el subconjunto decida igual que el archivo completo.
+    """
+    contexto = df_reporte.copy(deep=False)
+    for col in COLUMNAS_MODIFICADO:
+        traida = df_traidas[f"{col}{SUFIJO}"]
+        contexto[col] = traida.where(traida.notna(), contexto[col])
+    contexto = pd.concat([contexto, df_traidas], axis=1)
+
+    testigos, firma = set(), []
+    for posicion in range(contexto.shape[1]):
+        serie = contexto.iloc[:, posicion]
+        nulos = serie.isna().to_numpy()
+        mascaras = [nulos, ~nulos]
+        if serie.dtype.kind == 'M':
+            mascaras.append((serie != serie.dt.normalize()).to_numpy() & ~nulos)
+        presentes = [bool(mascara.any()) for mascara in mascaras]
+        testigos.update(int(mascara.argmax()) for mascara, hay in zip(mascaras, presentes) if hay)
+        firma.append([str(contexto.columns[posicion])] + presentes)
+    return np.array(sorted(testigos), dtype=np.int64), firma
+
+
+def _juntar(df_anterior, df_parcial, origen):
+    """Fila i = fila origen[i] de df_anterior + df_parcial (uno debajo del otro)
+
+    Las categóricas se unen por categorías (solo se mueven códigos).
+    """
+    columnas = {}
+    for col in df_anterior.columns:
+        anterior, parcial = df_anterior[col], df_parcial[col]
+        if es_categorica(anterior) or es_categorica(parcial):
+            unidas = union_categoricals([anterior.astype('category'), parcial.astype('category')], ignore_order=True)
+            columnas[col] = unidas.take(origen)
+        else:
+            columnas[col] = pd.concat([anterior, parcial], ignore_index=True).array.take(origen)
+    return pd.DataFrame(columnas)
+
+
+def lineas_csv(df):
+    """Cada fila como la escribe df.to_csv(index=False): después del Paso 1 todo es texto o nulo"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator=os.linesep)
+    lineas = np.empty(len(df), dtype=object)
+    columnas = [df[col].to_numpy(dtype=object, na_value='') for col in df.columns]
+    for i, fila in enumerate(zip(*columnas)):
+        escritor.writerow(fila)
+        lineas[i] = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    return lineas
+
+
+def encabezado_csv(df):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator=os.linesep).writerow(df.columns)
+    return buffer.getvalue()
+
+
+class EstadoIncremental:
+    """Resultado de la última corrida + huella y línea CSV de cada fila, en un directorio
+
+    resultado.parquet (columnas del Paso 1 + '__huella' + '__linea')
+    y firma.json. Las líneas permiten escribir el CSV sin volver a formatearlo.
+    """
+
+    ARCHIVO = 'resultado.parquet'
+    FIRMA = 'firma.json'
+    COLUMNA_HUELLA = '__huella'
+    COLUMNA_LINEA = '__linea'
+
+    def __init__(self, directorio):
+        self.directorio = Path(directorio)
+        self.encabezado = None
+        self.lineas = None  # las del último resultado, en orden
+
+    @property
+    def activo(self):
+        return PARQUET_DISPONIBLE
+
+    def cargar(self, firma):
+        """(resultado anterior, huellas, líneas) si la firma coincide; None si hay que correr completo"""
+        ruta_firma = self.directorio / self.FIRMA
+        ruta = self.directorio / self.ARCHIVO
+        if not self.activo or not ruta.exists() or not ruta_firma.exists():
+            return None
+        try:
+            if json.loads(ruta_firma.read_text(encoding='utf-8')) != firma:
+                decir("   ♻️ Cambió el layout, los tipos, el contexto o las opciones: corrida completa")
+                return None
+            df = pd.read_parquet(ruta)
+        except Exception as e:
+            print(f"   ⚠️ Estado incremental ilegible, se ignora: {e}")
+            return None
+        huellas = df.pop(self.COLUMNA_HUELLA).to_numpy(dtype=np.uint64)
+        lineas = df.pop(self.COLUMNA_LINEA).to_numpy(dtype=object)
+        return df, huellas, lineas
+
+    def guardar(self, df_resultado, huellas, lineas, firma):
+        self.encabezado = encabezado_csv(df_resultado)
+        self.lineas = lineas
+        if not self.activo:
+            return False
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        ruta = self.directorio / self.ARCHIVO
+        temporal = ruta.with_suffix('.tmp')
+        df_resultado.assign(**{self.COLUMNA_HUELLA: huellas, self.COLUMNA_LINEA: lineas}) \
+            .to_parquet(temporal, index=False)
+        temporal.replace(ruta)
+        (self.directorio / self.FIRMA).write_text(json.dumps(firma), encoding='utf-8')
+        return True
+
+    def texto_csv(self):
+        return self.encabezado + ''.join(self.lineas)
+
+    def escribir_csv(self, ruta):
+        """Mismos bytes que df.to_csv(ruta, index=False, encoding='utf-8-sig'), sin formatear filas"""
+        with open(ruta, 'w', encoding='utf-8-sig', newline='') as f:
+            f.write(self.encabezado)
+            f.writelines(self.lineas)
+        return ruta
+
+
+def validar_incremental(df_diagnostico, df_reporte, estado, validar, politica_duplicados='reciente',
+                        categoricas=True, verificar=False):
+    """Paso 1 reprocesando SOLO las filas nuevas o cambiadas desde la última corrida
+
+    estado: directorio o EstadoIncremental; después de la llamada
+    estado.escribir_csv(ruta) escribe el resultado con las líneas ya formateadas.
+    validar: la función del Paso 1 (validar_ausentismos_df). Una fila se reutiliza
+    si su huella (valores del reporte + 'Modificado el/por' que le trae el
+    diagnóstico) ya estaba en la corrida anterior; el resto, más unas filas
+    testigo, pasa por validar. verificar=True corre además el Paso 1 completo
+    y compara el CSV byte a byte (queda en attrs['incremental']['identico']).
+    """
+    if not isinstance(estado, EstadoIncremental):
+        estado = EstadoIncremental(estado)
+    inicio = time.perf_counter()
+
+    # Join completo solo para las huellas: es una búsqueda vectorizada, lo caro es lo demás
+    df_diagnostico, conflictos = resolver_duplicados(df_diagnostico, COLUMNAS_BUSQUEDA, politica_duplicados)
+    df_traidas, _ = buscar_modificados(df_reporte, df_diagnostico, COLUMNAS_BUSQUEDA, COLUMNAS_MODIFICADO, SUFIJO)
+    huellas = huellas_filas(df_reporte, df_traidas)
+    testigos, contexto = contexto_columnas(df_reporte, df_traidas)
+    firma = dict(firma_entrada(df_reporte, df_diagnostico, politica_duplicados, categoricas), contexto=contexto)
+    anterior = estado.cargar(firma)
+
+    if anterior is None:
+        decir("\n🧬 INCREMENTAL: sin estado previo utilizable, se valida todo")
+        df_resultado = validar(df_diagnostico, df_reporte, politica_duplicados, categoricas)
+        if df_resultado is None:
+            return None
+        lineas = lineas_csv(df_resultado)
+        reprocesadas, reutilizadas, solo_testigo = len(df_reporte), 0, 0
+    else:
+        df_anterior, huellas_anteriores, lineas_anteriores = anterior
+        unicas, primera = np.unique(huellas_anteriores, return_index=True)
+        posicion = pd.Index(unicas).get_indexer(huellas)
+        nuevas = posicion < 0
+        a_procesar = nuevas.copy()
+        a_procesar[testigos] = True
+        decir(f"\n🧬 INCREMENTAL: {int(nuevas.sum()):,} filas nuevas o cambiadas de {len(df_reporte):,} "
+              f"(+{int((a_procesar & ~nuevas).sum())} testigo)")
+
+        df_parcial = validar(df_diagnostico, df_reporte[a_procesar].reset_index(drop=True),
+                             politica_duplicados, categoricas)
+        if df_parcial is None:
+            return None
+        df_parcial = df_parcial[df_anterior.columns]
+
+        # Fila i: de la corrida anterior (posición de su huella) o del parcial
+        origen = np.append(primera, 0)[posicion]  # -1 (fila nueva) cae en el 0 agregado
+        orden_parcial = np.cumsum(a_procesar) - 1
+        origen[nuevas] = len(df_anterior) + orden_parcial[nuevas]
+        df_resultado = _juntar(df_anterior, df_parcial, origen)
+        lineas = np.concatenate([lineas_anteriores, lineas_csv(df_parcial)])[origen]
+        reprocesadas, reutilizadas = int(a_procesar.sum()), int((~nuevas).sum())
+        solo_testigo = int((a_procesar & ~nuevas).sum())
+
+    df_resultado.attrs['validacion'] = {
+        'registros': len(df_reporte),
+        'coincidencias': int(df_traidas[f"Modificado el{SUFIJO}"].notna().sum()),
+        'conflictos_diagnostico': conflictos,
+    }
+    df_resultado.attrs['incremental'] = {
+        'filas_reprocesadas': reprocesadas,
+        'filas_reutilizadas': reutilizadas,
+        'filas_testigo': solo_testigo,
+        'segundos': round(time.perf_counter() - inicio, 4),
+    }
+    estado.guardar(df_resultado, huellas, lineas, firma)
+
+    if verificar and anterior is not None:
+        completo = validar(df_diagnostico, df_reporte, politica_duplicados, categoricas)
+        identico = completo is not None and completo.to_csv(index=False) == estado.texto_csv()
+        df_resultado.attrs['incremental']['identico'] = identico
+        decir(f"   🔬 Verificación contra corrida completa: {'IDÉNTICO ✅' if identico else 'DISTINTO ❌'}")
+        if not identico:
+            # Nunca se entrega (ni queda como base) un resultado que no coincide
+            if completo is None:
+                return None
+            completo.attrs['incremental'] = dict(df_resultado.attrs['incremental'], filas_reprocesadas=len(df_reporte))
+            df_resultado = completo
+            estado.guardar(completo, huellas, lineas_csv(completo), firma)
+    return df_resultado